@@ -0,0 +1,82 @@
+import click
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.benchmark import BENCHMARKS, BENCHMARK_SIZES, compare_results, run_benchmarks, write_results
+from src.instrumentation import stage_main
+
+@click.command()
+@click.option('--sizes', type=str, help="Comma-separated numbers of rows", default=",".join(str(size) for size in BENCHMARK_SIZES))
+@click.option('--only', type=click.Choice([benchmark.name for benchmark in BENCHMARKS]), multiple=True, help="Only run these benchmarks (repeatable)")
+@click.option('--repeat', type=int, help="Timed runs per benchmark and size", default=3)
+@click.option('--results-to', type=str, help="Path to directory where the JSON results will be written to", default="results/benchmarks")
+@click.option('--compare', type=str, help="Optional: JSON results of an earlier run to compare against", default=None)
+@click.option('--threshold', type=float, help="Relative slowdown of the median reported as a regression", default=0.2)
+@click.option('--profile', type=str, help="Optional: path to directory where cProfile statistics of this stage will be written to", default=None)
+@click.option('--events-to', type=str, help="Optional: path to a JSON-lines file timing events will be appended to", default=None)
+@stage_main("benchmark")
+
+def main(sizes, only, repeat, results_to, compare, threshold):
+    """
+    Times the pipeline on synthetic weather data and saves the timings as JSON.
+
+    The data comes from the offline Open-Meteo mock, so no network is needed. Results are written
+    to one file per commit, so a later run can be compared against an earlier one with `--compare`.
+
+    Parameters
+    ----------
+    sizes : str
+        Comma-separated numbers of rows. Default is "10000,100000,1000000". Exact SVM fits only run
+        up to 10,000 rows and prediction up to 100,000, as their time grows quadratically; script_help
+        runs once, at the smallest size.
+    only : tuple of str
+        Names of the benchmarks to run. Default is all of them: decode_daily, encode,
+        drop_split_preprocess, preprocessor_fit_transform, cross_val_model, svm_grid_search,
+        pipeline_predict and script_help.
+    repeat : int
+        Timed runs per benchmark and size; the minimum and median are reported. Default is 3.
+    results_to : str
+        Path to the directory the results are written to, as "<commit>.json". Default is "results/benchmarks".
+    compare : str
+        Optional: path to the results of an earlier run. Benchmarks whose median got slower by more
+        than `threshold` are listed, and the command exits with status 1.
+    threshold : float
+        Relative slowdown counted as a regression. Default is 0.2, i.e. 20%.
+    profile : str
+        Optional: directory the cProfile statistics of this run are written to, as "benchmark.pstats"
+        plus a "benchmark.txt" summary of the slowest functions.
+    events_to : str
+        Optional: path of a JSON-lines file span events are appended to, with the wall time, CPU time,
+        peak RSS and rows of this run and of the steps it goes through (see `src.instrumentation`).
+
+    Returns
+    -------
+    None
+        Writes the results file.
+
+    Examples
+    --------
+    Command line usage:
+    $ python scripts/benchmark.py --sizes=10000,100000
+    $ python scripts/benchmark.py --only=encode --only=decode_daily \
+        --compare=results/benchmarks/3f1c2ab4d5e6.json
+    """
+    results = run_benchmarks(sizes=[int(size) for size in sizes.split(",")], repeat=repeat,
+                             names=list(only) or None, log=click.echo)
+    path = write_results(results, results_to)
+    click.echo(f'Benchmark results have been parked at {path}')
+
+    if compare:
+        with open(compare) as f:
+            baseline = json.load(f)
+        comparison = compare_results(baseline, results, threshold=threshold)
+        click.echo(comparison.to_string(index=False))
+        regressions = comparison[comparison["regression"]]
+        if len(regressions) > 0:
+            click.echo(f'{len(regressions)} benchmark(s) slower than {baseline["commit"]} by more than {threshold:.0%}')
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import click
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.utils import SVM_ENGINES
+from src.instrumentation import stage_main
+
+@click.command()
+@click.option('--rows', type=int, multiple=True, help="Training set size to benchmark; may be repeated",
+              default=[1000, 2000, 4000, 8000, 16000, 32000])
+@click.option('--max-exact-rows', type=int, help="Largest training set the exact SVC is fitted on", default=32000)
+@click.option('--results-to', type=str, help="Path to the CSV file the results are written to", default=None)
+@click.option('--seed', type=int, help="Random seed", default=522)
+@click.option('--profile', type=str, help="Optional: path to directory where cProfile statistics of this stage will be written to", default=None)
+@click.option('--events-to', type=str, help="Optional: path to a JSON-lines file timing events will be appended to", default=None)
+@stage_main("benchmark_svm")
+
+def main(rows, max_exact_rows, results_to, seed):
+    """
+    Benchmarks the exact RBF SVC against the approximate Nyström engine on growing row counts.
+
+    For each size, a synthetic nonlinear classification problem with as many features as the
+    weather model is split 80/20; both engines are fitted on the training part inside the same
+    scaling pipeline and scored on the held-out part.
+
+    Parameters
+    ----------
+    rows : tuple of int
+        Training set sizes to benchmark. Default is 1000 to 32000, doubling.
+    max_exact_rows : int
+        The exact SVC is skipped for larger training sets. Default is 32000.
+    results_to : str
+        Optional: path to a CSV file to write the results to.
+    seed : int
+        Random seed for the data and the estimators. Default is 522.
+    profile : str
+        Optional: directory the cProfile statistics of this run are written to, as "benchmark_svm.pstats"
+        plus a "benchmark_svm.txt" summary of the slowest functions.
+    events_to : str
+        Optional: path of a JSON-lines file span events are appended to, with the wall time, CPU time,
+        peak RSS and rows of this run and of the steps it goes through (see `src.instrumentation`).
+
+    Returns
+    -------
+    None
+        Prints one line per (engine, size) with the fit time, prediction time and F1 score.
+
+    Examples
+    --------
+    $ python scripts/benchmark_svm.py --rows=10000 --rows=100000 --max-exact-rows=10000 \
+             --results-to=results/tables/svm_benchmark.csv
+    """
+    # Imported here rather than at the top, so that --help and invalid options are answered
+    # without loading pandas and sklearn
+    import pandas as pd
+    from sklearn.datasets import make_classification
+    from sklearn.metrics import f1_score
+    from sklearn.model_selection import train_test_split
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    from src.approx_svm import make_rbf_svm
+
+    results = []
+    for n_rows in rows:
+        X, y = make_classification(n_samples=int(n_rows / 0.8), n_features=7, n_informative=5,
+                                   n_clusters_per_class=3, flip_y=0.05, random_state=seed)
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=seed)
+
+        for engine in SVM_ENGINES:
+            if engine == "exact" and n_rows > max_exact_rows:
+                continue
+            pipe = make_pipeline(StandardScaler(), make_rbf_svm(engine, random_state=seed))
+            start = time.perf_counter()
+            pipe.fit(X_train, y_train)
+            fit_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            y_pred = pipe.predict(X_test)
+            predict_seconds = time.perf_counter() - start
+
+            results.append({"engine": engine,
+                            "rows": len(X_train),
+                            "fit_seconds": round(fit_seconds, 4),
+                            "predict_seconds": round(predict_seconds, 4),
+                            "f1": round(f1_score(y_test, y_pred), 4)})
+            click.echo(f'{engine:>6} {len(X_train):>8} rows: fit {fit_seconds:8.3f}s, '
+                       f'predict {predict_seconds:7.3f}s, F1 {results[-1]["f1"]:.3f}')
+
+    if results_to:
+        pd.DataFrame(results).to_csv(results_to, index=False)
+        click.echo(f'Benchmark results have been parked at {results_to}')
+
+if __name__ == '__main__':
+    main()
@@ -1,40 +1,33 @@
 import click
 import os
-import altair as alt
-import numpy as np
-import pandas as pd
-import pickle
-from sklearn import set_config
-from sklearn.pipeline import make_pipeline
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.model_selection import GridSearchCV
-from sklearn.svm import SVC
-from sklearn.linear_model import LogisticRegression
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.metrics import fbeta_score, make_scorer
-from joblib import dump
 import sys
-import matplotlib.pyplot as plt
-
-from sklearn.metrics import classification_report
-from sklearn import set_config
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.utils import cross_val_model
+from src.utils import SEARCH_MODES, SVM_ENGINES
+from src.instrumentation import span, stage_main
 
 @click.command()
 @click.option('--x_train', type=str, help="Path to X training data")
 @click.option('--y_train', type=str, help="Path to y training data")
 @click.option('--x-test', type=str, help="Path to x test data")
 @click.option('--y-test', type=str, help="Path to y test data")
-@click.option('--preprocessor', type=str, help="Path to preprocessor object", default=None)
+@click.option('--preprocessor', type=str, help="Path to preprocessor model artifact", default=None)
 @click.option('--columns-to-drop', type=str, help="Optional: columns to drop")
 @click.option('--pipeline-to', type=str, help="Path to directory where the pipeline object will be written to")
 @click.option('--plot-to', type=str, help="Path to directory where the plot will be written to")
+@click.option('--cv', 'cv_mode', type=click.Choice(["kfold", "walk-forward"]), help="Cross-validation: stratified 5-fold, or yearly walk-forward folds", default="kfold")
+@click.option('--dates-train', type=str, help="Path to the dates of the training rows (needed for --cv=walk-forward)", default=None)
 @click.option('--seed', type=int, help="Random seed", default=123)
+@click.option('--n-jobs', type=int, help="Number of worker processes for model comparison and tuning (-1 for all cores)", default=-1)
+@click.option('--cache-dir', type=str, help="Optional: directory to keep fitted preprocessing between runs", default=None)
+@click.option('--svm-engine', type=click.Choice(SVM_ENGINES), help="RBF SVM candidate: exact SVC, or Nystroem features with a linear SVM for large training sets", default="exact")
+@click.option('--search', type=click.Choice(SEARCH_MODES), help="Hyperparameter search: exhaustive grid over C, or successive halving over C and gamma", default="grid")
+@click.option('--profile', type=str, help="Optional: path to directory where cProfile statistics of this stage will be written to", default=None)
+@click.option('--events-to', type=str, help="Optional: path to a JSON-lines file timing events will be appended to", default=None)
+@stage_main("classification")
 
 def main(x_train, y_train, x_test, y_test, preprocessor, columns_to_drop,
-         pipeline_to, plot_to, seed): 
+         pipeline_to, plot_to, cv_mode, dates_train, seed, n_jobs, cache_dir, svm_engine, search): 
     """
     Trains classifiers on the provided dataset, evaluates their performance, 
     and saves the best performing model and relevant plots.
@@ -46,23 +39,52 @@ def main(x_train, y_train, x_test, y_test, preprocessor, columns_to_drop,
     Parameters
     ----------
     x_train : str
-        Path to the CSV file containing X training data.
+        Path to the Parquet, Feather or CSV file containing X training data.
     y_train : str
-        Path to the CSV file containing y training data.
+        Path to the Parquet, Feather or CSV file containing y training data.
     x_test : str
-        Path to the CSV file containing X test data.
+        Path to the Parquet, Feather or CSV file containing X test data.
     y_test : str
-        Path to the CSV file containing y test data.
+        Path to the Parquet, Feather or CSV file containing y test data.
     preprocessor : str
-        Path to the preprocessor object. Default is None.
+        Path to the preprocessor model artifact written by drop_split_preprocess.py. Default is None.
     columns_to_drop : str
         Optional: Path to CSV file containing names of columns to drop.
     pipeline_to : str
-        Path to the directory where the pipeline object will be saved.
+        Path to the directory where the pipeline is saved as a model artifact
+        ("optimum_cls_svm_pipeline.model", see `src.model_artifact`) with its test metrics.
     plot_to : str
         Path to the directory where plots will be saved.
+    cv_mode : str
+        Cross-validation used for model comparison and tuning. "kfold" (default) is 5-fold stratified
+        cross-validation. "walk-forward" tests on one year at a time and trains on the years before it
+        only (see `src.utils.WalkForwardSplit`), so no fold is trained on days after its test days.
+    dates_train : str
+        Path to the dates of the training rows written by drop_split_preprocess.py ("dates_train").
+        Required for `cv_mode="walk-forward"`.
     seed : int
         Random seed for reproducibility. Default is 123.
+    n_jobs : int
+        Number of worker processes used to cross-validate the candidate models and to run the
+        hyperparameter search. Default is -1 (all cores).
+    cache_dir : str
+        Optional: directory in which the preprocessor fitted on each fold is cached and shared by
+        all models and hyperparameter candidates. It is kept between runs, trimmed to 1 GB by
+        evicting the least recently used entries. By default a temporary directory is used.
+    svm_engine : str
+        Estimator used as the "RBF SVM" candidate. "exact" (default) is `SVC`, whose training time
+        grows with the square to cube of the number of rows; "approx" is `NystroemSVC`, a Nyström
+        approximation of the same kernel followed by a linear SVM, which grows about linearly.
+    search : str
+        Hyperparameter search for the SVM. "grid" (default) tries every C on the whole training set;
+        "halving" uses successive halving over the training-set size to search a joint C/gamma space
+        ten times larger in about the same time.
+    profile : str
+        Optional: directory the cProfile statistics of this run are written to, as "classification.pstats"
+        plus a "classification.txt" summary of the slowest functions.
+    events_to : str
+        Optional: path of a JSON-lines file span events are appended to, with the wall time, CPU time,
+        peak RSS and rows of this run and of the steps it goes through (see `src.instrumentation`).
 
     Returns
     -------
@@ -81,27 +103,42 @@ def main(x_train, y_train, x_test, y_test, preprocessor, columns_to_drop,
     --------
     Command line usage:
     $ python scripts/classification.py \
-             --x_train=data/processed/X_train.csv \
-             --y_train=data/processed/y_train.csv \
-             --x-test=data/processed/X_test.csv \
-             --y-test=data/processed/y_test.csv \
-             --preprocessor=results/models/precipit_preprocessor.pickle \
+             --x_train=data/processed/X_train.parquet \
+             --y_train=data/processed/y_train.parquet \
+             --x-test=data/processed/X_test.parquet \
+             --y-test=data/processed/y_test.parquet \
+             --preprocessor=results/models/precipit_preprocessor.model \
              --columns-to-drop=data/processed/columns_to_drop.csv \
              --pipeline-to=results/models \
              --plot-to=results/figures \
              --seed=522
     """
+    # Imported here rather than at the top, so that --help and invalid options are answered
+    # without loading pandas, sklearn and matplotlib
+    import numpy as np
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    from sklearn import set_config
+    from sklearn.pipeline import make_pipeline
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.tree import DecisionTreeClassifier
+    from sklearn.metrics import classification_report
+    from src.utils import cross_val_model, transform_cache, make_svc_search, WalkForwardSplit
+    from src.frame_io import read_frame
+    from src.model_artifact import save_model, load_model
+    from src.approx_svm import make_rbf_svm
 
     np.random.seed(seed)
     set_config(transform_output="pandas")
 
     #Read in data and preprocessor
-    X_train = pd.read_csv(x_train)
-    y_train = pd.read_csv(y_train)
+    X_train = read_frame(x_train)
+    y_train = read_frame(y_train)
     
     y_col_name = y_train.columns.tolist()[0]
     y_train_class = y_train[y_col_name]
-    preprocess = pickle.load(open(preprocessor, "rb"))
+    preprocess = load_model(preprocessor)
     
     if columns_to_drop:
         to_drop = pd.read_csv(columns_to_drop).feats_to_drop.tolist()
@@ -109,18 +146,26 @@ def main(x_train, y_train, x_test, y_test, preprocessor, columns_to_drop,
 
     click.echo(f'Running model training for columns {X_train.columns.tolist()}')
 
+    cv = None
+    if cv_mode == "walk-forward":
+        if dates_train is None:
+            raise click.UsageError("--cv=walk-forward needs --dates-train")
+        cv = WalkForwardSplit(read_frame(dates_train)['date'], freq="Y", min_train_periods=5)
+        click.echo(f'Cross-validating on {cv.get_n_splits()} walk-forward yearly folds')
+
     #Model parameter to be explored
     models = {
     "Decision Tree": DecisionTreeClassifier(random_state=522),
     "KNN": KNeighborsClassifier(),
-    "RBF SVM": SVC(random_state=522),
+    "RBF SVM": make_rbf_svm(svm_engine, random_state=522),
     "Logistic Regression": LogisticRegression(max_iter=2000, multi_class="ovr", random_state=522),
     }
 
     #Plot out feature importance
     pipe = make_pipeline(preprocess, models["Logistic Regression"])
-    pipe.fit(X_train, y_train_class)
-    numeric_features = pipe.named_steps['columntransformer'].named_transformers_['standardscaler'].get_feature_names_out().tolist()
+    with span("fit_logistic_regression", rows=len(X_train)):
+        pipe.fit(X_train, y_train_class)
+    numeric_features = pipe[:-1].get_feature_names_out().tolist()
     coefficients = pipe.named_steps['logisticregression'].coef_[0]
     
     feature_importance = pd.DataFrame({'Feature': numeric_features, 'Importance': np.abs(coefficients)})
@@ -129,63 +174,62 @@ def main(x_train, y_train, x_test, y_test, preprocessor, columns_to_drop,
     feature_importance.plot(x='Feature', y='Importance', kind='barh')
     plt.title("Feature_importance")
     plt.tight_layout()
-    plt.savefig(os.path.join(plot_to, "Feature_importance.png"))
+    with span("plot_feature_importance"):
+        plt.savefig(os.path.join(plot_to, "Feature_importance.png"))
 
     click.echo(f'Feature importance has been parked at {os.path.join(plot_to, "Feature_importance.png")}')
 
-    #Model type selection
-    classification_metrics = ["accuracy", "precision", "recall", "f1"]
-    results_df = cross_val_model(preprocess, models, X_train, y_train_class, classification_metrics)
-
-    #Choose the model based on the best F1 score. 
-    result_dict = results_df.loc['test_f1', :].to_dict()
-
-    # Create a bar chart with F1 scores all the tested models and publish it
-    plt.figure(figsize=(10, 8))
-    plt.bar(models.keys(), result_dict.values(), color='blue')
-    plt.xlabel('Models', fontsize=15)
-    plt.ylabel('Test F1 Score', fontsize=15)
-    plt.title('Test F1 Scores for Different Models', fontsize=18)
-    plt.ylim(0.8, 0.9)  # Set the y-axis limit between 0 and 1 for F1 scores
-    plt.xticks(rotation=45, fontsize=14)  # Rotate x-axis labels for better readability
-    plt.yticks(fontsize=14) 
-    plt.tight_layout()
-    plt.savefig(os.path.join(plot_to, "model_comparison.png"), dpi=300, bbox_inches='tight')
-    
-    click.echo(f'Model F1 performance has been parked at {os.path.join(plot_to, "model_comparison.png")}')
-    # Save the bar chart as an image
-    plt.tight_layout()
+    #Preprocessing of each fold is cached and shared by every model and hyperparameter candidate
+    with transform_cache(cache_dir) as memory:
+        #Model type selection
+        classification_metrics = ["accuracy", "precision", "recall", "f1"]
+        results_df = cross_val_model(preprocess, models, X_train, y_train_class, classification_metrics,
+                                     n_jobs=n_jobs, cv=cv, memory=memory)
+
+        #Choose the model based on the best F1 score. 
+        result_dict = results_df.loc['test_f1', :].to_dict()
+
+        # Create a bar chart with F1 scores all the tested models and publish it
+        plt.figure(figsize=(10, 8))
+        plt.bar(models.keys(), result_dict.values(), color='blue')
+        plt.xlabel('Models', fontsize=15)
+        plt.ylabel('Test F1 Score', fontsize=15)
+        plt.title('Test F1 Scores for Different Models', fontsize=18)
+        plt.ylim(0.8, 0.9)  # Set the y-axis limit between 0 and 1 for F1 scores
+        plt.xticks(rotation=45, fontsize=14)  # Rotate x-axis labels for better readability
+        plt.yticks(fontsize=14) 
+        plt.tight_layout()
+        with span("plot_model_comparison"):
+            plt.savefig(os.path.join(plot_to, "model_comparison.png"), dpi=300, bbox_inches='tight')
     
-    #Get model name with max_score
-    max_score = max(result_dict, key=result_dict.get)
-    model_name = max_score[0]
-
-    #Echo out if the model chosen is not expected as SVM RBF
-    if model_name == 'RBF SVM':
-        click.echo('Proceed with hyperparameter optimization for RBF SVM model')
-    else:
-        click.echo('Best model is not expected SVM RBF. Other model parameters required for optimization, exitting the program')
-        sys.exit(0)
-
-    #Hyperparameter optimization
-    param_grid = {"svc__C": 10.0**np.arange(-3,3)}
-    svc_pipe = make_pipeline(preprocess, models[model_name])
-    grid_search = GridSearchCV(svc_pipe,param_grid=param_grid,n_jobs=-1,return_train_score=True)
-    grid_search.fit(X_train, y_train_class)
-    C_best_value = grid_search.best_params_['svc__C']
-    opt_pipe = make_pipeline(preprocess, SVC(C=C_best_value, random_state = 522))
+        click.echo(f'Model F1 performance has been parked at {os.path.join(plot_to, "model_comparison.png")}')
+        # Save the bar chart as an image
+        plt.tight_layout()
     
-    opt_pipe.fit(X_train, y_train_class)
+        #Get model name with max_score
+        max_score = max(result_dict, key=result_dict.get)
+        model_name = max_score[0]
+
+        #Echo out if the model chosen is not expected as SVM RBF
+        if model_name == 'RBF SVM':
+            click.echo('Proceed with hyperparameter optimization for RBF SVM model')
+        else:
+            click.echo('Best model is not expected SVM RBF. Other model parameters required for optimization, exitting the program')
+            sys.exit(0)
 
-    #Saving optimum pipe as a pickle file for testing
-    with open(os.path.join(pipeline_to, "optimum_cls_svm_pipeline.pickle"), 'wb') as f:
-        pickle.dump(opt_pipe, f)
+        #Hyperparameter optimization
+        svc_pipe = make_pipeline(preprocess, models[model_name], memory=memory)
+        grid_search = make_svc_search(svc_pipe, search=search, n_jobs=n_jobs, random_state=seed, cv=cv)
+        with span("svm_search", rows=len(X_train), search=search):
+            grid_search.fit(X_train, y_train_class)
+        click.echo(f'Best hyperparameters: {grid_search.best_params_}')
 
-    click.echo(f'Optimized model has been parked at {os.path.join(pipeline_to, "optimum_cls_svm_pipeline.pickle")}')
+        #The search already refitted the best candidate on the whole training set
+        opt_pipe = grid_search.best_estimator_.set_params(memory=None)
 
     #Saving model evaluation result
-    X_test = pd.read_csv(x_test)
-    y_test = pd.read_csv(y_test)
+    X_test = read_frame(x_test)
+    y_test = read_frame(y_test)
     y_col_name = y_test.columns.tolist()[0]
     y_test_class = y_test[y_col_name]
 
@@ -194,11 +238,24 @@ def main(x_train, y_train, x_test, y_test, preprocessor, columns_to_drop,
         X_test = X_test.drop(columns=to_drop)
         
     click.echo(f'Running model test for columns {X_test.columns.tolist()}')        
-    y_pred = opt_pipe.predict(X_test)
+    with span("predict_test", rows=len(X_test)):
+        y_pred = opt_pipe.predict(X_test)
 
     report_dict = classification_report(y_test_class, y_pred, output_dict=True)
     report_df = pd.DataFrame(report_dict).transpose()
     
+    #Saving optimum pipe as a model artifact, together with its evaluation
+    pipeline_path = os.path.join(pipeline_to, "optimum_cls_svm_pipeline.model")
+    save_model(opt_pipe, pipeline_path, training_data=(X_train, y_train_class),
+               metrics={"best_params": {name: float(value) for name, value in grid_search.best_params_.items()},
+                        "cv_accuracy": round(float(grid_search.best_score_), 4),
+                        "test_accuracy": round(report_dict['accuracy'], 4),
+                        "test_precision": round(report_dict['True']['precision'], 4),
+                        "test_recall": round(report_dict['True']['recall'], 4),
+                        "test_f1": round(report_dict['True']['f1-score'], 4)})
+
+    click.echo(f'Optimized model has been parked at {pipeline_path}')
+
     report_df = report_df.loc[['False', 'True']].round(2)
     report_df.index = ['No rain', 'Rain']
     
@@ -212,7 +269,8 @@ def main(x_train, y_train, x_test, y_test, preprocessor, columns_to_drop,
     table.scale(1, 1.5) 
     ax.axis('off')
     plt.tight_layout()
-    plt.savefig(os.path.join(plot_to, "classification_report.png"), dpi=300, bbox_inches='tight')
+    with span("plot_classification_report"):
+        plt.savefig(os.path.join(plot_to, "classification_report.png"), dpi=300, bbox_inches='tight')
     click.echo(f'Classification report has been parked at {os.path.join(plot_to, "classification_report.png")}')
 
 if __name__ == '__main__':
@@ -4,15 +4,23 @@ import click
 import os
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.get_api import get_vancouver_data
+from src.instrumentation import stage_main
 
 @click.command()
 @click.option('--url', type=str, help="The url of the api endpoint")
 @click.option('--start-date', type=str, help="The start date of the data wish to obtain in YYYY-MM-DD")
 @click.option('--end-date', type=str, help="The end date of the data wish to obtain in YYYY-MM-DD")
 @click.option('--write-to', type=str, help="Path to directory where raw data will be written to")
+@click.option('--chunk-freq', type=str, help="Optional: pandas offset alias (e.g. YS) to fetch the range in concurrent windows", default=None)
+@click.option('--max-workers', type=int, help="Maximum number of windows fetched concurrently", default=4)
+@click.option('--store', type=str, help="Optional: path to a SQLite weather store; only dates it does not hold yet are downloaded", default=None)
+@click.option('--http-cache', type=str, help="Optional: path of the SQLite cache of API responses (default: ~/.cache/raincouver/http_cache.sqlite)", default=None)
+@click.option('--hourly', is_flag=True, help="Also stream the hourly history and write daily features aggregated from it")
+@click.option('--profile', type=str, help="Optional: path to directory where cProfile statistics of this stage will be written to", default=None)
+@click.option('--events-to', type=str, help="Optional: path to a JSON-lines file timing events will be appended to", default=None)
+@stage_main("download_data")
 
-def main(url, start_date, end_date, write_to):
+def main(url, start_date, end_date, write_to, chunk_freq, max_workers, store, http_cache, hourly):
     """
     Command-line interface for obtaining Vancouver data within a specified date range and writing it to a specified directory.
 
@@ -26,6 +34,27 @@ def main(url, start_date, end_date, write_to):
         A string in YYYY-MM-DD format (e.g. "2000-01-01") that the weather API will conclude the query.
     write_to : str
         A string path for the csv file to be stored.
+    chunk_freq : str
+        Optional: a pandas offset alias (e.g. "YS") splitting the range into windows fetched concurrently.
+    max_workers : int
+        Maximum number of windows fetched concurrently. Default is 4.
+    store : str
+        Optional: path to a SQLite weather store. Only the dates it does not hold yet are downloaded
+        and appended to it; the CSV is then written from the store.
+    http_cache : str
+        Optional: path of the SQLite file API responses are cached in. Responses for dates older
+        than a week never expire, so re-running the download does not hit the network again.
+        Defaults to $RAINCOUVER_HTTP_CACHE or ~/.cache/raincouver/http_cache.sqlite.
+    hourly : bool
+        If set, the hourly history is also streamed year by year and reduced to daily features
+        (e.g. max hourly intensity, longest dry-hours streak), written to
+        van_weather_hourly_features_{start_date}_{end_date}.csv next to the daily data.
+    profile : str
+        Optional: directory the cProfile statistics of this run are written to, as "download_data.pstats"
+        plus a "download_data.txt" summary of the slowest functions.
+    events_to : str
+        Optional: path of a JSON-lines file span events are appended to, with the wall time, CPU time,
+        peak RSS and rows of this run and of the steps it goes through (see `src.instrumentation`).
 
     Examples
     --------
@@ -33,11 +62,24 @@ def main(url, start_date, end_date, write_to):
         --url="https://archive-api.open-meteo.com/v1/archive" \
         --start-date=1990-01-01 \
         --end-date=2023-11-06\
-        --write-to="./data"
+        --write-to="./data" \
+        --chunk-freq=YS \
+        --store="./data/van_weather.sqlite"
     
     """
+    # Imported here rather than at the top, so that --help and invalid options are answered
+    # without loading pandas and the Open-Meteo client
+    from src.get_api import get_vancouver_data, get_vancouver_hourly_features
+    from src.http_cache import configure_http_cache
 
-    get_vancouver_data(url, start_date, end_date, write_to, create_csv = True)
+    if http_cache:
+        configure_http_cache(http_cache)
+
+    get_vancouver_data(url, start_date, end_date, write_to, create_csv = True,
+                       chunk_freq = chunk_freq, max_workers = max_workers, store = store)
+
+    if hourly:
+        get_vancouver_hourly_features(url, start_date, end_date, write_to, create_csv = True)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
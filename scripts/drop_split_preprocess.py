@@ -4,26 +4,26 @@
 import click
 import os
 import sys
-import numpy as np
-import pandas as pd
-import pickle
-from datetime import datetime as dt
-from sklearn.model_selection import train_test_split
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.compose import make_column_transformer, make_column_selector
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.utils import encode
+from src.frame_io import FRAME_FORMATS
+from src.instrumentation import span, stage_main
 
 
 @click.command()
-@click.option('--data-file', type=str, help="Path to raw data")
+@click.option('--data-file', type=str, help="Path to raw data (CSV file or SQLite weather store)")
 @click.option('--data-to', type=str, help="Path to directory where processed data will be written to")
 @click.option('--preprocessor-to', type=str, help="Path to directory where the preprocessor object will be written to")
+@click.option('--hourly-features', type=str, help="Optional: path to daily features aggregated from hourly data", default=None)
+@click.option('--lag-features', type=str, help="Optional: path to a CSV spec of lag and rolling-window features", default=None)
+@click.option('--data-format', type=click.Choice(list(FRAME_FORMATS)), help="File format of the processed data", default="parquet")
+@click.option('--split', type=click.Choice(["random", "time"]), help="Shuffled 80/20 split, or train on the first 80% of days and test on the last 20%", default="random")
 @click.option('--seed', type=int, help="Random seed", default=522)
+@click.option('--profile', type=str, help="Optional: path to directory where cProfile statistics of this stage will be written to", default=None)
+@click.option('--events-to', type=str, help="Optional: path to a JSON-lines file timing events will be appended to", default=None)
+@stage_main("drop_split_preprocess")
 
-def main(data_file, data_to, preprocessor_to, seed):
+def main(data_file, data_to, preprocessor_to, hourly_features, lag_features, data_format, split, seed):
     """
     Processes a dataset by dropping highly correlated features, splitting it into training and test sets,
     and creating a preprocessor for model training.
@@ -34,13 +34,35 @@ def main(data_file, data_to, preprocessor_to, seed):
     Parameters
     ----------
     data_file : str
-        Path to the raw data file.
+        Path to the raw data file, either a CSV file or a SQLite weather store.
     data_to : str
         Path to the directory where processed data (training and testing sets) will be written.
     preprocessor_to : str
         Path to the directory where the preprocessor object will be saved.
+    hourly_features : str
+        Optional: path to the CSV file of daily features aggregated from hourly data
+        (written by `download_data.py --hourly`). They are joined to the raw data on the date,
+        with the precipitation-based ones taken from the previous day.
+    lag_features : str
+        Optional: path to a CSV spec of lag and rolling-window features, e.g. "parameter/lag_features.csv"
+        (see `src.features.read_feature_spec`). The features are computed from the previous days only,
+        before correlated columns are dropped; the first days, whose history is too short, are dropped.
+    data_format : str
+        File format of the processed data: "parquet" (default) or "feather", which keep dtypes and
+        are read back memory-mapped, or "csv" for human-readable output.
+    split : str
+        "random" (default) shuffles the days before the 80/20 split. "time" keeps them in order, so the
+        model is tested on the most recent 20% of days and never trained on days after them.
+        In both cases the dates of the training and test rows are written to "dates_train" and
+        "dates_test", e.g. for walk-forward cross-validation in `classification.py`.
     seed : int
         Random seed for reproducibility. Default is 522.
+    profile : str
+        Optional: directory the cProfile statistics of this run are written to, as "drop_split_preprocess.pstats"
+        plus a "drop_split_preprocess.txt" summary of the slowest functions.
+    events_to : str
+        Optional: path of a JSON-lines file span events are appended to, with the wall time, CPU time,
+        peak RSS and rows of this run and of the steps it goes through (see `src.instrumentation`).
 
     Returns
     -------
@@ -49,9 +71,11 @@ def main(data_file, data_to, preprocessor_to, seed):
 
     Notes
     -----
-    - The data is assumed to be in a CSV format compatible with pandas.read_csv.
+    - The data is assumed to be in a CSV format compatible with pandas.read_csv, or a SQLite
+      weather store written by `get_vancouver_data`.
     - The script creates directories specified in `data_to` and `preprocessor_to` if they do not exist.
-    - The preprocessing involves encoding categorical variables and scaling numerical variables.
+    - The preprocessing involves encoding cyclical variables (month, day of year and wind direction)
+      with sine and cosine, and scaling numerical variables.
 
     Examples
     --------
@@ -59,10 +83,26 @@ def main(data_file, data_to, preprocessor_to, seed):
       --data-file=data/van_weather_1990-01-01_2023-11-06.csv \
       --data-to=data/processed  \
       --preprocessor-to=results/models \
+      --lag-features=parameter/lag_features.csv \
+      --data-format=parquet \
       --seed=522
     """
+    # Imported here rather than at the top, so that --help and invalid options are answered
+    # without loading pandas and sklearn
+    import numpy as np
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.compose import make_column_transformer, make_column_selector
+    from sklearn.pipeline import make_pipeline
+    from src.utils import CYCLICAL_PERIODS
+    from src.cyclical import CyclicalEncoder
+    from src.get_api import HOURLY_PRECIPITATION_FEATURES
+    from src.frame_io import write_frame
+    from src.weather_store import load_weather_frame
+    from src.model_artifact import save_model
+    from src.features import FeatureEngine, read_feature_spec
 
-    
     # Create relevant file paths for outputs
     # write_to path transforming
     if data_to != '':
@@ -84,11 +124,27 @@ def main(data_file, data_to, preprocessor_to, seed):
     
     # Read the raw data file and remove features that are highly correlated with the selected 
     #features based on the concludsion from EDA
-    precipit_df = pd.read_csv(data_file)
+    precipit_df = load_weather_frame(data_file)
     precipit_df['is_precipitation'] = precipit_df['precipitation_sum'] > 0.01
     precipit_df['date'] = pd.to_datetime(precipit_df['date'])
     precipit_df['month'] = precipit_df['date'].dt.month
+    precipit_df['day_of_year'] = precipit_df['date'].dt.dayofyear
+
+    if hourly_features:
+        # Same-day precipitation features would give the target away, so only the previous day's are used
+        hourly_df = pd.read_csv(hourly_features, parse_dates=['date'], index_col='date')
+        hourly_df[HOURLY_PRECIPITATION_FEATURES] = (hourly_df[HOURLY_PRECIPITATION_FEATURES]
+                                                    .shift(1, freq='D')
+                                                    .reindex(hourly_df.index))
+        precipit_df = precipit_df.merge(hourly_df.dropna().reset_index(), on='date', how='inner')
+
+    if lag_features:
+        engine = FeatureEngine(read_feature_spec(lag_features))
+        precipit_df = precipit_df.sort_values('date', kind='stable')
+        features_df = engine.transform(precipit_df)
+        precipit_df = pd.concat([precipit_df, features_df], axis=1).loc[features_df.notna().all(axis=1)]
     
+    dates = precipit_df['date']
     precipit_df = precipit_df.drop(columns=['sunrise',
                                             'sunset', 
                                             'weather_code', 
@@ -106,9 +162,12 @@ def main(data_file, data_to, preprocessor_to, seed):
     
 
     # Split data set into 80% training set and 20% test set
-    train_df, test_df = train_test_split(
-        precipit_df, test_size=0.2, random_state=seed
-    )
+    if split == "time":
+        precipit_df = precipit_df.loc[dates.sort_values(kind="stable").index]
+    with span("train_test_split", rows=len(precipit_df), split=split):
+        train_df, test_df = train_test_split(
+            precipit_df, test_size=0.2, random_state=seed, shuffle=split == "random"
+        )
 
     X_train = train_df.drop(columns=['is_precipitation'])
     y_train = train_df['is_precipitation']
@@ -116,26 +175,29 @@ def main(data_file, data_to, preprocessor_to, seed):
     X_test = test_df.drop(columns=['is_precipitation'])
     y_test = test_df['is_precipitation']
     
-    # Column transformation and preprocessing
-    X_train = encode(X_train, 'month', 12)
-    X_test = encode(X_test, 'month', 12 )
-
-    
+    # Column transformation and preprocessing: cyclical features (month, day of year, wind direction)
+    # are encoded as sine and cosine inside the preprocessor, so the fitted pipeline also does it at inference
     numeric_transformer = StandardScaler()
 
-    preprocess = make_column_transformer(
-        (numeric_transformer, make_column_selector(dtype_include='number')),
-        remainder='passthrough',
-        verbose_feature_names_out=False
+    preprocess = make_pipeline(
+        CyclicalEncoder(CYCLICAL_PERIODS),
+        make_column_transformer(
+            (numeric_transformer, make_column_selector(dtype_include='number')),
+            remainder='passthrough',
+            verbose_feature_names_out=False
+        )
     )
 
     # Exporting X_train, y_train, X_test, y_test and preprocessor
-    X_train.to_csv(os.path.join(data_to, "X_train.csv"), index=False)
-    y_train.to_csv(os.path.join(data_to, "y_train.csv"), index=False)
-    X_test.to_csv(os.path.join(data_to, "X_test.csv"), index=False)
-    y_test.to_csv(os.path.join(data_to, "y_test.csv"), index=False)
+    write_frame(X_train, data_to, "X_train", data_format)
+    write_frame(y_train, data_to, "y_train", data_format)
+    write_frame(X_test, data_to, "X_test", data_format)
+    write_frame(y_test, data_to, "y_test", data_format)
+    write_frame(dates.loc[train_df.index], data_to, "dates_train", data_format)
+    write_frame(dates.loc[test_df.index], data_to, "dates_test", data_format)
     
-    pickle.dump(preprocess, open(os.path.join(preprocessor_to, "precipit_preprocessor.pickle"), "wb"))
+    save_model(preprocess, os.path.join(preprocessor_to, "precipit_preprocessor.model"),
+               feature_names=X_train.columns, training_data=(X_train, y_train))
 
 if __name__ == '__main__':
     main()
@@ -4,16 +4,21 @@
 
 import click
 import os
-import pandas as pd
-import altair as alt
-import matplotlib.pyplot as plt
-import seaborn as sns
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.instrumentation import span, stage_main
 
 @click.command()
-@click.option('--data-file', type=str, help="Path to the dataset")
+@click.option('--data-file', type=str, help="Path to the dataset (CSV file or SQLite weather store)")
 @click.option('--plot-to', type=str, help="Path to directory where the plots will be written to")
+@click.option('--n-jobs', type=int, help="Number of worker processes rendering figures (-1 for all cores)", default=-1)
+@click.option('--force', is_flag=True, help="Render every figure, even those whose data has not changed")
+@click.option('--profile', type=str, help="Optional: path to directory where cProfile statistics of this stage will be written to", default=None)
+@click.option('--events-to', type=str, help="Optional: path to a JSON-lines file timing events will be appended to", default=None)
+@stage_main("eda")
 
-def main(data_file, plot_to):
+def main(data_file, plot_to, n_jobs, force):
     """
     Performs exploratory data analysis (EDA) on precipitation data. 
     This includes generating histograms for numeric features and a correlation heatmap.
@@ -22,12 +27,27 @@ def main(data_file, plot_to):
     and then produces histograms for all numeric columns and a correlation heatmap. 
     Both the histograms and heatmap are saved as PNG files.
 
+    The data is reduced before plotting: histograms are binned in NumPy, so only the bin counts
+    reach the chart, and the heatmap only receives the correlation matrix. The figures are then
+    rendered in parallel worker processes, and a figure whose data and drawing code are unchanged
+    since it was last rendered is skipped (see `src.eda_figures.render_figures`).
+
     Parameters
     ----------
     data_file : str
-        Path to the CSV file containing the dataset.
+        Path to the CSV file or SQLite weather store containing the dataset.
     plot_to : str
         Path to the directory where the plots will be saved.
+    n_jobs : int
+        Number of worker processes rendering figures, at most one per figure. Default is -1 (all cores).
+    force : bool
+        If set, every figure is rendered even if it is up to date. Default is False.
+    profile : str
+        Optional: directory the cProfile statistics of this run are written to, as "eda.pstats"
+        plus a "eda.txt" summary of the slowest functions.
+    events_to : str
+        Optional: path of a JSON-lines file span events are appended to, with the wall time, CPU time,
+        peak RSS and rows of this run and of the steps it goes through (see `src.instrumentation`).
 
     Returns
     -------
@@ -47,53 +67,33 @@ def main(data_file, plot_to):
           --data-file=data/van_weather_1990-01-01_2023-11-06.csv \
           --plot-to=results/figures
     """
+    # Imported here rather than at the top, so that --help and invalid options are answered
+    # without loading pandas and the plotting libraries
+    from src.weather_store import load_weather_frame
+    from src.eda_figures import (Figure, histogram_counts, render_correlation_heatmap, render_figures,
+                                 render_histograms)
 
     # Read the data and preprocess
-    precipit_df = pd.read_csv(data_file).drop(columns = ['sunrise', 
+    precipit_df = load_weather_frame(data_file).drop(columns = ['sunrise', 
                                                          'sunset', 
                                                          'weather_code', 
                                                          'rain_sum', 
                                                          'snowfall_sum',
                                                          'precipitation_hours', 
                                                          'date'])
-
-    # Generate histograms for numeric columns
-    alt.data_transformers.disable_max_rows()
-    
     numeric_cols = precipit_df.select_dtypes(include=['number']).columns.tolist()
 
-    numeric_cols_hists = alt.Chart(precipit_df).mark_bar().encode(
-        alt.X(alt.repeat(), type='quantitative', bin=alt.Bin(maxbins=40)),
-        y='count()',
-    ).properties(
-        height=100,
-        width=200
-    ).repeat(
-        numeric_cols,
-        columns=3
-    )
-    # write_to path transforming
-    if plot_to != '':
-        plot_to = plot_to if plot_to[-1] == '/' else plot_to + '/'
-            
-    # Check write_to path existence
-    if not os.path.exists(plot_to):
-        os.makedirs(plot_to)
-
-    # Save histograms as PNG
-    numeric_cols_hists.save(os.path.join(plot_to, "histogram_numeric_features.png"),
-              scale_factor=2.0, dpi=300)
+    # Reduce the data to what each figure shows: bin counts and the correlation matrix
+    counts = histogram_counts(precipit_df, numeric_cols)
+    with span("spearman_correlation", rows=len(precipit_df)):
+        correlation_table = precipit_df[numeric_cols].corr(method='spearman')
 
-    # Generate and save correlation table
-    correlation_table = precipit_df[numeric_cols].corr(method='spearman')
-    plt.figure(figsize=(12, 10))
-    sns.heatmap(correlation_table, annot=True, cmap="coolwarm", fmt=".2f", vmin=-1, vmax=1)
-    plt.xticks(rotation=45, ha='right', fontsize=10)
-    plt.yticks(fontsize=10)
-    plt.title("Correlation between features", fontsize=16)
-    plt.tight_layout()
-    plt.savefig(os.path.join(plot_to, "correlation_heatmap.png"), bbox_inches='tight', dpi=300)
+    figures = [Figure("histogram_numeric_features.png", render_histograms, counts),
+               Figure("correlation_heatmap.png", render_correlation_heatmap, correlation_table)]
+    with span("render_figures"):
+        status = render_figures(figures, plot_to, n_jobs=n_jobs, force=force)
+    for name, state in status.items():
+        click.echo(f'{name} {"is up to date" if state == "cached" else "has been parked"} at {os.path.join(plot_to, name)}')
 
-    
 if __name__ == '__main__':
     main()
@@ -0,0 +1,63 @@
+import click
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.instrumentation import stage_main
+
+@click.command()
+@click.option('--pipeline', type=str, help="Path to the classification pipeline model artifact",
+              default="results/models/optimum_cls_svm_pipeline.model")
+@click.option('--export-to', type=str, help="Path of the compiled .npz artifact to write",
+              default="results/models/optimum_cls_svm_compiled.npz")
+@click.option('--profile', type=str, help="Optional: path to directory where cProfile statistics of this stage will be written to", default=None)
+@click.option('--events-to', type=str, help="Optional: path to a JSON-lines file timing events will be appended to", default=None)
+@stage_main("export_svm")
+
+def main(pipeline, export_to):
+    """
+    Exports the trained SVM pipeline to a compact NumPy artifact with a NumPy-only predictor.
+
+    The scaler means and scales, the support vectors (or Nyström components), their weights, the
+    intercept and gamma are written to one ".npz" file. `src.compiled_svm.load_compiled_svm` turns
+    it back into a predictor that gives the same decisions as the pipeline without importing
+    sklearn.
+
+    Parameters
+    ----------
+    pipeline : str
+        Path to the pipeline model artifact. Default is "results/models/optimum_cls_svm_pipeline.model".
+    export_to : str
+        Path of the artifact to write. Default is "results/models/optimum_cls_svm_compiled.npz".
+    profile : str
+        Optional: directory the cProfile statistics of this run are written to, as "export_svm.pstats"
+        plus a "export_svm.txt" summary of the slowest functions.
+    events_to : str
+        Optional: path of a JSON-lines file span events are appended to, with the wall time, CPU time,
+        peak RSS and rows of this run and of the steps it goes through (see `src.instrumentation`).
+
+    Returns
+    -------
+    None
+        This function does not return any value but writes the artifact to `export_to`.
+
+    Examples
+    --------
+    Command line usage:
+    $ python scripts/export_svm.py \
+             --pipeline=results/models/optimum_cls_svm_pipeline.model \
+             --export-to=results/models/optimum_cls_svm_compiled.npz
+    """
+    # Imported here rather than at the top, so that --help and invalid options are answered
+    # without loading pandas and sklearn
+    from src.model_artifact import load_model
+    from src.compiled_svm import export_svm
+
+    pipe = load_model(pipeline)
+
+    model = export_svm(pipe, export_to)
+    click.echo(f'Compiled SVM with {len(model.weights)} centers over {len(model.feature_names)} features '
+               f'has been parked at {export_to}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import click
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.mock_openmeteo import MOCK_MODES, UPSTREAM_URL, make_mock_server
+from src.instrumentation import stage_main
+
+@click.command()
+@click.option('--host', type=str, help="Address to bind", default="127.0.0.1")
+@click.option('--port', type=int, help="Port to bind", default=8081)
+@click.option('--mode', type=click.Choice(MOCK_MODES), help="Where answers come from", default="synthetic")
+@click.option('--fixtures', type=str, help="Directory of recorded fixtures (replay and record modes)", default=None)
+@click.option('--upstream', type=str, help="Base URL requests are forwarded to when recording", default=UPSTREAM_URL)
+@click.option('--latency-ms', type=float, help="Delay added to every answer", default=0.0)
+@click.option('--verbose', is_flag=True, help="Log every request")
+@click.option('--profile', type=str, help="Optional: path to directory where cProfile statistics of this stage will be written to", default=None)
+@click.option('--events-to', type=str, help="Optional: path to a JSON-lines file timing events will be appended to", default=None)
+@stage_main("mock_openmeteo")
+
+def main(host, port, mode, fixtures, upstream, latency_ms, verbose):
+    """
+    Serves an offline stand-in for the Open-Meteo archive API.
+
+    Answers are FlatBuffers bodies like the real API's, so `download_data.py` and
+    `openmeteo_requests.Client` work unchanged against it.
+
+    Parameters
+    ----------
+    host : str
+        Address to bind. Default is "127.0.0.1", i.e. only local clients.
+    port : int
+        Port to bind. Default is 8081.
+    mode : str
+        "synthetic" (default) answers with deterministic synthetic weather, "record" forwards
+        requests to `upstream` and saves the answers in `fixtures`, "replay" serves only those
+        saved answers and fails on any other request.
+    fixtures : str
+        Directory of recorded fixtures, required for "record" and "replay".
+    upstream : str
+        Base URL of the real API. Default is "https://archive-api.open-meteo.com".
+    latency_ms : float
+        Delay added to every answer, e.g. to load-test concurrent fetching. Default is 0.
+    verbose : bool
+        If set, every request is logged to standard error.
+    profile : str
+        Optional: directory the cProfile statistics of this run are written to, as "mock_openmeteo.pstats"
+        plus a "mock_openmeteo.txt" summary of the slowest functions.
+    events_to : str
+        Optional: path of a JSON-lines file span events are appended to, with the wall time, CPU time,
+        peak RSS and rows of this run and of the steps it goes through (see `src.instrumentation`).
+
+    Returns
+    -------
+    None
+        Serves until interrupted.
+
+    Examples
+    --------
+    Command line usage:
+    $ python scripts/mock_openmeteo.py --port=8081 --latency-ms=50
+    $ python scripts/download_data.py --url="http://127.0.0.1:8081/v1/archive" --start-date=1990-01-01 \
+        --end-date=2023-11-06 --write-to=data --chunk-freq=YS --max-workers=8
+    """
+    server = make_mock_server(host=host, port=port, mode=mode, fixtures=fixtures, upstream=upstream,
+                              latency_ms=latency_ms, verbose=verbose)
+    click.echo(f'Serving mock Open-Meteo ({mode}) on http://{server.server_address[0]}:{server.server_address[1]}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
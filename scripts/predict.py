@@ -0,0 +1,87 @@
+import click
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.instrumentation import current_span, stage_main
+
+@click.command()
+@click.option('--pipeline', type=str, help="Path to the classification pipeline model artifact",
+              default="results/models/optimum_cls_svm_pipeline.model")
+@click.option('--input', 'input_path', type=str, help="Path to a CSV, Parquet or Feather file of features, or - for NDJSON on stdin", default="-")
+@click.option('--output', type=str, help="Path to a CSV, Parquet or Feather file for the scores, or - for NDJSON on stdout", default="-")
+@click.option('--chunk-size', type=int, help="Number of rows scored at a time", default=50_000)
+@click.option('--keep-columns', type=str, multiple=True, help="Optional: input column copied to the output (e.g. date); may be repeated")
+@click.option('--profile', type=str, help="Optional: path to directory where cProfile statistics of this stage will be written to", default=None)
+@click.option('--events-to', type=str, help="Optional: path to a JSON-lines file timing events will be appended to", default=None)
+@stage_main("predict")
+
+def main(pipeline, input_path, output, chunk_size, keep_columns):
+    """
+    Scores large inputs with the trained pipeline, one fixed-size chunk at a time.
+
+    The pipeline is loaded once; the input is then read, scored and written chunk by chunk, so
+    memory use stays flat however many rows are scored. Each output row holds the kept columns,
+    the predicted class ("prediction") and the SVM decision score ("decision_score").
+    Columns the model was not trained on are ignored.
+
+    Parameters
+    ----------
+    pipeline : str
+        Path to the pipeline model artifact. Default is "results/models/optimum_cls_svm_pipeline.model".
+    input_path : str
+        Path to a ".csv", ".parquet" or ".feather" file with the model features, or "-" (default)
+        to read newline-delimited JSON records from standard input.
+    output : str
+        Path to a ".csv", ".parquet" or ".feather" file, or "-" (default) to write
+        newline-delimited JSON records to standard output.
+    chunk_size : int
+        Number of rows read and scored at a time. Default is 50000.
+    keep_columns : tuple of str
+        Optional: input columns copied to the output, e.g. a date or station identifier.
+    profile : str
+        Optional: directory the cProfile statistics of this run are written to, as "predict.pstats"
+        plus a "predict.txt" summary of the slowest functions.
+    events_to : str
+        Optional: path of a JSON-lines file span events are appended to, with the wall time, CPU time,
+        peak RSS and rows of this run and of the steps it goes through (see `src.instrumentation`).
+
+    Returns
+    -------
+    None
+        This function does not return any value but writes the scores to `output`.
+        Progress messages go to standard error so that standard output only carries scores.
+
+    Examples
+    --------
+    Command line usage:
+    $ python scripts/predict.py \
+             --input=data/processed/X_test.parquet \
+             --output=results/predictions.parquet
+    $ cat new_days.ndjson | python scripts/predict.py --keep-columns=date > scores.ndjson
+    """
+    # Imported here rather than at the top, so that --help and invalid options are answered
+    # without loading pandas and sklearn
+    from sklearn import set_config
+    from src.model_artifact import load_model
+    from src.frame_io import iter_frame_chunks, write_frame_chunks
+    from src.inference import predict_chunks
+
+    # The pipeline was trained on DataFrames passed between its steps, as in classification.py
+    set_config(transform_output="pandas")
+
+    pipe = load_model(pipeline)
+
+    start = time.perf_counter()
+    chunks = iter_frame_chunks(input_path, chunksize=chunk_size)
+    n_rows = write_frame_chunks(predict_chunks(pipe, chunks, keep_columns), output)
+    current_span().rows = n_rows
+    seconds = time.perf_counter() - start
+
+    click.echo(f'Scored {n_rows} rows in {seconds:.2f}s', err=True)
+    if output != "-":
+        click.echo(f'Predictions have been parked at {output}', err=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+import click
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.stage_cache import Stage, run_stage, script_inputs
+from src.instrumentation import span, stage_main
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+RAW_DATA = "data/van_weather_1990-01-01_2023-11-06.csv"
+PROCESSED_DATA_DIR = "data/processed"
+FIGURES_DIR = "results/figures"
+MODELS_DIR = "results/models"
+REPORTS_DIR = "reports/milestone4"
+
+# Same stages, arguments and order as the `all` target of the Makefile; the Python inputs of a stage
+# are its script and every src module the script imports, directly or not
+STAGES = [
+    Stage("download_data",
+          ["python", "scripts/download_data.py",
+           "--url=https://archive-api.open-meteo.com/v1/archive",
+           "--start-date=1990-01-01",
+           "--end-date=2023-11-06",
+           "--write-to=./data",
+           "--chunk-freq=YS",
+           "--store=./data/van_weather.sqlite"],
+          inputs=script_inputs("scripts/download_data.py", root=ROOT),
+          outputs=[RAW_DATA]),
+    Stage("eda",
+          ["python", "scripts/eda.py",
+           f"--data-file={RAW_DATA}",
+           f"--plot-to={FIGURES_DIR}"],
+          inputs=[*script_inputs("scripts/eda.py", root=ROOT), RAW_DATA],
+          outputs=[f"{FIGURES_DIR}/histogram_numeric_features.png",
+                   f"{FIGURES_DIR}/correlation_heatmap.png"]),
+    Stage("drop_split_preprocess",
+          ["python", "scripts/drop_split_preprocess.py",
+           f"--data-file={RAW_DATA}",
+           f"--data-to={PROCESSED_DATA_DIR}",
+           f"--preprocessor-to={MODELS_DIR}",
+           "--data-format=parquet",
+           "--seed=522"],
+          inputs=[*script_inputs("scripts/drop_split_preprocess.py", root=ROOT), RAW_DATA],
+          outputs=[f"{PROCESSED_DATA_DIR}/X_train.parquet",
+                   f"{PROCESSED_DATA_DIR}/y_train.parquet",
+                   f"{PROCESSED_DATA_DIR}/X_test.parquet",
+                   f"{PROCESSED_DATA_DIR}/y_test.parquet",
+                   f"{PROCESSED_DATA_DIR}/dates_train.parquet",
+                   f"{PROCESSED_DATA_DIR}/dates_test.parquet",
+                   f"{MODELS_DIR}/precipit_preprocessor.model"]),
+    Stage("classification",
+          ["python", "scripts/classification.py",
+           f"--x_train={PROCESSED_DATA_DIR}/X_train.parquet",
+           f"--y_train={PROCESSED_DATA_DIR}/y_train.parquet",
+           f"--x-test={PROCESSED_DATA_DIR}/X_test.parquet",
+           f"--y-test={PROCESSED_DATA_DIR}/y_test.parquet",
+           f"--preprocessor={MODELS_DIR}/precipit_preprocessor.model",
+           "--columns-to-drop=parameter/columns_to_drop.csv",
+           f"--pipeline-to={MODELS_DIR}",
+           f"--plot-to={FIGURES_DIR}",
+           "--seed=522"],
+          inputs=[*script_inputs("scripts/classification.py", root=ROOT),
+                  f"{PROCESSED_DATA_DIR}/X_train.parquet",
+                  f"{PROCESSED_DATA_DIR}/y_train.parquet",
+                  f"{PROCESSED_DATA_DIR}/X_test.parquet",
+                  f"{PROCESSED_DATA_DIR}/y_test.parquet",
+                  f"{MODELS_DIR}/precipit_preprocessor.model",
+                  "parameter/columns_to_drop.csv"],
+          outputs=[f"{MODELS_DIR}/optimum_cls_svm_pipeline.model",
+                   f"{FIGURES_DIR}/Feature_importance.png",
+                   f"{FIGURES_DIR}/model_comparison.png",
+                   f"{FIGURES_DIR}/classification_report.png"]),
+    Stage("build_report",
+          ["jupyter-book", "build", REPORTS_DIR],
+          inputs=[f"{REPORTS_DIR}/raincouver_prediction_report4.ipynb",
+                  f"{REPORTS_DIR}/_config.yml",
+                  f"{REPORTS_DIR}/_toc.yml",
+                  f"{REPORTS_DIR}/references.bib",
+                  f"{FIGURES_DIR}/classification_report.png",
+                  f"{FIGURES_DIR}/correlation_heatmap.png",
+                  f"{FIGURES_DIR}/Feature_importance.png",
+                  f"{FIGURES_DIR}/histogram_numeric_features.png",
+                  f"{FIGURES_DIR}/model_comparison.png"],
+          outputs=[f"{REPORTS_DIR}/_build/html"]),
+]
+
+@click.command()
+@click.option('--cache-dir', type=str, help="Path to directory holding the stage cache", default=".stage_cache")
+@click.option('--stage', 'only', type=click.Choice([stage.name for stage in STAGES]), multiple=True,
+              help="Optional: only run the named stage(s); may be repeated")
+@click.option('--force', is_flag=True, help="Run the stages even if the cache holds their outputs")
+@click.option('--profile', type=str, help="Optional: path to directory where cProfile statistics of this stage will be written to", default=None)
+@click.option('--events-to', type=str, help="Optional: path to a JSON-lines file timing events will be appended to", default=None)
+@stage_main("run_pipeline")
+
+def main(cache_dir, only, force):
+    """
+    Runs the analysis pipeline, skipping every stage whose inputs have not changed.
+
+    Each stage is keyed by a hash of its command line (including parameters such as `--seed`),
+    its script and source modules, and the data and parameter files it reads. A stage whose key is
+    already in the content-addressed cache is skipped and its outputs are restored from the cache
+    if they are missing, so only the stages downstream of an actual change are rerun.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Path to the directory holding the stage cache. Default is ".stage_cache".
+    only : tuple of str
+        Optional: names of the stages to run. All stages are run by default.
+    force : bool
+        If set, the selected stages are run even if the cache holds their outputs.
+    profile : str
+        Optional: directory the cProfile statistics of this run are written to, as "run_pipeline.pstats"
+        plus a "run_pipeline.txt" summary of the slowest functions.
+    events_to : str
+        Optional: path of a JSON-lines file span events are appended to, with the wall time, CPU time,
+        peak RSS and rows of this run and of the steps it goes through (see `src.instrumentation`).
+        Both settings are passed on to the stages, which write their own profiles and events.
+
+    Examples
+    --------
+    $ python scripts/run_pipeline.py
+    $ python scripts/run_pipeline.py --stage=classification --force
+    """
+    for stage in STAGES:
+        if only and stage.name not in only:
+            continue
+        with span("run_stage", stage_name=stage.name) as stage_span:
+            status = run_stage(stage, cache_dir=cache_dir, force=force)
+            stage_span.attributes["cache_status"] = status
+        click.echo(f'{stage.name}: {status}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import click
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.instrumentation import stage_main
+
+@click.command()
+@click.option('--pipeline', type=str, help="Path to the classification pipeline model artifact",
+              default="results/models/optimum_cls_svm_pipeline.model")
+@click.option('--host', type=str, help="Address to bind", default="127.0.0.1")
+@click.option('--port', type=int, help="Port to bind", default=8000)
+@click.option('--max-batch-size', type=int, help="Rows after which a micro-batch is scored without waiting", default=64)
+@click.option('--max-wait-ms', type=float, help="Longest time a request waits for others to join its micro-batch", default=5.0)
+@click.option('--request-timeout', type=float, help="Seconds a request waits for its prediction before failing with status 503", default=30.0)
+@click.option('--verbose', is_flag=True, help="Log every request")
+@click.option('--profile', type=str, help="Optional: path to directory where cProfile statistics of this stage will be written to", default=None)
+@click.option('--events-to', type=str, help="Optional: path to a JSON-lines file timing events will be appended to", default=None)
+@stage_main("serve")
+
+def main(pipeline, host, port, max_batch_size, max_wait_ms, request_timeout, verbose):
+    """
+    Serves rain predictions over HTTP from a warm pipeline, coalescing concurrent requests.
+
+    The pipeline is loaded once. Requests arriving within `max_wait_ms` of each other are scored
+    together in one pipeline call, which amortizes sklearn's per-call overhead.
+
+    Parameters
+    ----------
+    pipeline : str
+        Path to the pipeline model artifact. Default is "results/models/optimum_cls_svm_pipeline.model".
+    host : str
+        Address to bind. Default is "127.0.0.1", i.e. only local clients.
+    port : int
+        Port to bind. Default is 8000.
+    max_batch_size : int
+        Number of rows after which a micro-batch is scored without waiting further. Default is 64.
+    max_wait_ms : float
+        Longest time the first request of a micro-batch waits for others to join. Default is 5.
+    request_timeout : float
+        Seconds a request waits for its prediction before it is answered with status 503. Default is 30.
+    verbose : bool
+        If set, every request is logged to standard error.
+    profile : str
+        Optional: directory the cProfile statistics of this run are written to, as "serve.pstats"
+        plus a "serve.txt" summary of the slowest functions.
+    events_to : str
+        Optional: path of a JSON-lines file span events are appended to, with the wall time, CPU time,
+        peak RSS and rows of this run and of the steps it goes through (see `src.instrumentation`).
+
+    Returns
+    -------
+    None
+        Serves until interrupted. POST /predict takes a JSON record or list of records with the
+        model features; GET /metrics returns p50/p99 latency and throughput counters.
+
+    Examples
+    --------
+    Command line usage:
+    $ python scripts/serve.py --port=8000
+    $ curl -X POST localhost:8000/predict -d '{"temperature_2m_mean": 9.1, ...}'
+    $ curl localhost:8000/metrics
+    """
+    # Imported here rather than at the top, so that --help and invalid options are answered
+    # without loading pandas and sklearn
+    from src.model_artifact import load_model
+    from src.serving import make_server
+
+    pipe = load_model(pipeline)
+
+    server = make_server(pipe, host=host, port=port, max_batch_size=max_batch_size,
+                         max_wait_ms=max_wait_ms, verbose=verbose, request_timeout=request_timeout)
+    click.echo(f'Serving predictions on http://{server.server_address[0]}:{server.server_address[1]}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.kernel_approximation import Nystroem
+from sklearn.svm import LinearSVC, SVC
+
+from src.utils import SVM_ENGINES
+
+class NystroemSVC(ClassifierMixin, BaseEstimator):
+    """
+    Approximate RBF-kernel SVM: a Nyström feature map followed by a linear SVM.
+
+    The RBF kernel is approximated from `n_components` training rows, and a linear SVM is
+    trained on the resulting features, so fitting grows about linearly with the number of rows
+    instead of the quadratic-to-cubic cost of the exact `SVC`. It takes the same `C` and `gamma`
+    parameters as `SVC(kernel="rbf")`, so it can replace it in a pipeline or a search.
+
+    Parameters:
+    ----------
+    C : float
+        Regularization parameter of the linear SVM. Default is 1.0.
+    gamma : float or "scale"
+        RBF kernel coefficient. "scale" (default) uses 1 / (n_features * X.var()), as `SVC` does.
+    n_components : int
+        Number of training rows used to build the feature map. Default is 300.
+    random_state : int, optional
+        Seed for sampling the feature map rows. Default is None.
+
+    Attributes:
+    ----------
+    feature_map_ : sklearn.kernel_approximation.Nystroem
+        The fitted feature map.
+    linear_ : sklearn.svm.LinearSVC
+        The linear SVM fitted on the mapped features.
+    classes_ : numpy.ndarray
+        The class labels.
+
+    Examples:
+    --------
+    >>> pipe = make_pipeline(preprocess, NystroemSVC(C=10.0, random_state=522))
+    >>> pipe.fit(X_train, y_train).predict(X_test)
+    """
+    def __init__(self, C=1.0, gamma="scale", n_components=300, random_state=None):
+        self.C = C
+        self.gamma = gamma
+        self.n_components = n_components
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        gamma = 1.0 / (X.shape[1] * X.var()) if self.gamma == "scale" else self.gamma
+        self.feature_map_ = Nystroem(kernel="rbf", gamma=gamma,
+                                     n_components=min(self.n_components, X.shape[0]),
+                                     random_state=self.random_state).set_output(transform="default")
+        features = self.feature_map_.fit_transform(X)
+        # liblinear's dual coordinate descent converges faster than the primal solver on these dense features
+        self.linear_ = LinearSVC(C=self.C, dual=True).fit(features, y)
+        self.classes_ = self.linear_.classes_
+        self.n_features_in_ = X.shape[1]
+        return self
+
+    def decision_function(self, X):
+        return self.linear_.decision_function(self.feature_map_.transform(np.asarray(X, dtype=np.float64)))
+
+    def predict(self, X):
+        return self.linear_.predict(self.feature_map_.transform(np.asarray(X, dtype=np.float64)))
+
+def make_rbf_svm(engine="exact", random_state=None):
+    """
+    Build the RBF SVM candidate for the given engine.
+
+    Parameters:
+    ----------
+    engine : str
+        "exact" (default) for `SVC`, or "approx" for `NystroemSVC`, whose training time grows
+        about linearly with the number of rows.
+    random_state : int, optional
+        Seed passed to the estimator. Default is None.
+
+    Returns:
+    -------
+    SVC or NystroemSVC
+        The unfitted estimator.
+
+    Examples:
+    --------
+    >>> models = {"RBF SVM": make_rbf_svm("approx", random_state=522)}
+    """
+    if engine == "exact":
+        return SVC(random_state=random_state)
+    if engine == "approx":
+        return NystroemSVC(random_state=random_state)
+    raise ValueError(f"engine must be one of {SVM_ENGINES}, got {engine!r}")
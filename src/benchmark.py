@@ -0,0 +1,400 @@
+import glob
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from src.utils import CYCLICAL_PERIODS, cross_val_model, encode, make_svc_search
+
+# pandas, sklearn and the API client are imported by the functions using them, so that the
+# command line of scripts/benchmark.py starts without them
+
+BENCHMARK_SIZES = [10_000, 100_000, 1_000_000]
+BENCHMARK_START_DATE = "1990-01-01"
+# Synthetic frames stack stations of this many days each, since 1M consecutive days do not fit in datetime64
+DAYS_PER_LOCATION = 10_000
+# Rows the model is trained on for the prediction benchmark, whatever the number of rows predicted
+PREDICT_TRAIN_ROWS = 10_000
+
+# Features left by drop_split_preprocess.py (without lag or hourly features), and its target
+MODEL_FEATURES = ["temperature_2m_mean", "wind_speed_10m_max", "wind_direction_10m_dominant",
+                  "shortwave_radiation_sum", "et0_fao_evapotranspiration", "month", "day_of_year"]
+TARGET = "is_precipitation"
+
+_URL = "https://archive-api.open-meteo.com/v1/archive"
+
+@dataclass
+class Benchmark:
+    """
+    One timed operation of the pipeline.
+
+    Attributes:
+    ----------
+    name : str
+        Name of the benchmark (e.g. "encode").
+    setup : callable
+        Called as `setup(n_rows, tmp_dir)` before timing; returns the state passed to `run`.
+        Its time is not measured.
+    run : callable
+        Called as `run(state)`; this is what is timed.
+    max_rows : int, optional
+        Largest size the benchmark runs at; larger sizes are skipped (e.g. exact SVM fits, whose
+        time grows quadratically). Default is None, i.e. every size.
+    """
+    name: str
+    setup: callable
+    run: callable
+    max_rows: int = None
+
+def synthetic_responses(n_rows, start_date = BENCHMARK_START_DATE):
+    """
+    Builds decoded-ready Open-Meteo responses with `n_rows` daily rows in total, from the offline mock.
+
+    The rows are spread over as many stations as needed, each with at most `DAYS_PER_LOCATION`
+    consecutive days from `start_date`. The values are those of `src.mock_openmeteo.synthetic_response`,
+    so the same size always gives the same data.
+
+    Parameters:
+    ----------
+    n_rows : int
+        Total number of daily rows.
+    start_date : str
+        First day of every station. Default is "1990-01-01".
+
+    Returns:
+    -------
+    list of openmeteo_sdk.WeatherApiResponse.WeatherApiResponse
+        One response per station, not yet decoded.
+
+    Examples:
+    --------
+    >>> responses = synthetic_responses(100_000)
+    >>> len(responses)
+    10
+    """
+    import openmeteo_requests
+
+    from src.get_api import RETRIEVE_COLS
+    from src.mock_openmeteo import MockOpenMeteo
+
+    client = openmeteo_requests.Client(session = MockOpenMeteo().session())
+    responses = []
+    first = date.fromisoformat(start_date)
+    for station, offset in enumerate(range(0, n_rows, DAYS_PER_LOCATION)):
+        days = min(DAYS_PER_LOCATION, n_rows - offset)
+        params = {"latitude": 49.0 + 0.01 * station, "longitude": -123.0 - 0.01 * station,
+                  "start_date": start_date, "end_date": (first + timedelta(days = days - 1)).isoformat(),
+                  "daily": RETRIEVE_COLS}
+        responses.extend(client.weather_api(_URL, params = params))
+    return responses
+
+def synthetic_weather(n_rows, start_date = BENCHMARK_START_DATE):
+    """
+    Creates a synthetic raw weather frame of `n_rows` days, shaped like the CSV written by
+    `download_data.py`: a 'date' column and the 18 daily variables in the compact schema dtypes.
+
+    Parameters:
+    ----------
+    n_rows : int
+        Number of rows.
+    start_date : str
+        First day of every station, see `synthetic_responses`. Default is "1990-01-01".
+
+    Returns:
+    -------
+    pandas.DataFrame
+        The observations, with a RangeIndex.
+
+    Examples:
+    --------
+    >>> precipit_df = synthetic_weather(10_000)
+    """
+    import pandas as pd
+
+    from src.get_api import _decode_daily
+
+    return pd.concat([_decode_daily(response) for response in synthetic_responses(n_rows, start_date)]).reset_index()
+
+def model_frame(weather):
+    """
+    Derives the model inputs `MODEL_FEATURES` and the target from a raw weather frame, as
+    drop_split_preprocess.py does.
+
+    Returns:
+    -------
+    tuple of (pandas.DataFrame, pandas.Series)
+        The features X and the target y.
+    """
+    data = weather.assign(month = weather['date'].dt.month, day_of_year = weather['date'].dt.dayofyear)
+    return data[MODEL_FEATURES], (weather['precipitation_sum'] > 0.01).rename(TARGET)
+
+def make_preprocessor():
+    """
+    The unfitted preprocessor built by drop_split_preprocess.py.
+    """
+    from sklearn.compose import make_column_selector, make_column_transformer
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    from src.cyclical import CyclicalEncoder
+
+    return make_pipeline(CyclicalEncoder(CYCLICAL_PERIODS),
+                         make_column_transformer((StandardScaler(), make_column_selector(dtype_include = 'number')),
+                                                 remainder = 'passthrough', verbose_feature_names_out = False))
+
+def run_benchmarks(benchmarks = None, sizes = BENCHMARK_SIZES, repeat = 3, names = None, log = print):
+    """
+    Times every benchmark at every size and collects the results with the environment they ran in.
+
+    Each benchmark is set up once per size on fresh synthetic data, then run `repeat` times;
+    the minimum and median of the wall times are reported.
+
+    Parameters:
+    ----------
+    benchmarks : list of Benchmark, optional
+        The benchmarks to run. Default is `BENCHMARKS`.
+    sizes : list of int
+        Numbers of rows. Default is `BENCHMARK_SIZES`, i.e. 10k, 100k and 1M.
+    repeat : int
+        Number of timed runs per benchmark and size. Default is 3.
+    names : list of str, optional
+        Only run the benchmarks with these names. Default is None, i.e. all of them.
+    log : callable or None
+        Called with a progress line after every measurement. Default is `print`.
+
+    Returns:
+    -------
+    dict
+        The environment ("commit", "python_version", library versions, "machine", "created") and
+        "results": one record per benchmark and size with "name", "rows", "times", "min" and
+        "median" in seconds. Skipped sizes are left out.
+
+    Examples:
+    --------
+    >>> results = run_benchmarks(sizes=[10_000], names=["encode", "decode_daily"])
+    >>> write_results(results, "results/benchmarks")
+    """
+    import pandas as pd
+    import sklearn
+    from sklearn import config_context
+
+    benchmarks = BENCHMARKS if benchmarks is None else benchmarks
+    if names:
+        unknown = set(names) - {benchmark.name for benchmark in benchmarks}
+        if unknown:
+            raise ValueError(f"Unknown benchmarks: {sorted(unknown)}")
+        benchmarks = [benchmark for benchmark in benchmarks if benchmark.name in names]
+
+    records = []
+    tmp_dir = tempfile.mkdtemp(prefix = "raincouver-bench-")
+    try:
+        # The preprocessor selects its scaled columns by dtype, so it needs pandas output, as in classification.py
+        with config_context(transform_output = "pandas"):
+            _run_all(benchmarks, sizes, repeat, tmp_dir, records, log)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors = True)
+
+    return {"commit": _git_commit(),
+            "created": datetime.now().isoformat(timespec = "seconds"),
+            "python_version": platform.python_version(),
+            "numpy_version": np.__version__,
+            "pandas_version": pd.__version__,
+            "sklearn_version": sklearn.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+            "results": records}
+
+def write_results(results, directory):
+    """
+    Writes benchmark results to `<directory>/<commit>.json`, so every commit keeps its own file.
+
+    Returns:
+    -------
+    str
+        The path of the written file.
+    """
+    os.makedirs(directory, exist_ok = True)
+    path = os.path.join(directory, f"{results['commit'] or 'unversioned'}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent = 2)
+    return path
+
+def compare_results(baseline, current, threshold = 0.2):
+    """
+    Compares the median times of two benchmark runs.
+
+    Parameters:
+    ----------
+    baseline, current : dict
+        Results of `run_benchmarks`, or the contents of files written by `write_results`.
+    threshold : float
+        Relative slowdown above which a benchmark counts as a regression. Default is 0.2, i.e. 20%.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        One row per benchmark and size measured in both runs, with the "baseline" and "current"
+        medians, their "ratio" and a "regression" flag.
+
+    Examples:
+    --------
+    >>> with open("results/benchmarks/3f1c2ab4d5e6.json") as f:
+    ...     baseline = json.load(f)
+    >>> compare_results(baseline, run_benchmarks(sizes=[10_000])).query("regression")
+    """
+    import pandas as pd
+
+    def medians(results):
+        return {(record["name"], record["rows"]): record["median"] for record in results["results"]}
+
+    before, after = medians(baseline), medians(current)
+    rows = [{"name": name, "rows": n_rows, "baseline": before[name, n_rows], "current": after[name, n_rows]}
+            for name, n_rows in after if (name, n_rows) in before]
+    comparison = pd.DataFrame(rows, columns = ["name", "rows", "baseline", "current"])
+    comparison["ratio"] = comparison["current"] / comparison["baseline"]
+    comparison["regression"] = comparison["ratio"] > 1 + threshold
+    return comparison
+
+def _run_all(benchmarks, sizes, repeat, tmp_dir, records, log):
+    for benchmark in benchmarks:
+        for n_rows in sizes:
+            if benchmark.max_rows is not None and n_rows > benchmark.max_rows:
+                continue
+            state = benchmark.setup(n_rows, tmp_dir)
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                benchmark.run(state)
+                times.append(time.perf_counter() - start)
+            records.append({"name": benchmark.name, "rows": n_rows, "times": times,
+                            "min": min(times), "median": statistics.median(times)})
+            if log is not None:
+                log(f"{benchmark.name:<28} {n_rows:>9} rows  min {min(times):9.4f} s  "
+                    f"median {statistics.median(times):9.4f} s")
+            del state
+
+def _git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short=12", "HEAD"], capture_output = True,
+                                text = True, check = True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output = True,
+                               text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + "-dirty" if dirty else commit
+
+def _load_script(name):
+    """
+    Imports one of the click scripts in scripts/ as a module.
+    """
+    path = os.path.join(os.path.dirname(__file__), "..", "scripts", name + ".py")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _setup_decode(n_rows, tmp_dir):
+    return synthetic_responses(n_rows)
+
+def _run_decode(responses):
+    import pandas as pd
+
+    from src.get_api import _decode_daily
+
+    pd.concat([_decode_daily(response) for response in responses])
+
+def _setup_encode(n_rows, tmp_dir):
+    return model_frame(synthetic_weather(n_rows))[0].copy()
+
+def _run_encode(data):
+    for col, period in CYCLICAL_PERIODS.items():
+        encode(data, col, period)
+
+def _setup_drop_split(n_rows, tmp_dir):
+    data_file = os.path.join(tmp_dir, f"weather_{n_rows}.csv")
+    synthetic_weather(n_rows).to_csv(data_file, index = False)
+    out_dir = os.path.join(tmp_dir, f"processed_{n_rows}")
+    args = [f"--data-file={data_file}", f"--data-to={out_dir}", f"--preprocessor-to={out_dir}",
+            "--data-format=parquet", "--seed=522"]
+    return _load_script("drop_split_preprocess").main, args
+
+def _run_drop_split(state):
+    command, args = state
+    command.main(args, standalone_mode = False)
+
+def _setup_preprocess(n_rows, tmp_dir):
+    return model_frame(synthetic_weather(n_rows))[0]
+
+def _run_preprocess(X):
+    make_preprocessor().fit_transform(X)
+
+def _setup_cross_val(n_rows, tmp_dir):
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.svm import SVC
+    from sklearn.tree import DecisionTreeClassifier
+
+    X, y = model_frame(synthetic_weather(n_rows))
+    # The candidates compared by classification.py
+    models = {"Decision Tree": DecisionTreeClassifier(random_state = 522),
+              "KNN": KNeighborsClassifier(),
+              "RBF SVM": SVC(random_state = 522),
+              "Logistic Regression": LogisticRegression(max_iter = 2000, random_state = 522)}
+    return models, X, y
+
+def _run_cross_val(state):
+    models, X, y = state
+    cross_val_model(make_preprocessor(), models, X, y, ["accuracy", "precision", "recall", "f1"])
+
+def _setup_grid_search(n_rows, tmp_dir):
+    return model_frame(synthetic_weather(n_rows))
+
+def _run_grid_search(state):
+    from sklearn.pipeline import make_pipeline
+    from sklearn.svm import SVC
+
+    X, y = state
+    make_svc_search(make_pipeline(make_preprocessor(), SVC(random_state = 522)), search = "grid").fit(X, y)
+
+def _setup_predict(n_rows, tmp_dir):
+    from sklearn.pipeline import make_pipeline
+    from sklearn.svm import SVC
+
+    pipe = make_pipeline(make_preprocessor(), SVC(random_state = 522))
+    pipe.fit(*model_frame(synthetic_weather(PREDICT_TRAIN_ROWS)))
+    # Predict on other days than the model was trained on
+    X, _ = model_frame(synthetic_weather(n_rows, start_date = "1960-01-01"))
+    return pipe, X
+
+def _run_predict(state):
+    pipe, X = state
+    pipe.predict(X)
+
+def _setup_script_help(n_rows, tmp_dir):
+    return sorted(glob.glob(os.path.join(os.path.dirname(__file__), "..", "scripts", "*.py")))
+
+def _run_script_help(scripts):
+    # Interpreter start included, as a user typing `python scripts/<script>.py --help` waits for it
+    for script in scripts:
+        subprocess.run([sys.executable, script, "--help"], capture_output = True, check = True)
+
+BENCHMARKS = [Benchmark("decode_daily", _setup_decode, _run_decode),
+              Benchmark("encode", _setup_encode, _run_encode),
+              Benchmark("drop_split_preprocess", _setup_drop_split, _run_drop_split),
+              Benchmark("preprocessor_fit_transform", _setup_preprocess, _run_preprocess),
+              Benchmark("cross_val_model", _setup_cross_val, _run_cross_val, max_rows = 10_000),
+              Benchmark("svm_grid_search", _setup_grid_search, _run_grid_search, max_rows = 10_000),
+              Benchmark("pipeline_predict", _setup_predict, _run_predict, max_rows = 100_000),
+              # Start-up time does not depend on the number of rows, so it is only measured once
+              Benchmark("script_help", _setup_script_help, _run_script_help, max_rows = BENCHMARK_SIZES[0])]
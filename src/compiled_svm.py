@@ -0,0 +1,234 @@
+import numpy as np
+
+class CompiledSVM:
+    """
+    Dependency-light predictor for an exported RBF SVM pipeline.
+
+    Prediction is the standard scaling followed by an RBF kernel expansion,
+    decision(x) = sum_i weights_i * exp(-gamma * ||z - centers_i||^2) + intercept, with
+    z = (x - mean) / scale, computed with a handful of vectorized NumPy operations. For an `SVC`
+    the centers are the support vectors and the weights the dual coefficients; for a
+    `NystroemSVC` they are the Nyström components and the linear weights projected back onto them.
+    Only NumPy is needed, so loading and scoring skip the sklearn import and pipeline overhead.
+    Cyclical columns encoded by a `CyclicalEncoder` in the pipeline are encoded the same way here.
+
+    Parameters:
+    ----------
+    feature_names : numpy.ndarray of str
+        The features after cyclical encoding, in the order the arrays below use.
+    mean, scale : numpy.ndarray of shape (n_features,)
+        Scaler parameters per feature (0 and 1 for features passed through unscaled).
+    centers : numpy.ndarray of shape (n_centers, n_features)
+        Points the kernel is evaluated against, in scaled space.
+    weights : numpy.ndarray of shape (n_centers,)
+        Weight of each center in the decision function.
+    intercept : float
+        Constant term of the decision function.
+    gamma : float
+        RBF kernel coefficient.
+    classes : numpy.ndarray of shape (2,)
+        Class labels; the second is predicted when the decision function is positive.
+    cyclical_columns : numpy.ndarray of str, optional
+        Input columns replaced by their sine and cosine, named "{column}_sin" and "{column}_cos"
+        in `feature_names`. Default is none.
+    cyclical_periods : numpy.ndarray of float, optional
+        Period of each cyclical column.
+
+    Examples:
+    --------
+    >>> model = load_compiled_svm("results/models/optimum_cls_svm_compiled.npz")
+    >>> model.predict({"temperature_2m_mean": 9.1, ...})
+    array([ True])
+    """
+    def __init__(self, feature_names, mean, scale, centers, weights, intercept, gamma, classes,
+                 cyclical_columns = (), cyclical_periods = ()):
+        self.feature_names = np.asarray(feature_names)
+        self.mean = np.asarray(mean, dtype = np.float64)
+        self.scale = np.asarray(scale, dtype = np.float64)
+        self.centers = np.ascontiguousarray(centers, dtype = np.float64)
+        self.weights = np.asarray(weights, dtype = np.float64)
+        self.intercept = float(intercept)
+        self.gamma = float(gamma)
+        self.classes = np.asarray(classes)
+        self.cyclical_columns = np.asarray(cyclical_columns, dtype = str)
+        self.cyclical_periods = np.asarray(cyclical_periods, dtype = np.float64)
+        self._centers_sq = np.einsum("ij,ij->i", self.centers, self.centers)
+        self._encoded = {}
+        for column, period in zip(self.cyclical_columns, self.cyclical_periods):
+            self._encoded[f"{column}_sin"] = (column, period, np.sin)
+            self._encoded[f"{column}_cos"] = (column, period, np.cos)
+
+    def decision_function(self, X):
+        """
+        Computes the decision function for a record (dict) or a DataFrame of raw input columns,
+        or a 2-D array whose columns follow `feature_names` (i.e. already cyclically encoded).
+        Returns an array of shape (n_rows,).
+        """
+        Z = (self._as_array(X) - self.mean) / self.scale
+        # ||z - c||^2 = ||z||^2 - 2 z.c + ||c||^2, so the kernel is a single matrix product
+        sq_dist = Z @ self.centers.T
+        sq_dist *= -2.0
+        sq_dist += np.einsum("ij,ij->i", Z, Z)[:, None]
+        sq_dist += self._centers_sq
+        np.maximum(sq_dist, 0.0, out = sq_dist)
+        sq_dist *= -self.gamma
+        np.exp(sq_dist, out = sq_dist)
+        return sq_dist @ self.weights + self.intercept
+
+    def predict(self, X):
+        """
+        Predicts the class of each row, see `decision_function` for the accepted inputs.
+        """
+        return self.classes[(self.decision_function(X) > 0).astype(int)]
+
+    def _as_array(self, X):
+        if isinstance(X, dict) or hasattr(X, "columns"):
+            X = np.column_stack([self._column(X, name) for name in self.feature_names])
+        X = np.asarray(X, dtype = np.float64)
+        return X.reshape(1, -1) if X.ndim == 1 else X
+
+    def _column(self, X, name):
+        if name not in self._encoded:
+            return np.atleast_1d(np.asarray(X[name], dtype = np.float64))
+        column, period, func = self._encoded[name]
+        return func(2 * np.pi / period * np.atleast_1d(np.asarray(X[column], dtype = np.float64)))
+
+def export_svm(pipe, path):
+    """
+    Exports a fitted RBF SVM pipeline to a compact NumPy artifact for `CompiledSVM`.
+
+    Supported pipelines are an optional `CyclicalEncoder`, then a `StandardScaler` or a
+    `ColumnTransformer` of standard scalers and passthrough columns (as built by
+    `drop_split_preprocess.py`), followed by a binary `SVC(kernel="rbf")` or `NystroemSVC`.
+    Nested pipelines are flattened.
+
+    Parameters:
+    ----------
+    pipe : sklearn.pipeline.Pipeline
+        The fitted pipeline, e.g. the loaded `optimum_cls_svm_pipeline.model`.
+    path : str
+        Path of the ".npz" file to write.
+
+    Returns:
+    -------
+    CompiledSVM
+        The exported predictor, equal to `load_compiled_svm(path)`.
+
+    Examples:
+    --------
+    >>> export_svm(opt_pipe, "results/models/optimum_cls_svm_compiled.npz")
+    """
+    steps = _flatten_steps(pipe)
+    cyclical_columns, cyclical_periods = [], []
+    if steps and type(steps[0]).__name__ == "CyclicalEncoder":
+        encoder = steps.pop(0)
+        cyclical_columns, cyclical_periods = encoder.columns_, encoder.periods_
+    if len(steps) != 2:
+        raise ValueError(f"Expected a preprocessor followed by an SVM, got {len(steps)} steps")
+    feature_names, mean, scale = _scaler_arrays(steps[0])
+    centers, weights, intercept, gamma, classes = _kernel_arrays(steps[1])
+
+    model = CompiledSVM(feature_names, mean, scale, centers, weights, intercept, gamma, classes,
+                        cyclical_columns, cyclical_periods)
+    np.savez(path,
+             feature_names = model.feature_names.astype(str),
+             mean = model.mean,
+             scale = model.scale,
+             centers = model.centers,
+             weights = model.weights,
+             intercept = model.intercept,
+             gamma = model.gamma,
+             classes = model.classes,
+             cyclical_columns = model.cyclical_columns,
+             cyclical_periods = model.cyclical_periods)
+    return model
+
+def load_compiled_svm(path):
+    """
+    Loads a predictor written by `export_svm`.
+
+    Parameters:
+    ----------
+    path : str
+        Path to the ".npz" artifact.
+
+    Returns:
+    -------
+    CompiledSVM
+        The predictor.
+
+    Examples:
+    --------
+    >>> model = load_compiled_svm("results/models/optimum_cls_svm_compiled.npz")
+    """
+    with np.load(path, allow_pickle = False) as arrays:
+        return CompiledSVM(**{name: arrays[name] for name in arrays.files})
+
+def _flatten_steps(pipe):
+    """
+    Returns the estimators of a pipeline in order, with nested pipelines expanded.
+    """
+    steps = []
+    for _, step in pipe.steps:
+        if hasattr(step, "steps"):
+            steps.extend(_flatten_steps(step))
+        elif step != "passthrough" and step is not None:
+            steps.append(step)
+    return steps
+
+def _scaler_arrays(preprocessor):
+    """
+    Returns the feature names, means and scales of the preprocessor, in its output column order.
+    """
+    if hasattr(preprocessor, "transformers_"):
+        names, means, scales = [], [], []
+        for _, transformer, columns in preprocessor.transformers_:
+            if transformer == "drop":
+                continue
+            columns = _column_names(columns, preprocessor.feature_names_in_)
+            if transformer == "passthrough":
+                mean, scale = np.zeros(len(columns)), np.ones(len(columns))
+            else:
+                _, mean, scale = _scaler_arrays(transformer)
+            names.extend(columns)
+            means.append(mean)
+            scales.append(scale)
+        return np.array(names), np.concatenate(means), np.concatenate(scales)
+
+    if type(preprocessor).__name__ != "StandardScaler":
+        raise ValueError(f"Cannot export preprocessing step {type(preprocessor).__name__}")
+    n_features = preprocessor.n_features_in_
+    names = getattr(preprocessor, "feature_names_in_", np.array([f"x{i}" for i in range(n_features)]))
+    # With with_mean=False the scaler still records mean_ (for with_std) but does not subtract it
+    mean = preprocessor.mean_ if preprocessor.with_mean and preprocessor.mean_ is not None else np.zeros(n_features)
+    scale = preprocessor.scale_ if preprocessor.with_std and preprocessor.scale_ is not None else np.ones(n_features)
+    return np.asarray(names), mean, scale
+
+def _column_names(columns, feature_names_in):
+    """
+    Resolves a ColumnTransformer column selection (names, indices or a boolean mask) to names.
+    """
+    if isinstance(columns, slice):
+        return list(feature_names_in[columns])
+    columns = np.asarray(columns)
+    if columns.dtype == bool or np.issubdtype(columns.dtype, np.integer):
+        return list(feature_names_in[columns])
+    return list(columns)
+
+def _kernel_arrays(model):
+    """
+    Returns the centers, weights, intercept, gamma and classes of a binary RBF SVM.
+    """
+    if len(model.classes_) != 2:
+        raise ValueError("Only binary classifiers can be exported")
+
+    if type(model).__name__ == "NystroemSVC":
+        feature_map = model.feature_map_
+        # The linear SVM acts on K(x, components) @ normalization.T, so project its weights back
+        weights = feature_map.normalization_.T @ model.linear_.coef_.ravel()
+        return feature_map.components_, weights, model.linear_.intercept_[0], feature_map.gamma, model.classes_
+
+    if getattr(model, "kernel", None) != "rbf":
+        raise ValueError(f"Cannot export {type(model).__name__}; expected an RBF SVC or NystroemSVC")
+    # sklearn already flips the signs of the binary dual coefficients to match decision_function
+    return model.support_vectors_, model.dual_coef_.ravel(), model.intercept_[0], model._gamma, model.classes_
@@ -0,0 +1,105 @@
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
+
+from src.utils import CYCLICAL_PERIODS
+
+class CyclicalEncoder(TransformerMixin, BaseEstimator):
+    """
+    Replaces cyclical columns by their sine and cosine, as `encode` does, for many columns at once.
+
+    Being a transformer, it is part of the preprocessor and so is fitted with it and applied to
+    new data at inference time. Each call computes the angles of all cyclical columns in one
+    array operation and writes their sines and cosines straight into a preallocated output.
+    Only the cyclical columns are converted to float64; the other columns are passed through in
+    front of them. A DataFrame gives a DataFrame whose other columns keep their own dtypes, an
+    array gives an array of their common dtype; `set_output` then names the columns as usual.
+    Cyclical columns missing at fit time (e.g. dropped with `--columns-to-drop`) are skipped.
+
+    Parameters:
+    ----------
+    periods : dict, optional
+        Period of each cyclical column, e.g. {"month": 12}. Default is `CYCLICAL_PERIODS`.
+
+    Attributes:
+    ----------
+    n_features_in_ : int
+        Number of columns seen at fit time.
+    feature_names_in_ : numpy.ndarray of str
+        Their names, if they were given as a DataFrame with string column names.
+    columns_ : numpy.ndarray of str
+        The cyclical columns found at fit time, in input order.
+    periods_ : numpy.ndarray of float
+        Their periods.
+    cyclical_idx_ : numpy.ndarray of int
+        Positions of the cyclical columns in the input.
+    other_idx_ : numpy.ndarray of int
+        Positions of the other columns, which are passed through.
+    feature_names_out_ : numpy.ndarray of str
+        The output columns: the other columns, then the sine and cosine of each cyclical column.
+
+    Examples:
+    --------
+    >>> encoder = CyclicalEncoder({"month": 12, "wind_direction_10m_dominant": 360})
+    >>> encoder.fit_transform(X_train).columns.tolist()
+    ['temperature_2m_mean', ..., 'month_sin', 'month_cos', 'wind_direction_10m_dominant_sin', ...]
+    """
+    def __init__(self, periods=None):
+        self.periods = periods
+
+    def fit(self, X, y=None):
+        periods = CYCLICAL_PERIODS if self.periods is None else self.periods
+        if any(period <= 0 for period in periods.values()):
+            raise ValueError("Cyclical periods must be positive")
+        self.n_features_in_ = X.shape[1]
+        if hasattr(X, "columns") and all(isinstance(name, str) for name in X.columns):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+            names = self.feature_names_in_
+        else:
+            if hasattr(self, "feature_names_in_"):
+                del self.feature_names_in_
+            names = np.array([f"x{i}" for i in range(self.n_features_in_)], dtype=object)
+
+        is_cyclical = np.array([name in periods for name in names], dtype=bool)
+        self.columns_ = names[is_cyclical]
+        self.periods_ = np.array([periods[name] for name in self.columns_], dtype=np.float64)
+        self.cyclical_idx_ = np.flatnonzero(is_cyclical)
+        self.other_idx_ = np.flatnonzero(~is_cyclical)
+        self.feature_names_out_ = np.concatenate([names[self.other_idx_],
+                                                  [f"{name}_{func}" for name in self.columns_ for func in ("sin", "cos")]]).astype(object)
+        return self
+
+    def transform(self, X):
+        check_is_fitted(self)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but CyclicalEncoder was fitted with {self.n_features_in_}")
+        if hasattr(X, "columns"):
+            if hasattr(self, "feature_names_in_") and not np.array_equal(np.asarray(X.columns, dtype=object),
+                                                                          self.feature_names_in_):
+                raise ValueError("The feature names should match those that were passed during fit")
+            import pandas as pd
+
+            angles = X.iloc[:, self.cyclical_idx_].to_numpy(dtype=np.float64)
+            # The passed-through columns keep their dtypes next to the float64 sines and cosines
+            trig = pd.DataFrame(self._sin_cos(angles, np.empty((len(X), 2 * len(self.columns_)))),
+                                index=X.index, columns=self.feature_names_out_[len(self.other_idx_):])
+            return pd.concat([X.iloc[:, self.other_idx_], trig], axis=1)
+
+        X = np.asarray(X)
+        angles = X[:, self.cyclical_idx_].astype(np.float64)
+        others = X[:, self.other_idx_]
+        n_other = len(self.other_idx_)
+        out = np.empty((len(X), n_other + 2 * len(self.columns_)), dtype=np.result_type(others.dtype, np.float64))
+        out[:, :n_other] = others
+        self._sin_cos(angles, out[:, n_other:])
+        return out
+
+    def _sin_cos(self, angles, out):
+        # One angle per cyclical value, then sin and cos written in place into interleaved columns
+        angles *= 2 * np.pi / self.periods_
+        np.sin(angles, out=out[:, ::2])
+        np.cos(angles, out=out[:, 1::2])
+        return out
+
+    def get_feature_names_out(self, input_features=None):
+        return self.feature_names_out_.copy()
\ No newline at end of file
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import span, traced
+
+HISTOGRAM_BINS = 40
+
+# Written next to the figures; maps every figure file to the hash of the inputs it was rendered from
+FIGURE_MANIFEST = ".figures.json"
+
+@dataclass
+class Figure:
+    """
+    One figure of the EDA stage, with the aggregated data it is drawn from.
+
+    Attributes:
+    ----------
+    name : str
+        File name of the figure (e.g. "correlation_heatmap.png").
+    render : callable
+        Called as `render(data, path)` to draw and save the figure. It must be a module-level
+        function, since figures are rendered in worker processes.
+    data : pandas.DataFrame
+        The aggregated input of `render` (bin counts, a correlation matrix, ...), small whatever
+        the number of rows of the dataset.
+    """
+    name: str
+    render: callable
+    data: pd.DataFrame
+
+@traced()
+def histogram_counts(data, columns = None, max_bins = HISTOGRAM_BINS):
+    """
+    Bins the values of numeric columns in NumPy, so that only the bin counts need to be plotted.
+
+    Every column gets its own bins of a "nice" width (1, 2 or 5 times a power of ten), about
+    `max_bins` of them spanning its range, as Altair's `bin=alt.Bin(maxbins=...)` would choose.
+    Missing values are left out. The columns are binned one at a time, so the extra memory is that
+    of a single column.
+
+    Parameters:
+    ----------
+    data : pandas.DataFrame
+        The observations.
+    columns : list of str, optional
+        The columns to bin. Default is every numeric column.
+    max_bins : int
+        Maximum number of bins per column. Default is 40.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        One row per bin with "feature", "bin_start", "bin_end" and "count", columns in the order given.
+
+    Examples:
+    --------
+    >>> histogram_counts(precipit_df, ["temperature_2m_mean"]).head(2)
+                   feature  bin_start  bin_end  count
+    0  temperature_2m_mean      -15.0    -14.0      3
+    1  temperature_2m_mean      -14.0    -13.0      7
+    """
+    if max_bins < 1:
+        raise ValueError(f"max_bins must be positive, got {max_bins}")
+    columns = data.select_dtypes(include = ['number']).columns.tolist() if columns is None else columns
+
+    frames = []
+    for col in columns:
+        values = data[col].to_numpy(dtype = np.float64, na_value = np.nan)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            continue
+        start, step, n_bins = _nice_bins(values.min(), values.max(), max_bins)
+        # Bins have equal widths, so each value's bin is found arithmetically rather than searched
+        idx = np.minimum(((values - start) / step).astype(np.int64), n_bins - 1)
+        edges = start + step * np.arange(n_bins + 1)
+        frames.append(pd.DataFrame({"feature": col,
+                                    "bin_start": edges[:-1],
+                                    "bin_end": edges[1:],
+                                    "count": np.bincount(idx, minlength = n_bins)}))
+    if not frames:
+        return pd.DataFrame({"feature": [], "bin_start": [], "bin_end": [], "count": []})
+    return pd.concat(frames, ignore_index = True)
+
+def render_histograms(counts, path):
+    """
+    Draws one bar chart per feature from `histogram_counts` output with Altair and saves it as PNG.
+    """
+    import altair as alt
+
+    features = list(dict.fromkeys(counts["feature"]))
+    chart = alt.Chart(counts).mark_bar().encode(
+        alt.X("bin_start:Q", bin = "binned", title = None),
+        alt.X2("bin_end:Q"),
+        alt.Y("count:Q", title = "Count of Records"),
+    ).properties(
+        height = 100,
+        width = 200
+    ).facet(
+        alt.Facet("feature:N", sort = features, title = None),
+        columns = 3
+    ).resolve_scale(x = "independent", y = "independent")
+    chart.save(path, scale_factor = 2.0)
+
+def render_correlation_heatmap(correlation, path):
+    """
+    Draws a correlation matrix as an annotated seaborn heatmap and saves it.
+
+    The figure is created without pyplot, so nothing depends on a display or on pyplot's global state.
+    """
+    import seaborn as sns
+    from matplotlib.figure import Figure as MplFigure
+
+    fig = MplFigure(figsize = (12, 10))
+    ax = fig.subplots()
+    sns.heatmap(correlation, annot = True, cmap = "coolwarm", fmt = ".2f", vmin = -1, vmax = 1, ax = ax)
+    ax.tick_params(axis = "x", labelrotation = 45, labelsize = 10)
+    ax.tick_params(axis = "y", labelsize = 10)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
+    ax.set_title("Correlation between features", fontsize = 16)
+    fig.tight_layout()
+    fig.savefig(path, bbox_inches = 'tight', dpi = 300)
+
+def figure_hash(figure):
+    """
+    Hashes what a figure looks like: its name, its data and the code drawing it.
+
+    Returns:
+    -------
+    str
+        The hexadecimal SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    digest.update(figure.name.encode())
+    digest.update(f"{figure.render.__module__}.{figure.render.__qualname__}".encode())
+    digest.update(_source_hash(figure.render).encode())
+    digest.update(figure.data.to_csv().encode())
+    return digest.hexdigest()
+
+def render_figures(figures, plot_to, n_jobs = None, force = False):
+    """
+    Renders figures in parallel worker processes, skipping those whose inputs have not changed.
+
+    A figure is skipped when its file exists and `figure_hash` matches the hash recorded in
+    `FIGURE_MANIFEST` when it was last rendered. The others are rendered independently, one per
+    worker, each worker importing only the plotting library it needs.
+
+    Parameters:
+    ----------
+    figures : list of Figure
+        The figures to render.
+    plot_to : str
+        Directory the figures are written to. It is created if needed.
+    n_jobs : int, optional
+        The number of worker processes. None means 1, -1 means one per processor, capped at the
+        number of figures to render. Default is None.
+    force : bool
+        If True, every figure is rendered again. False by default.
+
+    Returns:
+    -------
+    dict
+        "cached" or "rendered" for every figure name.
+
+    Examples:
+    --------
+    >>> render_figures([Figure("correlation_heatmap.png", render_correlation_heatmap, correlation)],
+    ...                "results/figures", n_jobs=-1)
+    {'correlation_heatmap.png': 'rendered'}
+    """
+    from joblib import Parallel, delayed, effective_n_jobs
+
+    os.makedirs(plot_to, exist_ok = True)
+    manifest_path = os.path.join(plot_to, FIGURE_MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    hashes = {figure.name: figure_hash(figure) for figure in figures}
+    status = {}
+    pending = []
+    for figure in figures:
+        path = os.path.join(plot_to, figure.name)
+        if not force and os.path.exists(path) and manifest.get(figure.name) == hashes[figure.name]:
+            status[figure.name] = "cached"
+        else:
+            pending.append(figure)
+            status[figure.name] = "rendered"
+
+    if pending:
+        n_workers = min(effective_n_jobs(n_jobs), len(pending))
+        Parallel(n_jobs = n_workers)(delayed(_render)(figure, os.path.join(plot_to, figure.name))
+                                     for figure in pending)
+        manifest.update({figure.name: hashes[figure.name] for figure in pending})
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent = 2, sort_keys = True)
+    return status
+
+def _render(figure, path):
+    with span(f"render_{os.path.splitext(figure.name)[0]}", rows = len(figure.data)):
+        figure.render(figure.data, path)
+
+def _nice_bins(low, high, max_bins):
+    """
+    Returns the start, width and number of the bins covering [low, high].
+    """
+    if high <= low:
+        return low - 0.5, 1.0, 1
+    raw_step = (high - low) / max_bins
+    magnitude = 10.0 ** np.floor(np.log10(raw_step))
+    step = next(m * magnitude for m in (1, 2, 5, 10) if m * magnitude >= raw_step)
+    start = np.floor(low / step) * step
+    n_bins = max(int(np.ceil((high - start) / step - 1e-9)), 1)
+    return float(start), float(step), n_bins
+
+def _source_hash(func):
+    with open(sys.modules[func.__module__].__file__, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
@@ -0,0 +1,230 @@
+import numpy as np
+import pandas as pd
+from collections import deque
+from dataclasses import dataclass
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.instrumentation import traced
+
+FEATURE_OPS = ["lag", "sum", "mean", "min", "max", "diff", "dry_streak"]
+DRY_DAY_THRESHOLD = 0.01 # mm of precipitation at or below which a day counts as dry, as for is_precipitation
+
+@dataclass
+class FeatureSpec:
+    """
+    Declarative description of one lag or rolling-window feature.
+
+    The feature for day t is computed from the values of `column` up to day t - `lag`, so with
+    `lag` >= 1 it never uses the day being predicted.
+
+    Attributes:
+    ----------
+    name : str
+        Name of the output column (e.g. "precipitation_sum_7d").
+    column : str
+        Input column the feature is computed from (e.g. "precipitation_sum").
+    op : str
+        One of "lag" (the value itself), "sum", "mean", "min", "max" (over the last `window` days),
+        "diff" (change over `window` days) or "dry_streak" (number of consecutive dry days, with
+        dry meaning at most `threshold`).
+    window : int
+        Number of days aggregated by the rolling ops, or spanned by "diff". Default is 1.
+    lag : int
+        Number of days between the last day used and the day the feature belongs to. Default is 1.
+    threshold : float
+        Only for "dry_streak": largest value of a dry day. Default is `DRY_DAY_THRESHOLD`.
+    """
+    name: str
+    column: str
+    op: str
+    window: int = 1
+    lag: int = 1
+    threshold: float = DRY_DAY_THRESHOLD
+
+    def __post_init__(self):
+        if self.op not in FEATURE_OPS:
+            raise ValueError(f"op must be one of {FEATURE_OPS}, got {self.op!r}")
+        if self.window < 1 or self.lag < 0:
+            raise ValueError(f"Feature {self.name!r} needs window >= 1 and lag >= 0")
+
+    @property
+    def history(self):
+        """Number of most recent days, including the current one, the feature depends on."""
+        span = self.window + 1 if self.op == "diff" else self.window
+        return span + self.lag
+
+def read_feature_spec(path):
+    """
+    Reads a feature spec from a CSV file with columns name, column, op, window and lag
+    (and optionally threshold), one feature per row.
+
+    Parameters:
+    ----------
+    path : str
+        Path to the CSV file, e.g. "parameter/lag_features.csv".
+
+    Returns:
+    -------
+    list of FeatureSpec
+        The spec, in file order.
+
+    Examples:
+    --------
+    >>> spec = read_feature_spec("parameter/lag_features.csv")
+    """
+    rows = pd.read_csv(path).to_dict(orient = "records")
+    return [FeatureSpec(**{key: value for key, value in row.items() if not pd.isna(value)}) for row in rows]
+
+class FeatureEngine:
+    """
+    Computes lag and rolling-window features from a daily frame, in bulk or one day at a time.
+
+    `transform` computes every feature over a whole history with vectorized kernels (cumulative
+    sums for sums and means, strided windows for minima and maxima). `fit_transform` does the same
+    and keeps the last few days as state, after which `update` appends new days and computes their
+    features from that short tail only, i.e. in O(window) work per day instead of recomputing the
+    whole history.
+
+    Parameters:
+    ----------
+    spec : list of FeatureSpec
+        The features to compute, see `read_feature_spec`.
+
+    Examples:
+    --------
+    >>> engine = FeatureEngine(read_feature_spec("parameter/lag_features.csv"))
+    >>> features = engine.fit_transform(history)     # history sorted by date
+    >>> tomorrow = engine.update(new_day)            # one-row frame with the same columns
+    """
+    def __init__(self, spec):
+        self.spec = list(spec)
+        self.columns = sorted({feature.column for feature in self.spec})
+        self.history_length = max((feature.history for feature in self.spec), default = 1)
+        self._tail = None
+        self._streaks = {}
+
+    @traced("feature_engine_transform")
+    def transform(self, data):
+        """
+        Computes the features of every row of a frame sorted by date.
+
+        Returns a frame with one column per feature and the index of `data`. Rows without enough
+        history for a feature hold NaN.
+        """
+        values = {column: data[column].to_numpy(dtype = np.float64) for column in self.columns}
+        return pd.DataFrame({feature.name: _compute(values[feature.column], feature) for feature in self.spec},
+                            index = data.index)
+
+    def fit_transform(self, data):
+        """
+        Computes the features of every row, like `transform`, and keeps the state `update` needs.
+        """
+        features = self.transform(data)
+        self._tail = {column: deque(data[column].to_numpy(dtype = np.float64)[-self.history_length:],
+                                    maxlen = self.history_length)
+                      for column in self.columns}
+        # Dry streaks can be longer than any window, so their running value is kept for the last `lag` days
+        self._streaks = {}
+        for feature in self.spec:
+            if feature.op == "dry_streak":
+                streaks = _dry_streak(data[feature.column].to_numpy(dtype = np.float64), feature.threshold)
+                self._streaks[feature.name] = deque(streaks[-(feature.lag + 1):], maxlen = feature.lag + 1)
+        return features
+
+    def update(self, data):
+        """
+        Appends one or more days to the state and returns their features.
+
+        Parameters:
+        ----------
+        data : pandas.DataFrame
+            The new days, in date order, directly following the days seen so far.
+
+        Returns:
+        -------
+        pandas.DataFrame
+            The features of the new days, equal (up to rounding) to what `transform` gives for them
+            on the whole history.
+        """
+        if self._tail is None:
+            raise RuntimeError("Call fit_transform on the history before update")
+        new_values = data[self.columns].to_numpy(dtype = np.float64)
+        rows = np.empty((len(data), len(self.spec)))
+        for i, day in enumerate(new_values):
+            for column, value in zip(self.columns, day):
+                self._tail[column].append(value)
+            for j, feature in enumerate(self.spec):
+                tail = self._tail[feature.column]
+                if feature.op == "dry_streak":
+                    streaks = self._streaks[feature.name]
+                    last = streaks[-1] if streaks else 0.0
+                    streaks.append(last + 1 if tail[-1] <= feature.threshold else 0.0)
+                    rows[i, j] = streaks[0] if len(streaks) > feature.lag else np.nan
+                else:
+                    rows[i, j] = _latest(tail, feature)
+        return pd.DataFrame(rows, index = data.index, columns = [feature.name for feature in self.spec])
+
+def _compute(values, feature):
+    """
+    Computes one feature for every position of a 1-D array with vectorized kernels.
+    """
+    n = len(values)
+    if feature.op == "lag":
+        result = values
+    elif feature.op == "diff":
+        result = np.full(n, np.nan)
+        result[feature.window:] = values[feature.window:] - values[:-feature.window]
+    elif feature.op in ("sum", "mean"):
+        result = np.full(n, np.nan)
+        if n >= feature.window:
+            # Windows are differences of cumulative sums; missing days are counted separately so
+            # that they only blank the windows containing them
+            cumsum = np.concatenate(([0.0], np.cumsum(np.nan_to_num(values))))
+            missing = np.concatenate(([0], np.cumsum(np.isnan(values))))
+            sums = cumsum[feature.window:] - cumsum[:-feature.window]
+            sums[(missing[feature.window:] - missing[:-feature.window]) > 0] = np.nan
+            result[feature.window - 1:] = sums / feature.window if feature.op == "mean" else sums
+    elif feature.op in ("min", "max"):
+        result = np.full(n, np.nan)
+        if n >= feature.window:
+            windows = sliding_window_view(values, feature.window)
+            result[feature.window - 1:] = windows.min(axis = 1) if feature.op == "min" else windows.max(axis = 1)
+    else:
+        result = _dry_streak(values, feature.threshold)
+    return _shift(result, feature.lag)
+
+def _latest(tail, feature):
+    """
+    Computes one feature for the last day of the tail only, from its last `feature.history` days.
+    """
+    end = len(tail) - feature.lag
+    span = feature.window + 1 if feature.op == "diff" else feature.window
+    if end - span < 0:
+        return np.nan
+    if feature.op == "lag":
+        return tail[end - 1]
+    if feature.op == "diff":
+        return tail[end - 1] - tail[end - 1 - feature.window]
+    window = np.fromiter((tail[k] for k in range(end - feature.window, end)), dtype = np.float64, count = feature.window)
+    if feature.op == "sum":
+        return window.sum()
+    if feature.op == "mean":
+        return window.mean()
+    return window.min() if feature.op == "min" else window.max()
+
+def _dry_streak(values, threshold):
+    """
+    Number of consecutive dry days ending at each position (0 on wet days).
+    """
+    dry = values <= threshold
+    count = np.cumsum(dry)
+    # Subtract the count at the most recent wet day, so the streak restarts after every wet day
+    last_wet = np.maximum.accumulate(np.where(~dry, count, 0))
+    return (count - last_wet).astype(np.float64)
+
+def _shift(values, lag):
+    if lag == 0:
+        return np.array(values, dtype = np.float64)
+    result = np.full(len(values), np.nan)
+    result[lag:] = values[:-lag]
+    return result
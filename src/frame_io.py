@@ -0,0 +1,187 @@
+import os
+import sys
+
+from src.instrumentation import traced
+
+FRAME_FORMATS = {"parquet": ".parquet", "feather": ".feather", "csv": ".csv"}
+
+@traced(rows_arg = "data")
+def write_frame(data, directory, name, fmt = "parquet"):
+    """
+    Writes a DataFrame or Series to a directory in the chosen artifact format.
+
+    Parquet and Feather keep the column dtypes (e.g. booleans stay booleans) and are read back
+    memory-mapped; CSV is kept for artifacts meant to be opened by people.
+
+    Parameters:
+    ----------
+    data : pandas.DataFrame or pandas.Series
+        The data to write. A Series is written as a single-column frame.
+    directory : str
+        Path to the directory the file is written to.
+    name : str
+        File name without extension (e.g. "X_train").
+    fmt : str
+        One of "parquet" (default), "feather" or "csv".
+
+    Returns:
+    -------
+    str
+        The path of the written file, with the extension matching `fmt`.
+
+    Examples:
+    --------
+    >>> write_frame(X_train, "data/processed", "X_train", fmt="parquet")
+    'data/processed/X_train.parquet'
+    """
+    if fmt not in FRAME_FORMATS:
+        raise ValueError(f"fmt must be one of {list(FRAME_FORMATS)}, got {fmt!r}")
+
+    import pandas as pd
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+
+    path = os.path.join(directory, name + FRAME_FORMATS[fmt])
+    if fmt == "parquet":
+        data.to_parquet(path, index = False)
+    elif fmt == "feather":
+        data.reset_index(drop = True).to_feather(path)
+    else:
+        data.to_csv(path, index = False)
+    return path
+
+@traced()
+def read_frame(path):
+    """
+    Reads a DataFrame written by `write_frame`, choosing the reader from the file extension.
+
+    Parameters:
+    ----------
+    path : str
+        Path to a ".parquet", ".feather" or ".csv" file.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        The stored frame. Parquet and Feather files are memory-mapped rather than read into a
+        separate buffer first, and come back with their original dtypes.
+
+    Examples:
+    --------
+    >>> X_train = read_frame("data/processed/X_train.parquet")
+    """
+    extension = os.path.splitext(path)[1]
+    if extension == FRAME_FORMATS["parquet"]:
+        import pandas as pd
+        return pd.read_parquet(path, memory_map = True)
+    if extension == FRAME_FORMATS["feather"]:
+        from pyarrow import feather
+        return feather.read_table(path, memory_map = True).to_pandas()
+    if extension == FRAME_FORMATS["csv"]:
+        import pandas as pd
+        return pd.read_csv(path)
+    raise ValueError(f"Unsupported file extension {extension!r}, expected one of {list(FRAME_FORMATS.values())}")
+
+def iter_frame_chunks(path, chunksize = 50_000):
+    """
+    Reads a CSV, Parquet or Feather file, or NDJSON from standard input, in fixed-size chunks.
+
+    Only one chunk is held in memory at a time (Parquet and Feather files are memory-mapped), so
+    inputs far larger than RAM can be streamed through a model.
+
+    Parameters:
+    ----------
+    path : str
+        Path to a ".parquet", ".feather" or ".csv" file, or "-" to read newline-delimited JSON
+        records from standard input.
+    chunksize : int
+        Maximum number of rows per chunk. Default is 50000.
+
+    Yields:
+    ------
+    pandas.DataFrame
+        Consecutive chunks of at most `chunksize` rows.
+
+    Examples:
+    --------
+    >>> for chunk in iter_frame_chunks("data/processed/X_test.parquet", chunksize=10_000):
+    ...     print(len(chunk))
+    """
+    if chunksize < 1:
+        raise ValueError(f"chunksize must be positive, got {chunksize}")
+
+    if path == "-":
+        import pandas as pd
+        with pd.read_json(sys.stdin, lines = True, chunksize = chunksize) as reader:
+            yield from reader
+        return
+
+    extension = os.path.splitext(path)[1]
+    if extension == FRAME_FORMATS["parquet"]:
+        from pyarrow import parquet
+        for batch in parquet.ParquetFile(path, memory_map = True).iter_batches(batch_size = chunksize):
+            yield batch.to_pandas()
+    elif extension == FRAME_FORMATS["feather"]:
+        from pyarrow import feather
+        for batch in feather.read_table(path, memory_map = True).to_batches(max_chunksize = chunksize):
+            yield batch.to_pandas()
+    elif extension == FRAME_FORMATS["csv"]:
+        import pandas as pd
+        with pd.read_csv(path, chunksize = chunksize) as reader:
+            yield from reader
+    else:
+        raise ValueError(f"Unsupported file extension {extension!r}, expected one of {list(FRAME_FORMATS.values())}")
+
+def write_frame_chunks(chunks, path):
+    """
+    Writes a stream of DataFrame chunks to one CSV, Parquet or Feather file, or to standard output.
+
+    Each chunk is written as soon as it arrives, so the whole result is never held in memory.
+    All chunks must have the same columns and dtypes.
+
+    Parameters:
+    ----------
+    chunks : iterable of pandas.DataFrame
+        The chunks to write, in order.
+    path : str
+        Path to a ".parquet", ".feather" or ".csv" file, or "-" to write newline-delimited JSON
+        records to standard output.
+
+    Returns:
+    -------
+    int
+        The number of rows written.
+
+    Examples:
+    --------
+    >>> write_frame_chunks(iter_frame_chunks("big.csv"), "big.parquet")
+    1000000
+    """
+    extension = None if path == "-" else os.path.splitext(path)[1]
+    if extension not in (None, *FRAME_FORMATS.values()):
+        raise ValueError(f"Unsupported file extension {extension!r}, expected one of {list(FRAME_FORMATS.values())}")
+
+    n_rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            if path == "-":
+                sys.stdout.write(chunk.to_json(orient = "records", lines = True, date_format = "iso").rstrip("\n") + "\n")
+                sys.stdout.flush()
+            elif extension == FRAME_FORMATS["csv"]:
+                chunk.to_csv(path, mode = "w" if n_rows == 0 else "a", header = n_rows == 0, index = False)
+            else:
+                import pyarrow as pa
+                table = pa.Table.from_pandas(chunk, preserve_index = False)
+                if writer is None:
+                    if extension == FRAME_FORMATS["parquet"]:
+                        from pyarrow import parquet
+                        writer = parquet.ParquetWriter(path, table.schema)
+                    else:
+                        writer = pa.ipc.new_file(path, table.schema)
+                writer.write_table(table)
+            n_rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n_rows
@@ -1,16 +1,35 @@
 import openmeteo_requests
-import requests_cache
+import numpy as np
 import pandas as pd
 import os
+import time
 
-from retry_requests import retry
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
-def get_vancouver_data(url, start_date, end_date, write_to = "", create_csv = False):
+from src.weather_store import append_to_store, missing_dates, read_store
+from src.weather_schema import apply_weather_schema
+from src.http_cache import get_session
+from src.instrumentation import span, traced
+
+VAN_LAT = 49.2497
+VAN_LONG = -123.1193
+RETRIEVE_COLS = ["weather_code", "temperature_2m_max", "temperature_2m_min", "temperature_2m_mean",
+                 "apparent_temperature_max", "apparent_temperature_min", "apparent_temperature_mean",
+                 "sunrise", "sunset", "precipitation_sum", "rain_sum", "snowfall_sum", "precipitation_hours",
+                 "wind_speed_10m_max", "wind_gusts_10m_max", "wind_direction_10m_dominant", "shortwave_radiation_sum",
+                 "et0_fao_evapotranspiration"]
+HOURLY_COLS = ["precipitation", "pressure_msl", "relative_humidity_2m", "cloud_cover"]
+DRY_HOUR_THRESHOLD = 0.1 # mm of precipitation in an hour below which the hour counts as dry
+HOURLY_PRECIPITATION_FEATURES = ["precipitation_max_hourly", "wet_hours", "dry_hours_max_streak"]
+
+@traced()
+def get_vancouver_data(url, start_date, end_date, write_to = "", create_csv = False,
+                       chunk_freq = None, max_workers = 4, retries = 3, store = None):
     """
-    Creates a new DataFrame with 18 columns, containing weather observations for each date between 
-    the start and end dates in Vancouver. Data is extracted via API from  Open-Meteo’s Historical Weather 
-    API. Each row in the dataset includes weather measurement statistics in a day. 
+    Creates a new DataFrame with 18 columns, containing weather observations for each date between
+    the start and end dates in Vancouver. Data is extracted via API from  Open-Meteo’s Historical Weather
+    API. Each row in the dataset includes weather measurement statistics in a day.
 
     Parameters:
     ----------
@@ -23,118 +42,452 @@ def get_vancouver_data(url, start_date, end_date, write_to = "", create_csv = Fa
     write_to : str
         A string path for the csv file to be stored.
     create_csv: bool
-        A boolean. If true, a csv file will be created in data folder, populated with weather data. False by default. 
+        A boolean. If true, a csv file will be created in data folder, populated with weather data. False by default.
+    chunk_freq : str, optional
+        A pandas offset alias (e.g. "YS" for one window per calendar year) used to split the date range
+        into windows that are fetched concurrently. None (default) sends a single request for the whole range.
+    max_workers : int
+        The maximum number of windows fetched at the same time when `chunk_freq` is set. 4 by default.
+    retries : int
+        The number of attempts made for each window before giving up. 3 by default.
+    store : str, optional
+        A path to a local SQLite weather store. When given, only the dates the store does not hold yet
+        are requested from the API and appended to it, and the returned frame is read back from the store.
 
     Returns:
     -------
     pandas.DataFrame
-        A DatetimeIndex DataFrame with 18 columns, containing weather observations for each date 
-        between the start and end dates. 
-        
+        A DatetimeIndex DataFrame with 18 columns, containing weather observations for each date
+        between the start and end dates, in the compact dtypes of `src.weather_schema.WEATHER_SCHEMA`
+        (float32 measurements, categorical `weather_code`, datetime64 `sunrise`/`sunset`).
+
     Examples:
     --------
-    >>> precipit_df = get_vancouver_data(start_date, end_date, create_csv=True)
+    >>> precipit_df = get_vancouver_data(url, start_date, end_date, create_csv=True)
+    >>> precipit_df = get_vancouver_data(url, "1990-01-01", "2023-11-06", chunk_freq="YS", max_workers=8)
+    >>> precipit_df = get_vancouver_data(url, "1990-01-01", "2023-11-06", store="data/van_weather.sqlite")
 
     """
 
-    # Setup the Open-Meteo API client with cache and retry on error
-    cache_session = requests_cache.CachedSession('.cache', expire_after = 3600)
-    retry_session = retry(cache_session, retries = 5, backoff_factor = 0.2)
-    openmeteo = openmeteo_requests.Client(session = retry_session)
-
-    VAN_LAT = 49.2497
-    VAN_LONG = -123.1193
     START_DATE = start_date # default to "1990-01-01"
     END_DATE = end_date # default to (datetime.now() - timedelta(days = 7)).strftime('%Y-%m-%d')
-    RETRIEVE_COLS = ["weather_code", "temperature_2m_max", "temperature_2m_min", "temperature_2m_mean", 
-                     "apparent_temperature_max", "apparent_temperature_min", "apparent_temperature_mean", 
-                     "sunrise", "sunset", "precipitation_sum", "rain_sum", "snowfall_sum", "precipitation_hours", 
-                     "wind_speed_10m_max", "wind_gusts_10m_max", "wind_direction_10m_dominant", "shortwave_radiation_sum",
-                     "et0_fao_evapotranspiration"]
-    
-    
-    # Make sure all required weather variables are listed here
-    # The order of variables in hourly or daily is important to assign them correctly below
-    #url = "https://archive-api.open-meteo.com/v1/archive"
-    params = {
-    	"latitude": VAN_LAT,
-    	"longitude": VAN_LONG,
-    	"start_date": START_DATE,
-    	"end_date": END_DATE,
-    	"daily": RETRIEVE_COLS,
-        "timezone": "auto"
-    }
-    responses = openmeteo.weather_api(url, params=params)
-    
-    # Process first location. Add a for-loop for multiple locations or weather models
-    response = responses[0]
-    print(f"Coordinates {response.Latitude()}°E {response.Longitude()}°N")
-    print(f"Elevation {response.Elevation()} m asl")
-    print(f"Timezone {response.Timezone()} {response.TimezoneAbbreviation()}")
-    print(f"Timezone difference to GMT+0 {response.UtcOffsetSeconds()} s")
-    
-    # Process daily data. The order of variables needs to be the same as requested.
-    daily = response.Daily()
-    daily_weather_code = daily.Variables(0).ValuesAsNumpy()
-    daily_temperature_2m_max = daily.Variables(1).ValuesAsNumpy()
-    daily_temperature_2m_min = daily.Variables(2).ValuesAsNumpy()
-    daily_temperature_2m_mean = daily.Variables(3).ValuesAsNumpy()
-    daily_apparent_temperature_max = daily.Variables(4).ValuesAsNumpy()
-    daily_apparent_temperature_min = daily.Variables(5).ValuesAsNumpy()
-    daily_apparent_temperature_mean = daily.Variables(6).ValuesAsNumpy()
-    daily_sunrise = daily.Variables(7).ValuesAsNumpy()
-    daily_sunset = daily.Variables(8).ValuesAsNumpy()
-    daily_precipitation_sum = daily.Variables(9).ValuesAsNumpy()
-    daily_rain_sum = daily.Variables(10).ValuesAsNumpy()
-    daily_snowfall_sum = daily.Variables(11).ValuesAsNumpy()
-    daily_precipitation_hours = daily.Variables(12).ValuesAsNumpy()
-    daily_wind_speed_10m_max = daily.Variables(13).ValuesAsNumpy()
-    daily_wind_gusts_10m_max = daily.Variables(14).ValuesAsNumpy()
-    daily_wind_direction_10m_dominant = daily.Variables(15).ValuesAsNumpy()
-    daily_shortwave_radiation_sum = daily.Variables(16).ValuesAsNumpy()
-    daily_et0_fao_evapotranspiration = daily.Variables(17).ValuesAsNumpy()
-    
-    daily_data = {"date": pd.date_range(
-    	start = pd.to_datetime(daily.Time(), unit = "s").strftime('%Y-%m-%d'),
-    	end = pd.to_datetime(daily.TimeEnd(), unit = "s").strftime('%Y-%m-%d'),
-    	freq = pd.Timedelta(days = 1),
-    	inclusive = "left"
-    )}
-    daily_data["weather_code"] = daily_weather_code
-    daily_data["temperature_2m_max"] = daily_temperature_2m_max
-    daily_data["temperature_2m_min"] = daily_temperature_2m_min
-    daily_data["temperature_2m_mean"] = daily_temperature_2m_mean
-    daily_data["apparent_temperature_max"] = daily_apparent_temperature_max
-    daily_data["apparent_temperature_min"] = daily_apparent_temperature_min
-    daily_data["apparent_temperature_mean"] = daily_apparent_temperature_mean
-    daily_data["sunrise"] = daily_sunrise
-    daily_data["sunset"] = daily_sunset
-    daily_data["precipitation_sum"] = daily_precipitation_sum
-    daily_data["rain_sum"] = daily_rain_sum
-    daily_data["snowfall_sum"] = daily_snowfall_sum
-    daily_data["precipitation_hours"] = daily_precipitation_hours
-    daily_data["wind_speed_10m_max"] = daily_wind_speed_10m_max
-    daily_data["wind_gusts_10m_max"] = daily_wind_gusts_10m_max
-    daily_data["wind_direction_10m_dominant"] = daily_wind_direction_10m_dominant
-    daily_data["shortwave_radiation_sum"] = daily_shortwave_radiation_sum
-    daily_data["et0_fao_evapotranspiration"] = daily_et0_fao_evapotranspiration
-    
-    df_van_weather = pd.DataFrame(data = daily_data)
-    df_van_weather = df_van_weather.set_index('date')
+
+    if store is None:
+        df_van_weather = _fetch_daily_frame(url, START_DATE, END_DATE, chunk_freq, max_workers, retries)
+    else:
+        # Only request the dates the store does not hold yet, then serve the full range from the store
+        for missing_start, missing_end in _missing_ranges(store, START_DATE, END_DATE):
+            append_to_store(_fetch_daily_frame(url, missing_start, missing_end, chunk_freq, max_workers, retries),
+                            store)
+        df_van_weather = read_store(store, START_DATE, END_DATE)
 
     if create_csv == True:  # Publish to CSV file if create_csv parameter is True
 
         # write_to path transforming
         if write_to != '':
             write_to = write_to if write_to[-1] == '/' else write_to + '/'
-        
+
         # Check write_to path existence
         if not os.path.exists(write_to):
             os.mkdir(write_to)
 
         full_path = os.path.join(write_to, f'van_weather_{start_date}_{end_date}.csv')
 
-        df_van_weather.to_csv(full_path)
+        with span("write_csv", rows = len(df_van_weather), path = full_path):
+            df_van_weather.to_csv(full_path)
         print(f'published to {full_path}')
-        
-    return df_van_weather
\ No newline at end of file
+
+    return df_van_weather
+
+@traced()
+def get_multi_location_data(url, locations, start_date, end_date, batch_size = 50, max_workers = 4, retries = 3):
+    """
+    Creates a long-format DataFrame with the 18 daily weather columns for several locations.
+
+    Locations are sent to Open-Meteo's Historical Weather API in batches, each batch as a single request
+    listing all of its coordinates; the API answers with one response per location, in request order.
+    Batches are fetched concurrently and decoded into one frame with a `location` column.
+
+    Parameters:
+    ----------
+    url : str
+        A string url that serves as the API endpoint to get the data from
+    locations : dict or list
+        Either a dict mapping a location name to a (latitude, longitude) pair, or a list of
+        (latitude, longitude) pairs, in which case the location is named "latitude,longitude".
+    start_date : str
+        A string in YYYY-MM-DD format (e.g. "1990-01-01") that the weather API will start extracting from.
+    end_date : str
+        A string in YYYY-MM-DD format (e.g. "2000-01-01") that the weather API will conclude the query.
+    batch_size : int
+        The maximum number of locations sent in one request. 50 by default.
+    max_workers : int
+        The maximum number of batches fetched at the same time. 4 by default.
+    retries : int
+        The number of attempts made for each batch before giving up. 3 by default.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        A DatetimeIndex DataFrame with a `location` column followed by the 18 weather columns,
+        one row per location and date, grouped by location in the order given.
+
+    Examples:
+    --------
+    >>> stations = {"Vancouver": (49.2497, -123.1193), "Burnaby": (49.2488, -122.9805)}
+    >>> stations_df = get_multi_location_data(url, stations, "2010-01-01", "2010-12-31")
+    """
+    if isinstance(locations, dict):
+        names = list(locations)
+        coords = list(locations.values())
+    else:
+        coords = list(locations)
+        names = [f"{lat},{lon}" for lat, lon in coords]
+
+    if len(coords) == 0:
+        raise ValueError("locations must contain at least one (latitude, longitude) pair")
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive")
+
+    batches = [range(i, min(i + batch_size, len(coords))) for i in range(0, len(coords), batch_size)]
+
+    # Setup the Open-Meteo API client with cache and retry on error
+    openmeteo = _get_client()
+
+    def fetch_batch(batch):
+        responses = _fetch_range(openmeteo, url, start_date, end_date, retries,
+                                 latitude = [coords[i][0] for i in batch],
+                                 longitude = [coords[i][1] for i in batch])
+        if len(responses) != len(batch):
+            raise ValueError(f"Expected {len(batch)} responses from the API, got {len(responses)}")
+        frames = []
+        for i, response in zip(batch, responses):
+            frame = _decode_daily(response)
+            frame.insert(0, 'location', names[i])
+            frames.append(frame)
+        return frames
+
+    with ThreadPoolExecutor(max_workers = max(1, min(max_workers, len(batches)))) as executor:
+        results = list(executor.map(fetch_batch, batches))
+
+    return pd.concat([frame for frames in results for frame in frames])
+
+@traced()
+def get_vancouver_hourly_features(url, start_date, end_date, write_to = "", create_csv = False,
+                                  chunk_freq = "YS", retries = 3):
+    """
+    Creates a DataFrame of daily features aggregated from hourly weather observations in Vancouver.
+
+    The hourly history is streamed from Open-Meteo's Historical Weather API one window (a year by
+    default, ~8,760 rows) at a time; each window is reduced to daily features as soon as it arrives
+    and then discarded, while the next window is already being downloaded. At most two hourly
+    windows are ever held in memory, however long the date range is.
+
+    Parameters:
+    ----------
+    url : str
+        A string url that serves as the API endpoint to get the data from
+    start_date : str
+        A string in YYYY-MM-DD format (e.g. "1990-01-01") that the weather API will start extracting from.
+    end_date : str
+        A string in YYYY-MM-DD format (e.g. "2000-01-01") that the weather API will conclude the query.
+    write_to : str
+        A string path for the csv file to be stored.
+    create_csv: bool
+        A boolean. If true, a csv file will be created in data folder, populated with the features. False by default.
+    chunk_freq : str
+        A pandas offset alias setting the size of the hourly windows. "YS" (one calendar year) by default.
+    retries : int
+        The number of attempts made for each window before giving up. 3 by default.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        A DatetimeIndex DataFrame with one row per date and the columns returned by `aggregate_hourly`.
+
+    Examples:
+    --------
+    >>> hourly_features_df = get_vancouver_hourly_features(url, "1990-01-01", "2023-11-06", create_csv=True)
+    """
+    daily_features = pd.concat([aggregate_hourly(block)
+                                for block in iter_hourly_blocks(url, start_date, end_date, chunk_freq, retries)])
+
+    if create_csv == True:  # Publish to CSV file if create_csv parameter is True
+
+        # write_to path transforming
+        if write_to != '':
+            write_to = write_to if write_to[-1] == '/' else write_to + '/'
+
+        # Check write_to path existence
+        if not os.path.exists(write_to):
+            os.mkdir(write_to)
+
+        full_path = os.path.join(write_to, f'van_weather_hourly_features_{start_date}_{end_date}.csv')
+
+        with span("write_csv", rows = len(daily_features), path = full_path):
+            daily_features.to_csv(full_path)
+        print(f'published to {full_path}')
+
+    return daily_features
+
+def iter_hourly_blocks(url, start_date, end_date, chunk_freq = "YS", retries = 3, columns = HOURLY_COLS):
+    """
+    Yields the hourly observations between two dates as one DataFrame per window, in date order.
+
+    The next window is requested in the background while the caller works on the current one.
+
+    Parameters:
+    ----------
+    url : str
+        A string url that serves as the API endpoint to get the data from
+    start_date : str
+        A string in YYYY-MM-DD format that the weather API will start extracting from.
+    end_date : str
+        A string in YYYY-MM-DD format that the weather API will conclude the query.
+    chunk_freq : str
+        A pandas offset alias setting the size of the windows. "YS" (one calendar year) by default.
+    retries : int
+        The number of attempts made for each window before giving up. 3 by default.
+    columns : list of str
+        The hourly variables to request. HOURLY_COLS by default.
+
+    Yields:
+    ------
+    pandas.DataFrame
+        A DataFrame indexed by local time with one column per hourly variable.
+
+    Examples:
+    --------
+    >>> for block in iter_hourly_blocks(url, "1990-01-01", "2023-11-06"):
+    ...     print(block.shape)
+    """
+    # Setup the Open-Meteo API client with cache and retry on error
+    openmeteo = _get_client()
+
+    def fetch_window(window):
+        response = _fetch_range(openmeteo, url, window[0], window[1], retries,
+                                resolution = "hourly", variables = columns)[0]
+        return decode_variables(response.Hourly(), columns, response.UtcOffsetSeconds())
+
+    windows = _split_date_range(start_date, end_date, chunk_freq)
+    with ThreadPoolExecutor(max_workers = 1) as executor:
+        pending = executor.submit(fetch_window, windows[0])
+        for next_window in windows[1:] + [None]:
+            block = pending.result()
+            if next_window is not None:
+                pending = executor.submit(fetch_window, next_window)
+            yield block
+
+def aggregate_hourly(hourly):
+    """
+    Reduces hourly observations to daily features.
+
+    Parameters:
+    ----------
+    hourly : pandas.DataFrame
+        Hourly observations indexed by local time, with the HOURLY_COLS columns.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        A DataFrame indexed by 'date' with the columns:
+        - 'precipitation_max_hourly': the highest hourly precipitation of the day (mm).
+        - 'wet_hours': the number of hours with at least DRY_HOUR_THRESHOLD mm of precipitation.
+        - 'dry_hours_max_streak': the longest run of consecutive dry hours within the day.
+        - 'pressure_msl_mean': the mean sea-level pressure of the day (hPa).
+        - 'pressure_msl_change': the change in sea-level pressure from the first to the last hour (hPa).
+        - 'relative_humidity_2m_mean': the mean relative humidity of the day (%).
+        - 'cloud_cover_mean': the mean cloud cover of the day (%).
+
+    Examples:
+    --------
+    >>> daily_features = aggregate_hourly(hourly_df)
+    """
+    day = hourly.index.normalize()
+    precipitation = hourly['precipitation'].to_numpy()
+    dry = precipitation < DRY_HOUR_THRESHOLD
+
+    # Every wet hour and every midnight starts a new run; counting dry hours per run gives the streaks
+    new_day = np.ones(len(day), dtype = bool)
+    new_day[1:] = day[1:] != day[:-1]
+    run_id = np.cumsum(~dry | new_day)
+    streak = pd.Series(dry.astype(np.int16)).groupby(run_id).cumsum().to_numpy()
+
+    by_day = hourly.groupby(day)
+    pressure = by_day['pressure_msl']
+    daily = pd.DataFrame({
+        'precipitation_max_hourly': by_day['precipitation'].max(),
+        'wet_hours': pd.Series(~dry & ~np.isnan(precipitation), index = hourly.index).groupby(day).sum(),
+        'dry_hours_max_streak': pd.Series(streak, index = hourly.index).groupby(day).max(),
+        'pressure_msl_mean': pressure.mean(),
+        'pressure_msl_change': pressure.last() - pressure.first(),
+        'relative_humidity_2m_mean': by_day['relative_humidity_2m'].mean(),
+        'cloud_cover_mean': by_day['cloud_cover'].mean(),
+    })
+    daily.index.name = 'date'
+    return daily
+
+def _fetch_daily_frame(url, start_date, end_date, chunk_freq, max_workers, retries):
+    """
+    Fetches the daily variables between two dates, optionally as concurrent windows.
+    """
+    # Setup the Open-Meteo API client with cache and retry on error
+    openmeteo = _get_client()
+
+    if chunk_freq is None:
+        windows = [(start_date, end_date)]
+    else:
+        windows = _split_date_range(start_date, end_date, chunk_freq)
+
+    # Fetch the windows concurrently; map() hands the frames back in window (i.e. date) order
+    def fetch_window(window):
+        response = _fetch_range(openmeteo, url, window[0], window[1], retries)[0]
+        return response, _decode_daily(response)
+
+    with ThreadPoolExecutor(max_workers = max(1, min(max_workers, len(windows)))) as executor:
+        results = list(executor.map(fetch_window, windows))
+
+    _print_response_info(results[0][0])
+
+    return pd.concat([frame for _, frame in results])
+
+def _missing_ranges(store, start_date, end_date):
+    """
+    Lists the (start, end) date ranges between two dates that are not yet held in the store.
+
+    Each run of consecutive `missing_dates` (before, inside or after the stored dates) becomes one
+    range, so the store always stays one contiguous block.
+    """
+    missing = missing_dates(store, start_date, end_date)
+    if len(missing) == 0:
+        return []
+    # A new run starts wherever the next missing day is not the day after the previous one
+    breaks = np.flatnonzero(np.diff(missing.asi8) != pd.Timedelta(days = 1).value) + 1
+    starts = np.concatenate([[0], breaks])
+    ends = np.concatenate([breaks - 1, [len(missing) - 1]])
+    return [(missing[s].strftime('%Y-%m-%d'), missing[e].strftime('%Y-%m-%d')) for s, e in zip(starts, ends)]
+
+def _get_client():
+    """
+    Creates an Open-Meteo API client on the process-wide cached session, which retries on error.
+    """
+    return openmeteo_requests.Client(session = get_session())
+
+def _split_date_range(start_date, end_date, chunk_freq):
+    """
+    Splits the inclusive range between two YYYY-MM-DD dates into consecutive windows.
+
+    Window boundaries fall on the dates generated by `chunk_freq`, so with "YS" every window
+    except possibly the first and last covers exactly one calendar year.
+
+    Returns:
+    -------
+    list of tuple
+        (start, end) pairs of YYYY-MM-DD strings, in date order, covering the whole range.
+    """
+    start = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date)
+    if end < start:
+        raise ValueError("end_date must not be earlier than start_date")
+
+    starts = [start] + [b for b in pd.date_range(start, end, freq = chunk_freq) if b > start]
+    ends = [s - pd.Timedelta(days = 1) for s in starts[1:]] + [end]
+    return [(s.strftime('%Y-%m-%d'), e.strftime('%Y-%m-%d')) for s, e in zip(starts, ends)]
+
+def _fetch_range(openmeteo, url, start_date, end_date, retries = 3, latitude = VAN_LAT, longitude = VAN_LONG,
+                 resolution = "daily", variables = RETRIEVE_COLS):
+    """
+    Requests the daily variables for one date window, retrying the whole window on failure.
+
+    The session already retries individual HTTP errors; this retries anything else that goes wrong
+    with the window (e.g. a truncated response) so one bad window does not restart the full download.
+    `latitude` and `longitude` may be lists, in which case one response per location is returned,
+    in the same order. `resolution` ("daily" or "hourly") selects which block `variables` are requested for.
+    """
+    # Make sure all required weather variables are listed here
+    # The order of variables in hourly or daily is important to assign them correctly below
+    params = {
+    	"latitude": latitude,
+    	"longitude": longitude,
+    	"start_date": start_date,
+    	"end_date": end_date,
+    	resolution: variables,
+        "timezone": "auto"
+    }
+    for attempt in range(retries):
+        try:
+            with span("api_request", start_date = str(start_date), end_date = str(end_date),
+                      resolution = resolution, attempt = attempt):
+                return openmeteo.weather_api(url, params=params)
+        except Exception:
+            if attempt == retries - 1:
+                raise
+            time.sleep(0.2 * 2 ** attempt)
+
+def _print_response_info(response):
+    print(f"Coordinates {response.Latitude()}°E {response.Longitude()}°N")
+    print(f"Elevation {response.Elevation()} m asl")
+    print(f"Timezone {response.Timezone()} {response.TimezoneAbbreviation()}")
+    print(f"Timezone difference to GMT+0 {response.UtcOffsetSeconds()} s")
+
+def decode_variables(block, columns, utc_offset_seconds = 0):
+    """
+    Decodes a block of time series variables from an Open-Meteo response into a DataFrame.
+
+    Works on any `VariablesWithTime` block (`response.Daily()`, `response.Hourly()`, ...). Values are
+    copied once, straight from the response buffer into a preallocated column-major NumPy block that
+    the DataFrame then wraps without further copies, and the index is built directly from the
+    epoch seconds of the block instead of going through date strings.
+
+    Parameters:
+    ----------
+    block : openmeteo_sdk.VariablesWithTime.VariablesWithTime
+        The block of variables to decode, e.g. `response.Daily()`.
+    columns : list of str
+        Names of the variables, in the order they were requested (e.g. RETRIEVE_COLS).
+    utc_offset_seconds : int
+        The offset of the location's timezone, `response.UtcOffsetSeconds()`. The index is shifted
+        by it so that it holds local dates/times. 0 by default.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        A DataFrame indexed by a 'date' DatetimeIndex, with one float32 column per variable.
+        Variables the API sends as 64-bit integers (e.g. sunrise/sunset epoch seconds) keep int64.
+
+    Examples:
+    --------
+    >>> response = openmeteo.weather_api(url, params=params)[0]
+    >>> daily_df = decode_variables(response.Daily(), RETRIEVE_COLS, response.UtcOffsetSeconds())
+    """
+    times = np.arange(block.Time(), block.TimeEnd(), block.Interval(), dtype = np.int64)
+
+    # Column-major, so that every variable is written into one contiguous stretch of memory
+    values = np.empty((len(times), len(columns)), dtype = np.float32, order = 'F')
+    int64_values = {}
+    for i, col in enumerate(columns):
+        variable = block.Variables(i)
+        if variable.ValuesLength() == 0 and _has_int64_values(variable):
+            int64_values[col] = variable.ValuesInt64AsNumpy()
+        else:
+            values[:, i] = variable.ValuesAsNumpy()
+
+    index = pd.to_datetime(times + utc_offset_seconds, unit = "s")
+    index.name = 'date'
+    df = pd.DataFrame(values, index = index, columns = columns, copy = False)
+    for col, col_values in int64_values.items():
+        df[col] = col_values
+    return df
+
+def _has_int64_values(variable):
+    # Older openmeteo_sdk releases do not know about int64 values at all
+    return hasattr(variable, 'ValuesInt64Length') and variable.ValuesInt64Length() > 0
+
+@traced("decode_daily")
+def _decode_daily(response):
+    """
+    Decodes the daily block of one Open-Meteo response into a DatetimeIndex DataFrame in the
+    compact dtypes of `WEATHER_SCHEMA`.
+    """
+    # The order of variables needs to be the same as requested.
+    return apply_weather_schema(decode_variables(response.Daily(), RETRIEVE_COLS, response.UtcOffsetSeconds()))
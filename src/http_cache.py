@@ -0,0 +1,184 @@
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+import requests_cache
+from retry_requests import retry
+
+# The archive API publishes a day about five days late and may still revise it shortly after;
+# ranges ending this many days ago or earlier are treated as final
+ARCHIVE_SETTLED_DAYS = 7
+
+DEFAULT_CACHE_PATH = os.environ.get("RAINCOUVER_HTTP_CACHE",
+                                    os.path.join(os.path.expanduser("~"), ".cache", "raincouver", "http_cache.sqlite"))
+DEFAULT_ARCHIVE_TTL = requests_cache.NEVER_EXPIRE
+DEFAULT_RECENT_TTL = 3600
+DEFAULT_MAX_BYTES = 512 * 1024**2
+
+_LRU_TABLE = "lru_access"
+
+_lock = threading.Lock()
+_config = {"path": DEFAULT_CACHE_PATH,
+           "archive_ttl": DEFAULT_ARCHIVE_TTL,
+           "recent_ttl": DEFAULT_RECENT_TTL,
+           "max_bytes": DEFAULT_MAX_BYTES}
+_session = None
+_session_pid = None
+
+def configure_http_cache(path = None, archive_ttl = DEFAULT_ARCHIVE_TTL, recent_ttl = DEFAULT_RECENT_TTL,
+                         max_bytes = DEFAULT_MAX_BYTES):
+    """
+    Sets where and how API responses are cached for the rest of the process.
+
+    The shared session is closed and recreated with the new settings on the next `get_session`.
+
+    Parameters:
+    ----------
+    path : str, optional
+        Path of the SQLite cache file. Defaults to $RAINCOUVER_HTTP_CACHE, or
+        ~/.cache/raincouver/http_cache.sqlite, so every working directory shares one cache.
+    archive_ttl : int
+        Seconds a response is kept when its whole date range is at least `ARCHIVE_SETTLED_DAYS`
+        old and so will not change any more. Default is -1 (never expires).
+    recent_ttl : int
+        Seconds a response covering recent days (or no dates at all) is kept. Default is 3600.
+    max_bytes : int
+        Size above which the least recently used responses are evicted. Default is 512 MiB.
+
+    Returns:
+    -------
+    None
+
+    Examples:
+    --------
+    >>> configure_http_cache("data/http_cache.sqlite", max_bytes=64 * 1024**2)
+    """
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+        _config.update(path = path or DEFAULT_CACHE_PATH, archive_ttl = archive_ttl,
+                       recent_ttl = recent_ttl, max_bytes = max_bytes)
+
+def get_session():
+    """
+    Returns the process-wide cached session used for every Open-Meteo request.
+
+    The session is created on first use and then shared by all callers and threads, so repeated
+    downloads in one process (or in later runs, through the SQLite file) are served from the
+    cache. It also retries failed requests. A forked child process gets its own session.
+
+    Returns:
+    -------
+    requests_cache.CachedSession
+        The shared session, see `configure_http_cache` for its settings.
+
+    Examples:
+    --------
+    >>> openmeteo = openmeteo_requests.Client(session=get_session())
+    """
+    global _session, _session_pid
+    with _lock:
+        if _session is None or _session_pid != os.getpid():
+            cache_dir = os.path.dirname(_config["path"])
+            if cache_dir != '' and not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            _session = LRUCachedSession(**_config)
+            _session_pid = os.getpid()
+            retry(_session, retries = 5, backoff_factor = 0.2)
+        return _session
+
+def response_ttl(params, archive_ttl = DEFAULT_ARCHIVE_TTL, recent_ttl = DEFAULT_RECENT_TTL, today = None):
+    """
+    Chooses how long the response to an Open-Meteo request is cached, from its "end_date".
+
+    Parameters:
+    ----------
+    params : dict or None
+        Query parameters of the request.
+    archive_ttl, recent_ttl : int
+        See `configure_http_cache`.
+    today : datetime.date, optional
+        Reference date. Default is the current date.
+
+    Returns:
+    -------
+    int
+        `archive_ttl` if the request ends at least `ARCHIVE_SETTLED_DAYS` before `today`, else `recent_ttl`.
+
+    Examples:
+    --------
+    >>> response_ttl({"start_date": "1990-01-01", "end_date": "1990-12-31"})
+    -1
+    """
+    end_date = (params or {}).get("end_date")
+    if end_date is None:
+        return recent_ttl
+    today = today or date.today()
+    if date.fromisoformat(str(end_date)) <= today - timedelta(days = ARCHIVE_SETTLED_DAYS):
+        return archive_ttl
+    return recent_ttl
+
+class LRUCachedSession(requests_cache.CachedSession):
+    """
+    SQLite-backed cached session whose expiry depends on the requested dates and whose size is bounded.
+
+    Every response is cached with `response_ttl` of its parameters. The session records when
+    each cached response was last used. After each new response is stored, the least recently
+    used ones are evicted until the cache holds at most `max_bytes`. The new response itself is
+    never evicted.
+
+    Parameters:
+    ----------
+    path : str
+        Path of the SQLite cache file.
+    archive_ttl, recent_ttl, max_bytes : int
+        See `configure_http_cache`.
+
+    Examples:
+    --------
+    >>> session = LRUCachedSession("http_cache.sqlite", max_bytes=10 * 1024**2)
+    """
+    def __init__(self, path, archive_ttl = DEFAULT_ARCHIVE_TTL, recent_ttl = DEFAULT_RECENT_TTL,
+                 max_bytes = DEFAULT_MAX_BYTES):
+        super().__init__(path, backend = "sqlite", expire_after = recent_ttl, allowable_methods = ("GET", "POST"))
+        self.archive_ttl = archive_ttl
+        self.recent_ttl = recent_ttl
+        self.max_bytes = max_bytes
+        with self.cache.responses.connection(commit = True) as con:
+            con.execute(f"CREATE TABLE IF NOT EXISTS {_LRU_TABLE} (key TEXT PRIMARY KEY, accessed REAL)")
+
+    def request(self, method, url, *args, params = None, data = None, expire_after = None, **kwargs):
+        if expire_after is None:
+            # openmeteo_requests sends the parameters as the query of a GET or the body of a POST
+            expire_after = response_ttl(params if params is not None else data, self.archive_ttl, self.recent_ttl)
+        response = super().request(method, url, *args, params = params, data = data,
+                                   expire_after = expire_after, **kwargs)
+        key = getattr(response, "cache_key", None)
+        if key:
+            self._touch(key, evict = not getattr(response, "from_cache", False))
+        return response
+
+    def _touch(self, key, evict):
+        responses = self.cache.responses
+        with responses.connection(commit = True) as con:
+            con.execute(f"INSERT OR REPLACE INTO {_LRU_TABLE} (key, accessed) VALUES (?, ?)", (key, time.time()))
+            if not evict:
+                return
+            total = con.execute(f"SELECT COALESCE(SUM(LENGTH(value)), 0) FROM {responses.table_name}").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            # Responses never touched by this session (e.g. written by an older version) go first
+            rows = con.execute(f"SELECT r.key, LENGTH(r.value) FROM {responses.table_name} AS r "
+                               f"LEFT JOIN {_LRU_TABLE} AS a ON a.key = r.key "
+                               f"WHERE r.key != ? ORDER BY COALESCE(a.accessed, 0)", (key,))
+            evicted = []
+            for old_key, size in rows.fetchall():
+                if total <= self.max_bytes:
+                    break
+                evicted.append((old_key,))
+                total -= size
+            con.executemany(f"DELETE FROM {responses.table_name} WHERE key = ?", evicted)
+            con.executemany(f"DELETE FROM {_LRU_TABLE} WHERE key = ?", evicted)
@@ -0,0 +1,80 @@
+import numpy as np
+
+from src.instrumentation import traced
+
+@traced(rows_arg = "data")
+def score_frame(pipe, data, keep_columns = ()):
+    """
+    Scores a DataFrame with a fitted classification pipeline.
+
+    Only the columns the pipeline was trained on are passed to it, in training order, so the
+    input may carry extra columns such as dates or station identifiers.
+
+    Parameters:
+    ----------
+    pipe : sklearn.pipeline.Pipeline
+        A fitted pipeline whose final step has `decision_function`, e.g. the loaded
+        `optimum_cls_svm_pipeline.model`.
+    data : pandas.DataFrame
+        The rows to score. Must contain every column in `pipe.feature_names_in_`.
+    keep_columns : sequence of str
+        Optional: columns of `data` copied to the output in front of the scores (e.g. "date").
+
+    Returns:
+    -------
+    pandas.DataFrame
+        The kept columns followed by "prediction" (the predicted class) and "decision_score"
+        (the signed distance to the decision boundary; positive means the second class). For
+        more than two classes, "decision_score" is the score of the highest-scoring class.
+
+    Examples:
+    --------
+    >>> score_frame(opt_pipe, X_test.head(2))
+       prediction  decision_score
+    0        True        0.734112
+    1       False       -1.210943
+    """
+    features = getattr(pipe, "feature_names_in_", None)
+    if features is not None:
+        missing = [col for col in features if col not in data.columns]
+        if missing:
+            raise KeyError(f"Input is missing the model features {missing}")
+        X = data[list(features)]
+    else:
+        X = data
+
+    scores = np.asarray(pipe.decision_function(X))
+    result = data[list(keep_columns)].reset_index(drop = True)
+    if scores.ndim == 1:
+        # Binary decision functions predict the second class exactly when the score is positive
+        result["prediction"] = pipe.classes_[(scores > 0).astype(int)]
+        result["decision_score"] = scores
+    else:
+        result["prediction"] = pipe.predict(X)
+        result["decision_score"] = scores.max(axis = 1)
+    return result
+
+def predict_chunks(pipe, chunks, keep_columns = ()):
+    """
+    Lazily scores a stream of DataFrame chunks, one chunk at a time.
+
+    Parameters:
+    ----------
+    pipe : sklearn.pipeline.Pipeline
+        A fitted pipeline, see `score_frame`.
+    chunks : iterable of pandas.DataFrame
+        The rows to score, e.g. from `src.frame_io.iter_frame_chunks`.
+    keep_columns : sequence of str
+        Optional: columns copied to the output, see `score_frame`.
+
+    Yields:
+    ------
+    pandas.DataFrame
+        The scores of each chunk.
+
+    Examples:
+    --------
+    >>> write_frame_chunks(predict_chunks(opt_pipe, iter_frame_chunks("history.parquet")), "scores.parquet")
+    """
+    for chunk in chunks:
+        yield score_frame(pipe, chunk, keep_columns)
@@ -0,0 +1,302 @@
+import contextvars
+import cProfile
+import functools
+import inspect
+import itertools
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+# Set by `configure_instrumentation`; subprocesses (e.g. the stages of run_pipeline.py) inherit them
+EVENTS_ENV = "RAINCOUVER_EVENTS"
+PROFILE_ENV = "RAINCOUVER_PROFILE"
+
+# Number of functions listed in the text summary written next to every .pstats file
+PROFILE_SUMMARY_LINES = 40
+
+_current = contextvars.ContextVar("raincouver_span", default = None)
+_ids = itertools.count(1)
+_write_lock = threading.Lock()
+_profile_lock = threading.Lock()
+_profiling = False
+
+class Span:
+    """
+    A timed region of work, opened by `span` or `stage`.
+
+    Attributes:
+    ----------
+    name : str
+        Name of the span, e.g. "read_frame".
+    rows : int or None
+        Number of rows processed, reported in the event. Can be set while the span is open.
+    attributes : dict
+        Further JSON-serializable fields of the event, e.g. {"path": "data/processed/X_train.parquet"}.
+    """
+    def __init__(self, name, rows = None, attributes = None, parent = None):
+        self.name = name
+        self.rows = rows
+        self.attributes = dict(attributes or {})
+        self.id = f"{os.getpid()}-{next(_ids)}"
+        self.parent = parent
+
+    def event(self, wall_s, cpu_s, peak_rss_start, status):
+        peak_rss = _peak_rss_mb()
+        event = {"event": "span",
+                 "name": self.name,
+                 "id": self.id,
+                 "parent": self.parent.id if self.parent is not None else None,
+                 "wall_s": round(wall_s, 6),
+                 "cpu_s": round(cpu_s, 6),
+                 "peak_rss_mb": peak_rss,
+                 "peak_rss_growth_mb": (round(peak_rss - peak_rss_start, 3)
+                                        if peak_rss is not None and peak_rss_start is not None else None),
+                 "rows": self.rows,
+                 "status": status,
+                 "pid": os.getpid(),
+                 "thread": threading.current_thread().name,
+                 "time": round(time.time(), 3)}
+        event.update(self.attributes)
+        return event
+
+def configure_instrumentation(events_to = None, profile_to = None):
+    """
+    Chooses where span events and profiles are written, for this process and its subprocesses.
+
+    Both settings are kept in the environment variables `RAINCOUVER_EVENTS` and `RAINCOUVER_PROFILE`,
+    so stages that run_pipeline.py launches as subprocesses report to the same places. Arguments
+    that are None leave the current setting unchanged.
+
+    Parameters:
+    ----------
+    events_to : str, optional
+        Path of a JSON-lines file every finished span is appended to, one event per line with
+        "name", "wall_s", "cpu_s", "peak_rss_mb", "rows", "parent" and so on.
+    profile_to : str, optional
+        Directory each `stage` writes its cProfile statistics to, as "<stage>.pstats" (for
+        `pstats` or snakeviz) and "<stage>.txt" (the slowest functions by cumulative time).
+
+    Returns:
+    -------
+    None
+
+    Examples:
+    --------
+    >>> configure_instrumentation(events_to="results/events.jsonl", profile_to="results/profiles")
+    """
+    if events_to is not None:
+        os.environ[EVENTS_ENV] = os.path.abspath(events_to)
+    if profile_to is not None:
+        os.environ[PROFILE_ENV] = os.path.abspath(profile_to)
+
+def current_span():
+    """
+    Returns the innermost open `Span` of the calling context, or None outside of any span.
+
+    Examples:
+    --------
+    >>> current_span().rows = len(precipit_df)
+    """
+    return _current.get()
+
+@contextmanager
+def span(name, rows = None, **attributes):
+    """
+    Times a region of work and emits a span event when it ends.
+
+    The event holds the wall time, the CPU time of the process, its peak resident set size and
+    how much the region raised it, the rows processed and the enclosing span. Events are only
+    written when `configure_instrumentation` set an events file, so an unconfigured span costs a
+    few clock reads. Spans opened in worker threads start without a parent.
+
+    Parameters:
+    ----------
+    name : str
+        Name of the span.
+    rows : int, optional
+        Number of rows processed, if known up front; otherwise set `rows` on the yielded `Span`.
+    **attributes :
+        Further JSON-serializable fields of the event.
+
+    Yields:
+    ------
+    Span
+        The open span.
+
+    Examples:
+    --------
+    >>> with span("read_frame", path=path) as s:
+    ...     df = pd.read_parquet(path)
+    ...     s.rows = len(df)
+    """
+    with _timed(Span(name, rows, attributes, parent = _current.get()), profile = False) as opened:
+        yield opened
+
+@contextmanager
+def stage(name, rows = None, **attributes):
+    """
+    A `span` for a whole pipeline stage, which is also profiled with cProfile when
+    `configure_instrumentation` set a profile directory.
+
+    Only one profiler can run at a time, so a stage nested in another one, or started from another
+    thread while one is profiled, is timed but not profiled separately.
+
+    Examples:
+    --------
+    >>> with stage("classification"):
+    ...     search.fit(X_train, y_train)
+    """
+    with _timed(Span(name, rows, attributes, parent = _current.get()), profile = True) as opened:
+        yield opened
+
+def traced(name = None, rows_arg = None):
+    """
+    Decorator running every call of a function in a `span`.
+
+    Parameters:
+    ----------
+    name : str, optional
+        Name of the span. Default is the function's name.
+    rows_arg : str, optional
+        Name of an argument whose length is reported as the rows processed (e.g. "data" for a
+        writer). By default the length of the returned DataFrame, Series or array is reported.
+
+    Examples:
+    --------
+    >>> @traced(rows_arg="data")
+    ... def write_frame(data, directory, name, fmt="parquet"):
+    ...     ...
+    """
+    def decorate(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            rows = None
+            if rows_arg is not None:
+                rows = _count_rows(signature.bind(*args, **kwargs).arguments.get(rows_arg))
+            with span(name or func.__name__, rows) as s:
+                result = func(*args, **kwargs)
+                if s.rows is None:
+                    s.rows = _count_rows(result)
+                return result
+        return wrapper
+    return decorate
+
+def stage_main(name):
+    """
+    Decorator for the `main` function of a script: configures instrumentation from its `profile`
+    and `events_to` options and runs it as one `stage`.
+
+    Place it below the click options; the options `--profile` and `--events-to` must be declared,
+    and `main` itself does not take them.
+
+    Examples:
+    --------
+    >>> @click.command()
+    ... @click.option('--profile', type=str, default=None)
+    ... @click.option('--events-to', type=str, default=None)
+    ... @stage_main("eda")
+    ... def main():
+    ...     ...
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, profile = None, events_to = None, **kwargs):
+            configure_instrumentation(events_to, profile)
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def read_events(path):
+    """
+    Reads the span events of a JSON-lines file written by the spans.
+
+    Returns:
+    -------
+    list of dict
+        The events, in the order the spans ended.
+
+    Examples:
+    --------
+    >>> pd.DataFrame(read_events("results/events.jsonl")).groupby("name").wall_s.sum()
+    """
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+@contextmanager
+def _timed(opened, profile):
+    token = _current.set(opened)
+    profiler = _start_profiler() if profile and os.environ.get(PROFILE_ENV) else None
+    peak_rss = _peak_rss_mb()
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    status = "ok"
+    try:
+        yield opened
+    except BaseException as error:
+        status = type(error).__name__
+        raise
+    finally:
+        wall_s = time.perf_counter() - wall
+        cpu_s = time.process_time() - cpu
+        if profiler is not None:
+            _stop_profiler(profiler, opened.name)
+        _current.reset(token)
+        _emit(opened.event(wall_s, cpu_s, peak_rss, status))
+
+def _emit(event):
+    path = os.environ.get(EVENTS_ENV)
+    if not path:
+        return
+    directory = os.path.dirname(path)
+    if directory != '' and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok = True)
+    line = json.dumps(event, default = str) + "\n"
+    # One append per event, so concurrent processes writing the same file do not interleave lines
+    with _write_lock, open(path, "a") as f:
+        f.write(line)
+
+def _start_profiler():
+    global _profiling
+    with _profile_lock:
+        if _profiling:
+            return None
+        _profiling = True
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+def _stop_profiler(profiler, name):
+    global _profiling
+    profiler.disable()
+    directory = os.environ[PROFILE_ENV]
+    os.makedirs(directory, exist_ok = True)
+    profiler.dump_stats(os.path.join(directory, f"{name}.pstats"))
+    with open(os.path.join(directory, f"{name}.txt"), "w") as f:
+        pstats.Stats(profiler, stream = f).sort_stats("cumulative").print_stats(PROFILE_SUMMARY_LINES)
+    with _profile_lock:
+        _profiling = False
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024**2 if sys.platform == "darwin" else 1024), 3)
+
+def _count_rows(value):
+    shape = getattr(value, "shape", None)
+    if shape:
+        return int(shape[0])
+    return None
@@ -0,0 +1,401 @@
+import hashlib
+import io
+import json
+import os
+import time
+import zlib
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import numpy as np
+
+# flatbuffers and requests are imported where responses are built and sent, so that the command
+# line of scripts/mock_openmeteo.py starts without them
+
+MOCK_MODES = ["synthetic", "replay", "record"]
+UPSTREAM_URL = "https://archive-api.open-meteo.com"
+VANCOUVER_UTC_OFFSET = -8 * 3600
+
+# Slots of the fields written, as numbered in the Open-Meteo FlatBuffers schema (openmeteo_sdk)
+_RESPONSE_FIELDS = 16
+_RESPONSE_SLOTS = {"latitude": 0, "longitude": 1, "elevation": 2, "generation_time_milliseconds": 3,
+                   "utc_offset_seconds": 6, "timezone": 7, "timezone_abbreviation": 8,
+                   "current": 9, "daily": 10, "hourly": 11}
+_BLOCK_FIELDS = 4
+_VARIABLE_FIELDS = 14
+_VALUES_SLOT = 3
+_VALUES_INT64_SLOT = 4
+
+# Daily variables the API sends as epoch seconds
+INT64_VARIABLES = ("sunrise", "sunset")
+_WEATHER_CODES = np.array([0, 1, 2, 3, 45, 51, 53, 61, 63, 65, 71, 80], dtype = np.float32)
+
+def encode_response(latitude, longitude, blocks, utc_offset_seconds = 0, timezone = "GMT",
+                    timezone_abbreviation = "GMT", elevation = 0.0):
+    """
+    Encodes one location's weather data as an Open-Meteo FlatBuffers message.
+
+    Parameters:
+    ----------
+    latitude, longitude, elevation : float
+        Coordinates of the location.
+    blocks : dict
+        Maps a block name ("daily", "hourly" or "current") to a tuple (time, time_end, interval,
+        variables): epoch seconds of the first step and one past the last, the step in seconds,
+        and a list of 1-D arrays in request order. Integer arrays are written as int64 values
+        (e.g. sunrise), everything else as float32.
+    utc_offset_seconds : int
+        Offset of the location's timezone. Default is 0.
+    timezone, timezone_abbreviation : str
+        Names of the timezone. Default is "GMT".
+
+    Returns:
+    -------
+    bytes
+        The message, without the length prefix (see `frame_messages`).
+
+    Examples:
+    --------
+    >>> message = encode_response(49.25, -123.12, {"daily": (start, start + 86400, 86400, [np.array([3.2])])})
+    """
+    import flatbuffers
+
+    builder = flatbuffers.Builder(1024)
+    timezone = builder.CreateString(timezone)
+    abbreviation = builder.CreateString(timezone_abbreviation)
+    block_offsets = {name: _encode_block(builder, *block) for name, block in blocks.items()}
+
+    builder.StartObject(_RESPONSE_FIELDS)
+    builder.PrependFloat32Slot(_RESPONSE_SLOTS["latitude"], latitude, 0.0)
+    builder.PrependFloat32Slot(_RESPONSE_SLOTS["longitude"], longitude, 0.0)
+    builder.PrependFloat32Slot(_RESPONSE_SLOTS["elevation"], elevation, 0.0)
+    builder.PrependFloat32Slot(_RESPONSE_SLOTS["generation_time_milliseconds"], 0.1, 0.0)
+    builder.PrependInt32Slot(_RESPONSE_SLOTS["utc_offset_seconds"], utc_offset_seconds, 0)
+    builder.PrependUOffsetTRelativeSlot(_RESPONSE_SLOTS["timezone"], timezone, 0)
+    builder.PrependUOffsetTRelativeSlot(_RESPONSE_SLOTS["timezone_abbreviation"], abbreviation, 0)
+    for name, offset in block_offsets.items():
+        builder.PrependUOffsetTRelativeSlot(_RESPONSE_SLOTS[name], offset, 0)
+    builder.Finish(builder.EndObject())
+    return bytes(builder.Output())
+
+def frame_messages(messages):
+    """
+    Joins FlatBuffers messages into one response body, each preceded by its little-endian
+    4-byte length, the framing `openmeteo_requests.Client` splits responses on.
+    """
+    return b"".join(len(message).to_bytes(4, "little") + message for message in messages)
+
+def synthetic_response(params, utc_offset_seconds = VANCOUVER_UTC_OFFSET):
+    """
+    Builds the response body the archive API would send for a request, from synthetic data.
+
+    One message is written per requested location. Values are deterministic functions of the
+    variable, the location and the date only: with a yearly cycle, realistic ranges and
+    day-to-day noise. So a range gives the same values whether it is fetched in one request or
+    in windows, as chunked and concurrent fetching expect.
+
+    Parameters:
+    ----------
+    params : dict
+        The query parameters, as lists of strings (as `urllib.parse.parse_qs` returns them) or
+        plain values: "latitude", "longitude" (comma-separated or repeated for several
+        locations), "start_date", "end_date" and the "daily" and/or "hourly" variables.
+    utc_offset_seconds : int
+        Timezone offset reported for every location. Default is Vancouver's standard time.
+
+    Returns:
+    -------
+    bytes
+        The framed FlatBuffers body.
+
+    Examples:
+    --------
+    >>> body = synthetic_response({"latitude": "49.25", "longitude": "-123.12", "start_date": "2010-01-01",
+    ...                            "end_date": "2010-01-10", "daily": ["precipitation_sum", "sunrise"]})
+    """
+    latitudes = [float(value) for value in _param_list(params, "latitude")]
+    longitudes = [float(value) for value in _param_list(params, "longitude")]
+    if len(latitudes) == 0 or len(latitudes) != len(longitudes):
+        raise ValueError("latitude and longitude must list the same, non-zero number of locations")
+    start = _epoch(_param_list(params, "start_date")[0]) - utc_offset_seconds
+    end = _epoch(_param_list(params, "end_date")[0]) + 86400 - utc_offset_seconds
+    if end <= start:
+        raise ValueError("end_date must not be earlier than start_date")
+
+    messages = []
+    for latitude, longitude in zip(latitudes, longitudes):
+        blocks = {}
+        for resolution, interval in (("daily", 86400), ("hourly", 3600)):
+            names = _param_list(params, resolution)
+            if names:
+                times = np.arange(start, end, interval, dtype = np.int64)
+                blocks[resolution] = (start, end, interval,
+                                      [_synthetic_values(name, times, interval, latitude, longitude, utc_offset_seconds)
+                                       for name in names])
+        messages.append(encode_response(latitude, longitude, blocks, utc_offset_seconds,
+                                        "America/Vancouver", "PST", elevation = 70.0))
+    return frame_messages(messages)
+
+class MockOpenMeteo:
+    """
+    Offline stand-in for the Open-Meteo archive API, answering requests with FlatBuffers bodies.
+
+    In "synthetic" mode every request is answered with `synthetic_response`. In "record" mode
+    requests are forwarded to the real API and the answers saved as fixtures; in "replay" mode
+    those fixtures are served and a request without one fails, so a test can never reach the
+    network by accident. Fixtures are keyed by the URL path and the sorted query parameters.
+
+    Parameters:
+    ----------
+    mode : str
+        "synthetic" (default), "replay" or "record".
+    fixtures : str, optional
+        Directory of recorded fixtures, required for "replay" and "record".
+    upstream : str
+        Base URL requests are forwarded to when recording. Default is the public archive API.
+    latency_ms : float
+        Delay added to every answer, e.g. to load-test concurrent fetching. Default is 0.
+
+    Examples:
+    --------
+    >>> mock = MockOpenMeteo()
+    >>> openmeteo = openmeteo_requests.Client(session=mock.session())
+    """
+    def __init__(self, mode = "synthetic", fixtures = None, upstream = UPSTREAM_URL, latency_ms = 0.0):
+        if mode not in MOCK_MODES:
+            raise ValueError(f"mode must be one of {MOCK_MODES}, got {mode!r}")
+        if mode != "synthetic" and fixtures is None:
+            raise ValueError(f"mode {mode!r} needs a fixtures directory")
+        self.mode = mode
+        self.fixtures = fixtures
+        self.upstream = upstream.rstrip("/")
+        self.latency_ms = latency_ms
+        self.requests = 0
+
+    def respond(self, path, params):
+        """
+        Answers one request. Returns (status, content type, body).
+        """
+        self.requests += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        params = {key: value for key, value in params.items() if key != "format"}
+        if self.mode == "synthetic":
+            try:
+                return 200, "application/octet-stream", synthetic_response(params)
+            except (KeyError, IndexError, ValueError) as error:
+                return 400, "application/json", json.dumps({"error": True, "reason": str(error)}).encode()
+
+        fixture = os.path.join(self.fixtures, fixture_key(path, params))
+        if self.mode == "replay":
+            if not os.path.exists(fixture + ".bin"):
+                return 404, "application/json", json.dumps({"error": True, "reason": f"No fixture recorded for "
+                                                             f"{path}?{urlencode(params, doseq = True)}"}).encode()
+            with open(fixture + ".bin", "rb") as f:
+                return 200, "application/octet-stream", f.read()
+
+        import requests
+
+        response = requests.get(self.upstream + path, params = {**params, "format": "flatbuffers"}, timeout = 60)
+        if response.status_code == 200:
+            os.makedirs(self.fixtures, exist_ok = True)
+            with open(fixture + ".bin", "wb") as f:
+                f.write(response.content)
+            with open(fixture + ".json", "w") as f:
+                json.dump({"path": path, "params": params}, f, indent = 2)
+        return response.status_code, response.headers.get("Content-Type", "application/octet-stream"), response.content
+
+    def session(self):
+        """
+        Returns a `requests.Session` that sends every request to this mock in-process, without sockets.
+        """
+        import requests
+
+        session = requests.Session()
+        adapter = _MockAdapter(self)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+def fixture_key(path, params):
+    """
+    Name of the fixture file (without extension) for a request path and its query parameters.
+    """
+    canonical = json.dumps([path, sorted((key, sorted(_param_list(params, key))) for key in params)])
+    return hashlib.sha256(canonical.encode()).hexdigest()[:20]
+
+def make_mock_server(host = "127.0.0.1", port = 0, mode = "synthetic", fixtures = None, upstream = UPSTREAM_URL,
+                     latency_ms = 0.0, verbose = False):
+    """
+    Creates a local HTTP server speaking the Open-Meteo FlatBuffers API, see `MockOpenMeteo`.
+
+    Any path is answered, so pointing `download_data.py --url` at
+    "http://{host}:{port}/v1/archive" fetches from it instead of the real archive.
+
+    Parameters:
+    ----------
+    host : str
+        Address to bind. Default is "127.0.0.1".
+    port : int
+        Port to bind; 0 (default) picks a free port (see `server.server_address`).
+    mode, fixtures, upstream, latency_ms :
+        See `MockOpenMeteo`.
+    verbose : bool
+        If True, every request is logged to standard error. Default is False.
+
+    Returns:
+    -------
+    http.server.ThreadingHTTPServer
+        The server, not yet serving, with the `MockOpenMeteo` as `server.mock`.
+
+    Examples:
+    --------
+    >>> server = make_mock_server(port=8081)
+    >>> threading.Thread(target=server.serve_forever, daemon=True).start()
+    >>> get_vancouver_data("http://127.0.0.1:8081/v1/archive", "2010-01-01", "2010-12-31", chunk_freq="MS")
+    """
+    server = ThreadingHTTPServer((host, port), _MockHandler)
+    server.daemon_threads = True
+    server.mock = MockOpenMeteo(mode, fixtures, upstream, latency_ms)
+    server.verbose = verbose
+    return server
+
+class _MockHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        self._send(*self.server.mock.respond(url.path, parse_qs(url.query)))
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+        self._send(*self.server.mock.respond(urlsplit(self.path).path, parse_qs(body)))
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class _MockAdapter:
+    """
+    Transport adapter answering requests from a `MockOpenMeteo` instead of the network.
+
+    It implements the `send`/`close` interface of `requests.adapters.BaseAdapter` without
+    subclassing it, so requests is only imported once a session is created.
+    """
+    def __init__(self, mock):
+        self.mock = mock
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        params = parse_qs(url.query)
+        if request.body:
+            body = request.body.decode() if isinstance(request.body, bytes) else request.body
+            params.update(parse_qs(body))
+        from requests.adapters import HTTPAdapter
+        from urllib3 import HTTPResponse
+
+        status, content_type, body = self.mock.respond(url.path, params)
+        raw = HTTPResponse(body = io.BytesIO(body), status = status, headers = {"Content-Type": content_type},
+                           preload_content = False, request_url = request.url)
+        return HTTPAdapter().build_response(request, raw)
+
+    def close(self):
+        pass
+
+def _encode_block(builder, start, end, interval, variables):
+    offsets = []
+    for values in variables:
+        values = np.asarray(values)
+        int64 = np.issubdtype(values.dtype, np.integer)
+        vector = builder.CreateNumpyVector(values.astype("<i8" if int64 else "<f4"))
+        builder.StartObject(_VARIABLE_FIELDS)
+        builder.PrependUOffsetTRelativeSlot(_VALUES_INT64_SLOT if int64 else _VALUES_SLOT, vector, 0)
+        offsets.append(builder.EndObject())
+
+    builder.StartVector(4, len(offsets), 4)
+    for offset in reversed(offsets):
+        builder.PrependUOffsetTRelative(offset)
+    vector = builder.EndVector()
+
+    builder.StartObject(_BLOCK_FIELDS)
+    builder.PrependInt64Slot(0, start, 0)
+    builder.PrependInt64Slot(1, end, 0)
+    builder.PrependInt32Slot(2, interval, 0)
+    builder.PrependUOffsetTRelativeSlot(3, vector, 0)
+    return builder.EndObject()
+
+def _synthetic_values(name, times, interval, latitude, longitude, utc_offset_seconds):
+    """
+    Deterministic synthetic values of one variable at the given epoch seconds.
+    """
+    steps = (times + utc_offset_seconds) // interval
+    days = (times + utc_offset_seconds) // 86400
+    location = zlib.crc32(f"{latitude:.4f},{longitude:.4f}".encode())
+    noise = _uniform(steps, zlib.crc32(name.encode()) ^ location)
+    # Yearly cycle peaking in late July, as days since the epoch modulo the length of a year
+    season = np.sin(2 * np.pi * ((days % 365.25) - 110) / 365.25)
+    per_day = 24 if interval == 3600 else 1
+    # Wetness is shared by every precipitation variable, and more likely in winter
+    wet_noise = _uniform(steps, zlib.crc32(b"precipitation") ^ location)
+    wet = wet_noise < 0.45 - 0.2 * season
+    amount = np.where(wet, -np.log1p(-_uniform(steps, zlib.crc32(b"amount") ^ location)) * 4 / per_day, 0.0)
+
+    if name in INT64_VARIABLES:
+        hours = 7.5 - 1.5 * season if name == "sunrise" else 16.5 + 4.5 * season
+        return (times - (times + utc_offset_seconds) % 86400 + (hours * 3600).astype(np.int64)).astype(np.int64)
+    if name == "weather_code":
+        return np.where(wet, _WEATHER_CODES[5 + (noise * 7).astype(int)], _WEATHER_CODES[(noise * 5).astype(int)])
+    if "temperature" in name:
+        value = 10 + 7 * season + (noise - 0.5) * 6
+        return value + 4 if name.endswith("_max") else value - 4 if name.endswith("_min") else value
+    if name == "snowfall_sum":
+        return amount * (season < -0.8) * 0.7
+    if name == "precipitation_hours":
+        return np.minimum(24.0, np.ceil(amount * 1.5))
+    if "precipitation" in name or "rain" in name:
+        return amount
+    if "direction" in name:
+        return noise * 360
+    if "wind" in name:
+        return (5 + 15 * noise) * (1.8 if "gusts" in name else 1.0)
+    if "radiation" in name:
+        return np.maximum(0.5, 12 + 9 * season - 4 * wet + (noise - 0.5) * 4) / per_day
+    if "et0" in name:
+        return np.maximum(0.1, 2 + 1.8 * season - 0.8 * wet + noise * 0.5) / per_day
+    if "pressure" in name:
+        return 1013 + (noise - 0.5) * 30 - 8 * wet
+    if "humidity" in name:
+        return np.minimum(100.0, 60 + 25 * noise + 15 * wet)
+    if "cloud" in name:
+        return np.minimum(100.0, 100 * noise + 50 * wet)
+    return noise
+
+def _uniform(steps, seed):
+    """
+    Counter-based uniform noise in [0, 1): a SplitMix64 hash of each step and the seed.
+    """
+    x = steps.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15) + np.uint64(seed)
+    x ^= x >> np.uint64(30)
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(27)
+    x *= np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    return (x >> np.uint64(11)).astype(np.float64) / 2.0**53
+
+def _param_list(params, key):
+    """
+    Values of a query parameter as a flat list, splitting comma-separated and repeated values.
+    """
+    values = params.get(key, [])
+    if not isinstance(values, (list, tuple)):
+        values = [values]
+    return [part for value in values for part in str(value).split(",") if part != ""]
+
+def _epoch(day):
+    return int((date.fromisoformat(day) - date(1970, 1, 1)).total_seconds())
@@ -0,0 +1,271 @@
+import hashlib
+import io
+import json
+import os
+import pickle
+import platform
+import shutil
+import warnings
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from src.instrumentation import traced
+
+ARTIFACT_FORMAT = "raincouver-model"
+ARTIFACT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+SKELETON_FILE = "skeleton.pkl"
+ARRAYS_DIR = "arrays"
+
+# Arrays at least this large are stored as separate .npy blocks; smaller ones stay in the skeleton
+MIN_ARRAY_BYTES = 1024
+
+# The only globals the skeleton may load: the classes the saved pipelines are made of and what
+# NumPy needs to rebuild small arrays. Whole packages cannot be allowed, since they hold functions
+# (numpy.load, numpy.testing's runstring, ...) that run arbitrary code when called from a pickle.
+# A model using another estimator fails to load until its class is added here.
+_ALLOWED_GLOBALS = frozenset([
+    ("sklearn.pipeline", "Pipeline"),
+    ("sklearn.compose._column_transformer", "ColumnTransformer"),
+    ("sklearn.compose._column_transformer", "make_column_selector"),
+    ("sklearn.preprocessing._data", "StandardScaler"),
+    ("sklearn.svm._classes", "SVC"),
+    ("sklearn.svm._classes", "LinearSVC"),
+    ("sklearn.kernel_approximation", "Nystroem"),
+    ("src.cyclical", "CyclicalEncoder"),
+    # Its former location, which artifacts saved before it moved still name
+    ("src.utils", "CyclicalEncoder"),
+    ("src.approx_svm", "NystroemSVC"),
+    *((module, name) for module in ("numpy.core.multiarray", "numpy._core.multiarray")
+      for name in ("_reconstruct", "scalar")),
+    *((module, "_frombuffer") for module in ("numpy.core.numeric", "numpy._core.numeric")),
+    ("numpy", "ndarray"),
+    ("numpy", "dtype"),
+    ("copyreg", "_reconstructor"),
+    *(("builtins", name) for name in ("bool", "bytearray", "bytes", "complex", "dict", "float", "frozenset",
+                                      "int", "list", "object", "range", "set", "slice", "str", "tuple")),
+])
+
+@traced()
+def save_model(model, path, feature_names = None, training_data = (), metrics = None):
+    """
+    Saves a model as a versioned artifact directory instead of a single pickle.
+
+    Every large NumPy array inside the model (support vectors, scaler statistics, ...) is written
+    as its own `.npy` block, so `load_model` can memory-map it: worker processes that load the same
+    artifact then share those pages instead of each deserializing a private copy. What remains is
+    a small pickled skeleton. A `manifest.json` records the format version, the library versions
+    the model was trained with, the feature names, a hash of the training data, evaluation metrics
+    and a SHA-256 of every file. It holds no timestamp, so saving the same model twice gives
+    byte-identical artifacts and downstream pipeline stages stay cached.
+
+    Parameters:
+    ----------
+    model : object
+        The model to save, e.g. a fitted sklearn pipeline.
+    path : str
+        Directory to write the artifact to (e.g. "results/models/optimum_cls_svm_pipeline.model").
+        An existing artifact at that path is replaced.
+    feature_names : list of str, optional
+        Input features of the model. Defaults to `model.feature_names_in_` if it exists.
+    training_data : sequence of pandas.DataFrame or pandas.Series
+        Optional: the data the model was trained on (e.g. (X_train, y_train)), hashed with `data_hash`.
+    metrics : dict, optional
+        Evaluation results to record, e.g. {"test_f1": 0.87}.
+
+    Returns:
+    -------
+    dict
+        The manifest.
+
+    Examples:
+    --------
+    >>> save_model(opt_pipe, "results/models/optimum_cls_svm_pipeline.model",
+    ...            training_data=(X_train, y_train), metrics={"test_f1": 0.87})
+    """
+    if feature_names is None and hasattr(model, "feature_names_in_"):
+        feature_names = model.feature_names_in_
+
+    # Write into a temporary directory first so an interrupted save never leaves half an artifact
+    tmp_path = path.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors = True)
+    os.makedirs(os.path.join(tmp_path, ARRAYS_DIR))
+
+    arrays = []
+    skeleton = io.BytesIO()
+    _ArrayPickler(skeleton, tmp_path, arrays).dump(model)
+    with open(os.path.join(tmp_path, SKELETON_FILE), "wb") as f:
+        f.write(skeleton.getvalue())
+
+    manifest = {"format": ARTIFACT_FORMAT,
+                "format_version": ARTIFACT_VERSION,
+                "model_class": f"{type(model).__module__}.{type(model).__name__}",
+                "python_version": platform.python_version(),
+                "sklearn_version": sklearn.__version__,
+                "numpy_version": np.__version__,
+                "feature_names": None if feature_names is None else [str(name) for name in feature_names],
+                "training_data_sha256": data_hash(*training_data) if len(training_data) else None,
+                "metrics": metrics or {},
+                "skeleton": {"file": SKELETON_FILE, "sha256": _hash_file(os.path.join(tmp_path, SKELETON_FILE))},
+                "arrays": arrays}
+    with open(os.path.join(tmp_path, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent = 2)
+
+    shutil.rmtree(path, ignore_errors = True)
+    os.replace(tmp_path, path)
+    return manifest
+
+@traced()
+def load_model(path, mmap_mode = "r", check_arrays = False):
+    """
+    Loads a model saved by `save_model`.
+
+    The skeleton is checked against its SHA-256 in the manifest and unpickled with only the
+    estimator classes of the saved pipelines and NumPy's array constructors allowed, and the arrays
+    are memory-mapped from their `.npy` blocks. A warning is raised if the artifact was saved with a different sklearn version.
+
+    Parameters:
+    ----------
+    path : str
+        Path to the artifact directory.
+    mmap_mode : str or None
+        How the arrays are opened, as in `numpy.load`: "r" (default) maps them read-only and shares
+        their pages between processes, "c" maps them copy-on-write, None reads them into memory.
+    check_arrays : bool
+        If True, every array block is also checked against its SHA-256, which reads it in full.
+        Default is False; shapes and dtypes are always checked.
+
+    Returns:
+    -------
+    object
+        The model.
+
+    Examples:
+    --------
+    >>> opt_pipe = load_model("results/models/optimum_cls_svm_pipeline.model")
+    """
+    manifest = read_manifest(path)
+    if manifest["sklearn_version"] != sklearn.__version__:
+        warnings.warn(f"Model artifact {path} was saved with scikit-learn {manifest['sklearn_version']}, "
+                      f"loading it with {sklearn.__version__}")
+
+    skeleton_path = os.path.join(path, manifest["skeleton"]["file"])
+    if _hash_file(skeleton_path) != manifest["skeleton"]["sha256"]:
+        raise ValueError(f"Model artifact {path} is corrupted: {manifest['skeleton']['file']} does not match its hash")
+
+    with open(skeleton_path, "rb") as f:
+        return _ArrayUnpickler(f, path, manifest["arrays"], mmap_mode, check_arrays).load()
+
+def read_manifest(path):
+    """
+    Reads and validates the manifest of a model artifact without loading the model.
+
+    Parameters:
+    ----------
+    path : str
+        Path to the artifact directory.
+
+    Returns:
+    -------
+    dict
+        The manifest, including "feature_names", "sklearn_version", "training_data_sha256" and "metrics".
+
+    Examples:
+    --------
+    >>> read_manifest("results/models/optimum_cls_svm_pipeline.model")["metrics"]
+    {'cv_accuracy': 0.853, 'test_f1': 0.87, ...}
+    """
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"{path} is not a model artifact: {MANIFEST_FILE} is missing")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"{path} is not a {ARTIFACT_FORMAT} artifact")
+    if manifest["format_version"] > ARTIFACT_VERSION:
+        raise ValueError(f"Model artifact {path} has format version {manifest['format_version']}, "
+                         f"this code reads up to version {ARTIFACT_VERSION}")
+    return manifest
+
+def data_hash(*frames):
+    """
+    Computes a SHA-256 over the contents of DataFrames or Series, including column names.
+
+    Parameters:
+    ----------
+    *frames : pandas.DataFrame or pandas.Series
+        The data to hash, in order.
+
+    Returns:
+    -------
+    str
+        The hexadecimal digest.
+
+    Examples:
+    --------
+    >>> data_hash(X_train, y_train)
+    '3f1c...'
+    """
+    digest = hashlib.sha256()
+    for frame in frames:
+        if isinstance(frame, pd.Series):
+            frame = frame.to_frame()
+        digest.update(json.dumps([str(col) for col in frame.columns]).encode())
+        digest.update(pd.util.hash_pandas_object(frame, index = False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+class _ArrayPickler(pickle.Pickler):
+    """
+    Pickler that writes large NumPy arrays to `.npy` blocks and pickles a reference instead.
+    """
+    def __init__(self, file, path, arrays):
+        super().__init__(file, protocol = pickle.HIGHEST_PROTOCOL)
+        self.path = path
+        self.arrays = arrays
+
+    def persistent_id(self, obj):
+        if (type(obj) is not np.ndarray or obj.dtype.hasobject or obj.nbytes < MIN_ARRAY_BYTES):
+            return None
+        name = os.path.join(ARRAYS_DIR, f"{len(self.arrays)}.npy")
+        np.save(os.path.join(self.path, name), obj, allow_pickle = False)
+        self.arrays.append({"file": name,
+                            "shape": list(obj.shape),
+                            "dtype": obj.dtype.str,
+                            "sha256": _hash_file(os.path.join(self.path, name))})
+        return len(self.arrays) - 1
+
+class _ArrayUnpickler(pickle.Unpickler):
+    """
+    Unpickler that memory-maps the `.npy` blocks and refuses every global outside `_ALLOWED_GLOBALS`.
+    """
+    def __init__(self, file, path, arrays, mmap_mode, check_arrays):
+        super().__init__(file)
+        self.path = path
+        self.arrays = arrays
+        self.mmap_mode = mmap_mode
+        self.check_arrays = check_arrays
+
+    def persistent_load(self, index):
+        entry = self.arrays[index]
+        array_path = os.path.join(self.path, entry["file"])
+        if self.check_arrays and _hash_file(array_path) != entry["sha256"]:
+            raise ValueError(f"Model artifact {self.path} is corrupted: {entry['file']} does not match its hash")
+        array = np.load(array_path, mmap_mode = self.mmap_mode, allow_pickle = False)
+        if list(array.shape) != entry["shape"] or array.dtype.str != entry["dtype"]:
+            raise ValueError(f"Model artifact {self.path} is corrupted: {entry['file']} has the wrong shape or dtype")
+        return array
+
+    def find_class(self, module, name):
+        # Exact pairs only, so neither dotted names ("os.getcwd") nor other names of an allowed module get through
+        if (module, name) not in _ALLOWED_GLOBALS:
+            raise pickle.UnpicklingError(f"Model artifacts may not load {module}.{name}")
+        return super().find_class(module, name)
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,265 @@
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+from sklearn import config_context
+
+from src.inference import score_frame
+
+# Longest time an HTTP request waits for its micro-batch to be scored
+DEFAULT_REQUEST_TIMEOUT_S = 30.0
+
+class ServingStats:
+    """
+    Thread-safe request, latency and throughput counters of a prediction service.
+
+    Latencies are kept for the most recent `window` requests, so the percentiles follow the
+    current load rather than the whole lifetime of the server.
+
+    Parameters:
+    ----------
+    window : int
+        Number of most recent request latencies the percentiles are computed over. Default is 10000.
+
+    Examples:
+    --------
+    >>> stats = ServingStats()
+    >>> stats.record_batch([0.004, 0.006], n_rows=2)
+    >>> stats.snapshot()["latency_ms_p50"]
+    5.0
+    """
+    def __init__(self, window = 10_000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen = window)
+        self._start = time.perf_counter()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+
+    def record_batch(self, latencies, n_rows):
+        with self._lock:
+            self._latencies.extend(latencies)
+            self.requests += len(latencies)
+            self.rows += n_rows
+            self.batches += 1
+
+    def snapshot(self):
+        """
+        Returns the counters as a JSON-serializable dict: totals, mean batch size, p50/p99 latency
+        in milliseconds (from submission to result) and requests and rows per second since start.
+        """
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            uptime = time.perf_counter() - self._start
+            return {"requests": self.requests,
+                    "rows": self.rows,
+                    "batches": self.batches,
+                    "mean_batch_size": round(self.rows / self.batches, 2) if self.batches else 0.0,
+                    "latency_ms_p50": round(float(np.percentile(latencies, 50)), 3) if len(latencies) else None,
+                    "latency_ms_p99": round(float(np.percentile(latencies, 99)), 3) if len(latencies) else None,
+                    "throughput_requests_per_s": round(self.requests / uptime, 2),
+                    "throughput_rows_per_s": round(self.rows / uptime, 2),
+                    "uptime_s": round(uptime, 3)}
+
+class MicroBatcher:
+    """
+    Coalesces concurrent prediction requests into micro-batches scored by one warm pipeline.
+
+    A single worker thread takes the first waiting request, keeps collecting requests until
+    `max_batch_size` rows are queued or `max_wait_ms` has passed, and scores them with a single
+    pipeline call. The pipeline's per-call overhead is then paid once per batch instead of once
+    per request, at the cost of at most `max_wait_ms` extra latency. If the batch cannot be
+    scored (e.g. one request holds a missing value), its requests are scored one by one, so only
+    the faulty ones fail.
+
+    Parameters:
+    ----------
+    pipe : sklearn.pipeline.Pipeline
+        A fitted pipeline, see `src.inference.score_frame`.
+    max_batch_size : int
+        Number of rows after which a batch is scored without waiting further. Default is 64.
+    max_wait_ms : float
+        Longest time the first request of a batch waits for others to join. Default is 5.
+
+    Examples:
+    --------
+    >>> batcher = MicroBatcher(opt_pipe)
+    >>> batcher.predict(X_test.head(1))
+       prediction  decision_score
+    0        True        0.734112
+    >>> batcher.close()
+    """
+    def __init__(self, pipe, max_batch_size = 64, max_wait_ms = 5.0):
+        self.pipe = pipe
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.stats = ServingStats()
+        self._features = list(getattr(pipe, "feature_names_in_", []))
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target = self._run, daemon = True)
+        self._worker.start()
+
+    def submit(self, data):
+        """
+        Queues a DataFrame of one or more rows and returns a Future of its `score_frame` result.
+        """
+        missing = [col for col in self._features if col not in data.columns]
+        if missing:
+            raise KeyError(f"Input is missing the model features {missing}")
+        future = Future()
+        self._queue.put((data, future, time.perf_counter()))
+        return future
+
+    def predict(self, data, timeout = None):
+        """
+        Scores a DataFrame as part of the next micro-batch and waits for the result, at most
+        `timeout` seconds if given (then raising `concurrent.futures.TimeoutError`).
+        """
+        return self.submit(data).result(timeout)
+
+    def close(self):
+        """
+        Scores the requests already queued, then stops the worker thread.
+        """
+        self._queue.put(None)
+        self._worker.join()
+
+    def _run(self):
+        # sklearn's configuration is per thread; the pipeline was trained passing DataFrames between steps
+        with config_context(transform_output = "pandas"):
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+                if item is None:
+                    break
+                batch = [item]
+                n_rows = len(item[0])
+                deadline = time.perf_counter() + self.max_wait_ms / 1000
+                while n_rows < self.max_batch_size:
+                    try:
+                        item = self._queue.get(timeout = max(deadline - time.perf_counter(), 0))
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+                    n_rows += len(item[0])
+                self._score(batch, n_rows)
+
+    def _score(self, batch, n_rows):
+        try:
+            scores = score_frame(self.pipe, pd.concat([data for data, _, _ in batch], ignore_index = True))
+        except Exception as error:
+            if len(batch) == 1:
+                batch[0][1].set_exception(error)
+            else:
+                # One bad request must not fail the others it was batched with
+                for item in batch:
+                    self._score([item], len(item[0]))
+            return
+
+        done = time.perf_counter()
+        self.stats.record_batch([done - submitted for _, _, submitted in batch], n_rows)
+        offset = 0
+        for data, future, _ in batch:
+            future.set_result(scores.iloc[offset:offset + len(data)].reset_index(drop = True))
+            offset += len(data)
+
+class _PredictionHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, '{"status": "ok"}')
+        elif self.path == "/metrics":
+            self._send_json(200, json.dumps(self.server.batcher.stats.snapshot()))
+        else:
+            self._send_json(404, json.dumps({"error": f"Unknown path {self.path}"}))
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, json.dumps({"error": f"Unknown path {self.path}"}))
+            return
+        try:
+            records = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            if isinstance(records, dict):
+                records = [records]
+            scores = self.server.batcher.predict(pd.DataFrame.from_records(records),
+                                                 timeout = self.server.request_timeout)
+        # Only an alias of the builtin TimeoutError from Python 3.11 on
+        except FutureTimeoutError:
+            self._send_json(503, json.dumps({"error": f"No prediction within {self.server.request_timeout} s"}))
+            return
+        except (ValueError, KeyError, TypeError) as error:
+            self._send_json(400, json.dumps({"error": str(error)}))
+            return
+        except Exception as error:
+            self._send_json(500, json.dumps({"error": f"{type(error).__name__}: {error}"}))
+            return
+        self._send_json(200, '{"predictions": ' + scores.to_json(orient = "records") + '}')
+
+    def _send_json(self, status, body):
+        body = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+def make_server(pipe, host = "127.0.0.1", port = 8000, max_batch_size = 64, max_wait_ms = 5.0, verbose = False,
+                request_timeout = DEFAULT_REQUEST_TIMEOUT_S):
+    """
+    Creates a local HTTP prediction server around a warm pipeline.
+
+    Each connection is handled in its own thread and submits its rows to a shared `MicroBatcher`,
+    so concurrent requests are scored together. Endpoints:
+
+    - POST /predict: a JSON record, or a list of records, holding the model features. Answers
+      {"predictions": [{"prediction": ..., "decision_score": ...}, ...]} in the same order.
+    - GET /metrics: the `ServingStats` counters (p50/p99 latency, throughput, batch sizes).
+    - GET /health: {"status": "ok"}.
+
+    Parameters:
+    ----------
+    pipe : sklearn.pipeline.Pipeline
+        A fitted pipeline, see `src.inference.score_frame`.
+    host : str
+        Address to bind. Default is "127.0.0.1" (local only).
+    port : int
+        Port to bind; 0 picks a free port (see `server.server_address`). Default is 8000.
+    max_batch_size : int
+        See `MicroBatcher`. Default is 64.
+    max_wait_ms : float
+        See `MicroBatcher`. Default is 5.
+    verbose : bool
+        If True, every request is logged to standard error. Default is False.
+    request_timeout : float
+        Seconds a request waits for its prediction before it is answered with status 503, so
+        clients are not left hanging if scoring stalls. Default is 30.
+
+    Returns:
+    -------
+    http.server.ThreadingHTTPServer
+        The server, not yet serving. Call `serve_forever()`, then `shutdown()` and
+        `server.batcher.close()` to stop it.
+
+    Examples:
+    --------
+    >>> server = make_server(opt_pipe, port=8000)
+    >>> server.serve_forever()
+    """
+    server = ThreadingHTTPServer((host, port), _PredictionHandler)
+    server.daemon_threads = True
+    server.batcher = MicroBatcher(pipe, max_batch_size = max_batch_size, max_wait_ms = max_wait_ms)
+    server.verbose = verbose
+    server.request_timeout = request_timeout
+    return server
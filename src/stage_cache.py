@@ -0,0 +1,210 @@
+import ast
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+
+from dataclasses import dataclass, field
+
+@dataclass
+class Stage:
+    """
+    One step of the analysis pipeline.
+
+    Attributes:
+    ----------
+    name : str
+        Name of the stage (e.g. "classification").
+    cmd : list of str
+        The command that runs the stage. Its arguments (e.g. `--seed=522`) are part of the cache key.
+    inputs : list of str
+        Files or directories the stage reads, including the script itself and parameter files such as
+        `parameter/columns_to_drop.csv`. Their contents are part of the cache key.
+    outputs : list of str
+        Files or directories the stage writes. They are stored in, and restored from, the cache.
+    """
+    name: str
+    cmd: list
+    inputs: list = field(default_factory = list)
+    outputs: list = field(default_factory = list)
+
+def script_inputs(script, root = ".", package = "src"):
+    """
+    Lists a Python script and every module of the project package it imports, directly or not.
+
+    The imports are read from the source with `ast`, including those made inside functions, and
+    followed module by module. Using this list as a stage's inputs means that editing any module
+    the stage really runs, such as src/weather_schema.py behind src/weather_store.py, changes its
+    key, while editing unrelated modules does not.
+
+    Parameters:
+    ----------
+    script : str
+        Path to the script, relative to `root` (e.g. "scripts/eda.py").
+    root : str
+        The project root, holding the package directory. Default is the current directory.
+    package : str
+        Name of the project package. Default is "src".
+
+    Returns:
+    -------
+    list of str
+        The script followed by the imported module files, sorted, as paths relative to `root`.
+
+    Examples:
+    --------
+    >>> script_inputs("scripts/eda.py")
+    ['scripts/eda.py', 'src/eda_figures.py', 'src/instrumentation.py', 'src/weather_schema.py', ...]
+    """
+    seen = set()
+    pending = [script]
+    modules = []
+    while pending:
+        path = pending.pop()
+        with open(os.path.join(root, path)) as f:
+            tree = ast.parse(f.read(), filename = path)
+        for name in _imported_names(tree):
+            parts = name.split(".")
+            if parts[0] != package:
+                continue
+            # "src.x", "from src import x" and packages all map to a file below the package directory
+            for candidate in ("/".join(parts) + ".py", "/".join(parts) + "/__init__.py"):
+                if os.path.exists(os.path.join(root, candidate)) and candidate not in seen:
+                    seen.add(candidate)
+                    modules.append(candidate)
+                    pending.append(candidate)
+    return [script] + sorted(modules)
+
+def stage_key(stage):
+    """
+    Computes the content-addressed cache key of a stage.
+
+    The key is a SHA-256 digest over the command line and the contents of every input, so it
+    changes whenever the script, its parameters or the data it reads change, and does not change
+    when files are merely touched or rebuilt byte-for-byte identical.
+
+    Parameters:
+    ----------
+    stage : Stage
+        The stage to compute the key for.
+
+    Returns:
+    -------
+    str
+        The hexadecimal digest.
+
+    Examples:
+    --------
+    >>> stage_key(Stage("eda", ["python", "scripts/eda.py"], inputs=["scripts/eda.py"]))
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(stage.cmd).encode())
+    for path in sorted(stage.inputs):
+        digest.update(path.encode())
+        digest.update(_hash_path(path).encode())
+    return digest.hexdigest()
+
+def run_stage(stage, cache_dir = ".stage_cache", force = False):
+    """
+    Runs a stage unless an identical run is already in the content-addressed cache.
+
+    On a cache hit the stage is skipped and any of its outputs that are missing or differ from the
+    cached copy are restored from the cache. On a miss the command is run and its outputs are copied
+    into the cache under the stage key.
+
+    Parameters:
+    ----------
+    stage : Stage
+        The stage to run.
+    cache_dir : str
+        Directory holding the cache entries. ".stage_cache" by default.
+    force : bool
+        If True, the command is run even if the cache holds an entry for it. False by default.
+
+    Returns:
+    -------
+    str
+        "cached" if the stage was skipped, "ran" if the command was run.
+
+    Examples:
+    --------
+    >>> run_stage(Stage("eda", ["python", "scripts/eda.py", ...], inputs=[...], outputs=[...]))
+    'cached'
+    """
+    missing = [path for path in stage.inputs if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(f"Stage {stage.name!r} is missing inputs: {missing}")
+
+    key = stage_key(stage)
+    entry = os.path.join(cache_dir, key)
+    manifest_path = os.path.join(entry, "manifest.json")
+
+    if not force and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        for i, (output, digest) in enumerate(manifest["outputs"].items()):
+            if not os.path.exists(output) or _hash_path(output) != digest:
+                _copy(os.path.join(entry, "outputs", str(i)), output)
+        return "cached"
+
+    subprocess.run(stage.cmd, check = True)
+
+    missing = [path for path in stage.outputs if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(f"Stage {stage.name!r} did not write outputs: {missing}")
+
+    # Write into a temporary entry first so an interrupted copy never looks like a cache hit
+    tmp_entry = entry + ".tmp"
+    shutil.rmtree(tmp_entry, ignore_errors = True)
+    os.makedirs(tmp_entry)
+    for i, output in enumerate(stage.outputs):
+        _copy(output, os.path.join(tmp_entry, "outputs", str(i)))
+    with open(os.path.join(tmp_entry, "manifest.json"), "w") as f:
+        json.dump({"stage": stage.name,
+                   "cmd": stage.cmd,
+                   "outputs": {output: _hash_path(output) for output in stage.outputs}}, f, indent = 2)
+    shutil.rmtree(entry, ignore_errors = True)
+    os.replace(tmp_entry, entry)
+    return "ran"
+
+def _imported_names(tree):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            yield from (alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            yield node.module
+            yield from (f"{node.module}.{alias.name}" for alias in node.names)
+
+def _hash_path(path):
+    """
+    Hashes the contents of a file, or of every file below a directory.
+    """
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                digest.update(_hash_file(file_path).encode())
+    else:
+        digest.update(_hash_file(path).encode())
+    return digest.hexdigest()
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _copy(src, dst):
+    parent = os.path.dirname(dst)
+    if parent != '':
+        os.makedirs(parent, exist_ok = True)
+    if os.path.isdir(src):
+        shutil.rmtree(dst, ignore_errors = True)
+        shutil.copytree(src, dst)
+    else:
+        shutil.copy2(src, dst)
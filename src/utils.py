@@ -1,19 +1,36 @@
 import numpy as np
-import pandas as pd
-from datetime import datetime as dt
-from sklearn.dummy import DummyClassifier
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.pipeline import Pipeline, make_pipeline
-from sklearn.preprocessing import StandardScaler
-from sklearn.svm import SVC
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split, cross_val_score, cross_validate, GridSearchCV
-
-def cross_val_model(preprocessor, models, X_train, y_train, classification_metrics):
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+from src.instrumentation import traced
+
+# pandas, sklearn and joblib are imported inside the functions using them, so that scripts can
+# import the constants below (for their command-line options) and `encode` without paying for them
+
+SEARCH_MODES = ["grid", "halving"]
+SVM_ENGINES = ["exact", "approx"]
+
+# Period of every cyclical feature, encoded by `CyclicalEncoder` inside the preprocessor
+CYCLICAL_PERIODS = {"month": 12, "day_of_year": 365.25, "wind_direction_10m_dominant": 360}
+
+# C only for the exhaustive grid; a joint C/gamma space ten times larger for successive halving
+SVC_PARAM_GRID = {"C": 10.0**np.arange(-3, 3)}
+SVC_HALVING_PARAM_GRID = {"C": 10.0**np.arange(-3, 3.5, 0.5),
+                          "gamma": 10.0**np.arange(-4, 1.5, 0.5)}
+
+@traced(rows_arg="X_train")
+def cross_val_model(preprocessor, models, X_train, y_train, classification_metrics, n_jobs=None, cv=None,
+                    memory=None):
     """
     Perform cross-validation for multiple machine learning models.
 
+    Every (model, fold) pair is an independent fit, so the whole grid is spread over a pool
+    of `n_jobs` worker processes rather than fitting one model's folds after another.
+    With `memory`, the preprocessor is fitted and applied once per fold and the result is
+    reused by every model.
+
     Parameters:
     -----------
     preprocessor : Pipeline
@@ -28,6 +45,15 @@ def cross_val_model(preprocessor, models, X_train, y_train, classification_metri
     classification_metrics : list or str
         The evaluation metric(s) for the cross-validation.
         Can be a single metric or a list of metrics.
+    n_jobs : int, optional
+        The number of worker processes fitting (model, fold) pairs in parallel.
+        None means 1, -1 means all processors. Default is None.
+    cv : int, cross-validation generator or iterable, optional
+        The cross-validation splitting strategy, as accepted by `cross_validate`.
+        Default is None, i.e. 5-fold stratified cross-validation.
+    memory : str or joblib.Memory, optional
+        Cache for the fitted preprocessor, passed to the pipelines (see `transform_cache`).
+        Default is None, i.e. the preprocessor is refitted for every model.
 
     Returns:
     --------
@@ -41,7 +67,7 @@ def cross_val_model(preprocessor, models, X_train, y_train, classification_metri
     >>> models = {'RandomForest': RandomForestClassifier(), 'LogisticRegression': LogisticRegression()}
     >>> preprocess = StandardScaler()
     >>> metrics = ['accuracy', 'precision']
-    >>> results = cross_val_model(preprocess, models, X_train, y_train, metrics)
+    >>> results = cross_val_model(preprocess, models, X_train, y_train, metrics, n_jobs=-1)
     >>> print(results)
                         RandomForest  LogisticRegression
     fit_time_mean            0.123             0.045
@@ -53,20 +79,306 @@ def cross_val_model(preprocessor, models, X_train, y_train, classification_metri
     ...
     """
 
+    import pandas as pd
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import check_cv, cross_validate
+    from sklearn.pipeline import make_pipeline
+
+    folds = list(check_cv(cv, y_train, classifier=True).split(X_train, y_train))
+    tasks = [(model, fold) for model in models for fold in folds]
+
+    fold_scores = Parallel(n_jobs=n_jobs)(
+        delayed(cross_validate)(make_pipeline(preprocessor, models[model], memory=memory),
+                                X_train,
+                                y_train,
+                                cv=[fold],
+                                return_train_score=True,
+                                scoring=classification_metrics)
+        for model, fold in tasks)
+
     cross_val_results = {}
-    for model in models:
-        pipe = make_pipeline(preprocessor, models[model])
-        cross_val_results[model] = pd.DataFrame(cross_validate(pipe, 
-                                       X_train, 
-                                       y_train, 
-                                       return_train_score=True, 
-                                       scoring=classification_metrics)).agg(['mean']).round(3).T
+    for i, model in enumerate(models):
+        scores = fold_scores[i * len(folds):(i + 1) * len(folds)]
+        cross_val_results[model] = pd.DataFrame({key: np.concatenate([score[key] for score in scores])
+                                                 for key in scores[0]}).agg(['mean']).round(3).T
         print("Done with", model)
 
     results_df = pd.concat(cross_val_results, axis='columns')
 
     return results_df
     
+@contextmanager
+def transform_cache(location=None, bytes_limit="1G"):
+    """
+    Provide a disk cache for fitted preprocessing steps shared by several pipelines.
+
+    Pass the yielded object as `memory` to `make_pipeline`, `cross_val_model` or the pipeline
+    given to `GridSearchCV`: pipelines wrapping the same preprocessor then fit and transform
+    each fold once, and every estimator (and every hyperparameter candidate) reuses the result.
+    The cache is keyed by the preprocessor's parameters and the fold's data, so it is safe to
+    share across models, folds and worker processes.
+
+    Parameters:
+    ----------
+    location : str, optional
+        Directory holding the cache. If None (default), a temporary directory is used and
+        removed when the context exits.
+    bytes_limit : int or str
+        Size the cache is trimmed to when the context exits, evicting the least recently used
+        entries first (e.g. "500M"). Only applies to a persistent `location`. Default is "1G".
+
+    Yields:
+    ------
+    joblib.Memory
+        The cache to pass as `memory`.
+
+    Examples:
+    --------
+    >>> with transform_cache() as memory:
+    ...     results = cross_val_model(preprocess, models, X_train, y_train, metrics, memory=memory)
+    """
+    from joblib import Memory
+
+    tmp_dir = None
+    if location is None:
+        tmp_dir = location = tempfile.mkdtemp(prefix="raincouver-transforms-")
+    memory = Memory(location=location, verbose=0)
+    try:
+        yield memory
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        else:
+            memory.reduce_size(bytes_limit=bytes_limit)
+
+def make_svc_search(pipe, search="grid", n_jobs=None, random_state=None, cv=None):
+    """
+    Build the hyperparameter search for an RBF SVM pipeline.
+
+    "grid" is the exhaustive `GridSearchCV` over C on the whole training set.
+    "halving" runs successive halving over the number of training samples on the joint C/gamma
+    space: every candidate is first cross-validated on a small subsample, and only the best third
+    goes on to three times as many samples, so the 143 candidates cost about as much as a full
+    grid over a handful of them. Both searches refit the best candidate on the whole training set,
+    so `best_estimator_` is the final pipeline.
+
+    Parameters:
+    ----------
+    pipe : sklearn.pipeline.Pipeline
+        Pipeline whose final step is an RBF SVM taking `C` and `gamma`, i.e. an `SVC` or a
+        `NystroemSVC`. The parameter names are prefixed with that step's name.
+    search : str
+        One of "grid" (default) or "halving".
+    n_jobs : int, optional
+        The number of worker processes fitting candidates in parallel. Default is None.
+    random_state : int, optional
+        Seed for the subsamples drawn by successive halving. Default is None.
+    cv : int, cross-validation generator or iterable, optional
+        The cross-validation splitting strategy, e.g. a `WalkForwardSplit`. Default is None,
+        i.e. 5-fold stratified cross-validation.
+
+    Returns:
+    -------
+    GridSearchCV or HalvingGridSearchCV
+        The unfitted search.
+
+    Examples:
+    --------
+    >>> search = make_svc_search(make_pipeline(preprocess, SVC()), search="halving", n_jobs=-1)
+    >>> search.fit(X_train, y_train)
+    >>> opt_pipe = search.best_estimator_
+    """
+    from sklearn.experimental import enable_halving_search_cv
+    from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV
+
+    step = pipe.steps[-1][0]
+    if search == "grid":
+        param_grid = {f"{step}__{name}": values for name, values in SVC_PARAM_GRID.items()}
+        return GridSearchCV(pipe, param_grid=param_grid, cv=cv, n_jobs=n_jobs, return_train_score=True)
+    if search == "halving":
+        param_grid = {f"{step}__{name}": values for name, values in SVC_HALVING_PARAM_GRID.items()}
+        return HalvingGridSearchCV(pipe, param_grid=param_grid, factor=3, cv=cv,
+                                   resource="n_samples", n_jobs=n_jobs, return_train_score=True,
+                                   random_state=random_state)
+    raise ValueError(f"search must be one of {SEARCH_MODES}, got {search!r}")
+
+class WalkForwardSplit:
+    """
+    Walk-forward cross-validation over calendar periods of a date column.
+
+    Rows are grouped into periods (years by default). Fold k tests on period k and trains on
+    the periods before it: all of them (expanding window), or only the last `max_train_periods`
+    (sliding window). Unlike k-fold, no fold ever trains on days that come after the days it is
+    tested on. It can be passed as `cv` wherever sklearn accepts a splitter, e.g. to
+    `cross_val_model`, `mean_std_cross_val_scores` or `GridSearchCV`.
+
+    Parameters:
+    ----------
+    dates : array-like of datetime
+        Date of every row of the data that will be split, in the same order.
+    freq : str
+        Pandas period alias of the test periods, e.g. "Y" (default), "Q" or "M".
+    min_train_periods : int
+        Number of periods in the first training window. Default is 5.
+    max_train_periods : int, optional
+        If set, the training window slides and keeps only this many periods. Default is None
+        (expanding window).
+    gap : int
+        Number of periods left out between the training window and the test period. Default is 0.
+
+    Examples:
+    --------
+    >>> cv = WalkForwardSplit(dates_train['date'], freq="Y", min_train_periods=5)
+    >>> cross_val_model(preprocess, models, X_train, y_train, metrics, cv=cv)
+    """
+    def __init__(self, dates, freq="Y", min_train_periods=5, max_train_periods=None, gap=0):
+        self.dates = dates
+        self.freq = freq
+        self.min_train_periods = min_train_periods
+        self.max_train_periods = max_train_periods
+        self.gap = gap
+
+    def _period_codes(self):
+        import pandas as pd
+
+        periods = pd.PeriodIndex(pd.to_datetime(np.asarray(self.dates)), freq=self.freq)
+        codes, uniques = pd.factorize(periods, sort=True)
+        return codes, uniques
+
+    def get_n_splits(self, X=None, y=None, groups=None):
+        return max(len(self._period_codes()[1]) - self.min_train_periods - self.gap, 0)
+
+    def split(self, X=None, y=None, groups=None):
+        """
+        Yields the (train, test) row positions of every fold, oldest test period first.
+        """
+        codes, uniques = self._period_codes()
+        if X is not None and len(X) != len(codes):
+            raise ValueError(f"dates has {len(codes)} entries but X has {len(X)} rows")
+        for k in range(self.min_train_periods + self.gap, len(uniques)):
+            train_end = k - self.gap
+            train_start = 0 if self.max_train_periods is None else max(train_end - self.max_train_periods, 0)
+            yield (np.flatnonzero((codes >= train_start) & (codes < train_end)),
+                   np.flatnonzero(codes == k))
+
+@traced(rows_arg="X")
+def walk_forward_validate(estimator, X, y, dates, scoring, freq="Y", min_train_periods=5,
+                          max_train_periods=None, incremental=True, n_jobs=None):
+    """
+    Evaluate an estimator with walk-forward cross-validation, refitting incrementally if possible.
+
+    With an expanding window each training set is the previous one plus one period. Estimators
+    with `partial_fit` (and pipelines whose every step has it, e.g. a `StandardScaler` followed by
+    an `SGDClassifier`) are therefore updated with the newest period only, in date order, instead of
+    being refitted on all the history for every fold: the total training cost over all folds is
+    that of a single pass over the data. Other estimators are refitted from scratch per fold, with
+    the folds spread over `n_jobs` worker processes.
+
+    None of the pipelines classification.py compares qualifies: `CyclicalEncoder`, the column
+    transformer and the candidate models have no `partial_fit`, so its `--cv=walk-forward` uses
+    `WalkForwardSplit` with `cross_val_model` and the search instead. This function is for
+    evaluating incremental models such as the `SGDClassifier` pipeline below.
+
+    Parameters:
+    ----------
+    estimator : estimator object
+        The classifier or pipeline to evaluate. It is cloned, not modified.
+    X : pandas.DataFrame or array-like
+        The features.
+    y : pandas.Series or array-like
+        The target.
+    dates : array-like of datetime
+        Date of every row of `X`.
+    scoring : str or list of str
+        Names of sklearn scorers, e.g. ["accuracy", "f1"].
+    freq, min_train_periods, max_train_periods :
+        Fold layout, see `WalkForwardSplit`.
+    incremental : bool
+        If True (default), estimators supporting `partial_fit` are updated fold to fold. Only
+        applies to expanding windows, since a sliding window would have to forget old periods.
+    n_jobs : int, optional
+        The number of worker processes refitting folds in parallel. Default is None.
+
+    Returns:
+    --------
+    pandas.DataFrame
+        One row per fold with the test period, the training and test sizes, the fit time and a
+        "test_<metric>" column per scorer.
+
+    Example:
+    --------
+    >>> pipe = make_pipeline(StandardScaler(), SGDClassifier(random_state=522))
+    >>> folds = walk_forward_validate(pipe, X_train, y_train, dates_train['date'], ["accuracy", "f1"])
+    >>> folds[["test_accuracy", "test_f1"]].mean()
+    """
+    import pandas as pd
+    from joblib import Parallel, delayed
+    from sklearn.base import clone
+    from sklearn.metrics import get_scorer
+
+    scoring = [scoring] if isinstance(scoring, str) else list(scoring)
+    scorers = {name: get_scorer(name) for name in scoring}
+    cv = WalkForwardSplit(dates, freq=freq, min_train_periods=min_train_periods,
+                          max_train_periods=max_train_periods)
+    codes, periods = cv._period_codes()
+    folds = list(cv.split(X, y))
+
+    if incremental and max_train_periods is None and _supports_partial_fit(estimator):
+        model = clone(estimator)
+        classes = np.unique(y)
+        seen = np.zeros(len(codes), dtype=bool)
+        fold_scores = []
+        for train, test in folds:
+            new = train[~seen[train]]
+            new = new[np.argsort(codes[new], kind="stable")]
+            start = time.perf_counter()
+            _partial_fit(model, _take(X, new), _take(y, new), classes)
+            fit_time = time.perf_counter() - start
+            seen[new] = True
+            fold_scores.append(_score_fold(model, X, y, test, scorers, fit_time))
+    else:
+        fold_scores = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_and_score_fold)(clone(estimator), X, y, train, test, scorers)
+            for train, test in folds)
+
+    results = pd.DataFrame(fold_scores)
+    results.insert(0, "test_period", [str(periods[codes[test[0]]]) for _, test in folds])
+    results.insert(1, "n_train", [len(train) for train, _ in folds])
+    results.insert(2, "n_test", [len(test) for _, test in folds])
+    return results
+
+def _supports_partial_fit(estimator):
+    from sklearn.pipeline import Pipeline
+
+    steps = [step for _, step in estimator.steps] if isinstance(estimator, Pipeline) else [estimator]
+    return all(step == "passthrough" or step is None or hasattr(step, "partial_fit") for step in steps)
+
+def _partial_fit(estimator, X, y, classes):
+    from sklearn.pipeline import Pipeline
+
+    if isinstance(estimator, Pipeline):
+        for _, step in estimator.steps[:-1]:
+            if step == "passthrough" or step is None:
+                continue
+            X = step.partial_fit(X, y).transform(X)
+        estimator = estimator.steps[-1][1]
+    estimator.partial_fit(X, y, classes=classes)
+
+def _fit_and_score_fold(estimator, X, y, train, test, scorers):
+    start = time.perf_counter()
+    estimator.fit(_take(X, train), _take(y, train))
+    return _score_fold(estimator, X, y, test, scorers, time.perf_counter() - start)
+
+def _score_fold(estimator, X, y, test, scorers, fit_time):
+    X_test, y_test = _take(X, test), _take(y, test)
+    scores = {"fit_time": fit_time}
+    scores.update({f"test_{name}": scorer(estimator, X_test, y_test) for name, scorer in scorers.items()})
+    return scores
+
+def _take(data, idx):
+    # Rows by position, from a DataFrame or Series as from an array
+    return data.iloc[idx] if hasattr(data, "iloc") else np.asarray(data)[idx]
+
 def mean_std_cross_val_scores(model, X_train, y_train, **kwargs):
     """
     Calculate and return the mean and standard deviation of cross-validation scores.
@@ -102,6 +414,9 @@ def mean_std_cross_val_scores(model, X_train, y_train, **kwargs):
     >>> model = RandomForestClassifier(random_state=42)
     >>> mean_std_cross_val_scores(model, X, y, cv=5)
     """
+    import pandas as pd
+    from sklearn.model_selection import cross_validate
+
     scores = cross_validate(model, X_train, y_train, **kwargs)
 
     mean_scores = pd.DataFrame(scores).mean()
@@ -158,6 +473,15 @@ def encode(data, col, max_val):
     if max_val <= 0:
         raise ValueError("max_val must be positive")
 
-    data[col + '_sin'] = np.sin(2 * np.pi * data[col]/max_val)
-    data[col + '_cos'] = np.cos(2 * np.pi * data[col]/max_val)
-    return data
\ No newline at end of file
+    angle = 2 * np.pi / max_val * data[col]
+    data[col + '_sin'] = np.sin(angle)
+    data[col + '_cos'] = np.cos(angle)
+    return data
+
+def __getattr__(name):
+    # `CyclicalEncoder` moved to src/cyclical.py so that importing this module does not load
+    # sklearn; old imports and models pickled as `src.utils.CyclicalEncoder` still resolve here
+    if name == "CyclicalEncoder":
+        from src.cyclical import CyclicalEncoder
+        return CyclicalEncoder
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
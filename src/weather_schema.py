@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+# WMO weather interpretation codes (code table 4677) run from 0 to 99; a fixed category list keeps
+# the dtype identical across windows, stations and files so concatenating frames stays categorical
+WEATHER_CODE_DTYPE = pd.CategoricalDtype(np.arange(100, dtype = np.int16))
+SUN_TIME_DTYPE = "datetime64[ns]"
+
+# Compact dtype of every daily Open-Meteo variable; measurements are sent as float32 by the API anyway
+WEATHER_SCHEMA = {"date": "datetime64[ns]",
+                  "weather_code": WEATHER_CODE_DTYPE,
+                  "temperature_2m_max": "float32",
+                  "temperature_2m_min": "float32",
+                  "temperature_2m_mean": "float32",
+                  "apparent_temperature_max": "float32",
+                  "apparent_temperature_min": "float32",
+                  "apparent_temperature_mean": "float32",
+                  "sunrise": SUN_TIME_DTYPE,
+                  "sunset": SUN_TIME_DTYPE,
+                  "precipitation_sum": "float32",
+                  "rain_sum": "float32",
+                  "snowfall_sum": "float32",
+                  "precipitation_hours": "float32",
+                  "wind_speed_10m_max": "float32",
+                  "wind_gusts_10m_max": "float32",
+                  "wind_direction_10m_dominant": "float32",
+                  "shortwave_radiation_sum": "float32",
+                  "et0_fao_evapotranspiration": "float32"}
+
+def apply_weather_schema(df, schema = WEATHER_SCHEMA):
+    """
+    Downcasts the columns of a weather frame to the compact dtypes of a schema.
+
+    With the default schema the measurements become float32, `weather_code` a categorical over the
+    WMO codes 0-99 (stored as one byte per row), and `date` and `sunrise`/`sunset` (UTC) datetime64,
+    whether they arrive as epoch seconds (from the API or the SQLite store) or as date strings
+    (from a CSV export). This halves the memory of the measurements compared to the float64/object
+    columns `pandas.read_csv` produces. Columns that are not in the schema (e.g. `location`) are
+    left as they are, and columns already in the right dtype are not copied.
+
+    Parameters:
+    ----------
+    df : pandas.DataFrame
+        The weather observations, e.g. as returned by `get_vancouver_data` or read from a CSV export.
+    schema : dict
+        Target dtype of each column. Default is `WEATHER_SCHEMA`.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        A new DataFrame with the same columns and index, in the schema's dtypes.
+
+    Examples:
+    --------
+    >>> precipit_df = apply_weather_schema(pd.read_csv("data/van_weather_1990-01-01_2023-11-06.csv"))
+    >>> precipit_df.dtypes["weather_code"]
+    CategoricalDtype(categories=[0, 1, 2, ..., 99], ordered=False, categories_dtype=int16)
+    """
+    columns = {}
+    for col in df.columns:
+        dtype = schema.get(col)
+        if dtype is None or df[col].dtype == dtype:
+            continue
+        if isinstance(dtype, pd.CategoricalDtype):
+            columns[col] = _to_categorical(df[col], dtype)
+        elif pd.api.types.is_datetime64_dtype(dtype):
+            columns[col] = _to_datetime(df[col]).astype(dtype)
+        else:
+            columns[col] = df[col].astype(dtype)
+    return df.assign(**columns) if columns else df.copy(deep = False)
+
+def storage_values(series):
+    """
+    Converts a column in a schema dtype back to float64 values for numeric storage (e.g. SQLite),
+    with sun times as epoch seconds and missing values as NaN.
+
+    Parameters:
+    ----------
+    series : pandas.Series
+        The column to convert.
+
+    Returns:
+    -------
+    numpy.ndarray
+        The values as float64.
+
+    Examples:
+    --------
+    >>> storage_values(precipit_df["sunrise"])
+    array([6.311772e+08, 6.312636e+08, ...])
+    """
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        values = series.to_numpy(dtype = "datetime64[s]").astype(np.int64).astype(np.float64)
+        values[series.isna().to_numpy()] = np.nan
+        return values
+    return series.astype(np.float64).to_numpy()
+
+def _to_categorical(series, dtype):
+    """
+    Maps numeric codes to the categories of `dtype` without a per-value lookup.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(np.float64)
+    values = series.to_numpy(dtype = np.float64)
+    categories = dtype.categories.to_numpy()
+    missing = np.isnan(values)
+    codes = np.searchsorted(categories, values)
+    known = np.zeros(len(values), dtype = bool)
+    in_range = ~missing & (codes < len(categories))
+    known[in_range] = categories[codes[in_range]] == values[in_range]
+    if not np.all(known | missing):
+        raise ValueError(f"Column {series.name!r} holds values outside its categories: "
+                         f"{np.unique(values[~known & ~missing])[:10].tolist()}")
+    codes[missing] = -1
+    return pd.Series(pd.Categorical.from_codes(codes, dtype = dtype), index = series.index, name = series.name)
+
+def _to_datetime(series):
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return pd.to_datetime(series, unit = "s")
+    return pd.to_datetime(series)
@@ -0,0 +1,212 @@
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+
+from contextlib import contextmanager
+
+from src.instrumentation import traced
+from src.weather_schema import apply_weather_schema, storage_values
+
+STORE_TABLE = "daily_weather"
+
+# Columns that are not measurements; a stored day without any other value counts as missing
+_TIME_COLUMNS = ("date", "sunrise", "sunset")
+
+def stored_date_range(store, table = STORE_TABLE):
+    """
+    Returns the first and last dates held in a SQLite weather store.
+
+    Parameters:
+    ----------
+    store : str
+        Path to the SQLite weather store.
+    table : str
+        Name of the table holding the daily observations.
+
+    Returns:
+    -------
+    tuple
+        (first, last) as pandas.Timestamp, or (None, None) if the store does not exist or is empty.
+
+    Examples:
+    --------
+    >>> first, last = stored_date_range("data/van_weather.sqlite")
+    """
+    if not os.path.exists(store):
+        return None, None
+
+    with _connect(store) as con:
+        if not _has_table(con, table):
+            return None, None
+        first, last = con.execute(f'SELECT MIN(date), MAX(date) FROM "{table}"').fetchone()
+
+    if first is None:
+        return None, None
+    return pd.Timestamp(first), pd.Timestamp(last)
+
+@traced(rows_arg = "df")
+def append_to_store(df, store, table = STORE_TABLE):
+    """
+    Appends daily observations to a SQLite weather store keyed by date.
+
+    The table is created on first use with one row per date. Rows whose date is already held are
+    replaced, so appending an overlapping range is safe. Days for which the API returned no values
+    at all (e.g. the last few days before the archive catches up) are stored as empty rows, so the
+    stored dates stay one contiguous block, and `missing_dates` reports them so that the next
+    refresh requests them again.
+
+    Parameters:
+    ----------
+    df : pandas.DataFrame
+        A DatetimeIndex DataFrame as returned by `get_vancouver_data`.
+    store : str
+        Path to the SQLite weather store. Its directory is created if it does not exist.
+    table : str
+        Name of the table holding the daily observations.
+
+    Returns:
+    -------
+    int
+        The number of rows written.
+
+    Examples:
+    --------
+    >>> append_to_store(precipit_df, "data/van_weather.sqlite")
+    """
+    if df.empty:
+        return 0
+
+    store_dir = os.path.dirname(store)
+    if store_dir != '' and not os.path.exists(store_dir):
+        os.makedirs(store_dir)
+
+    columns = df.columns.tolist()
+    quoted = ", ".join(f'"{col}"' for col in columns)
+    rows = zip(df.index.strftime('%Y-%m-%d'), *(storage_values(df[col]).tolist() for col in columns))
+
+    with _connect(store) as con:
+        if not _has_table(con, table):
+            col_defs = ", ".join(f'"{col}" REAL' for col in columns)
+            con.execute(f'CREATE TABLE "{table}" (date TEXT PRIMARY KEY, {col_defs})')
+        con.executemany(f'INSERT OR REPLACE INTO "{table}" (date, {quoted}) '
+                        f'VALUES ({", ".join("?" * (len(columns) + 1))})', rows)
+
+    return len(df)
+
+def missing_dates(store, start_date, end_date, table = STORE_TABLE):
+    """
+    Lists the days a refresh of the store has to fetch to cover a date range.
+
+    A requested day is missing if it is not stored, or if it is stored without any measurement
+    (see `append_to_store`), wherever it falls: before, inside or after the stored dates. Days
+    between the requested range and the stored dates are missing too if they are not stored, so
+    that fetching the missing days keeps the store one contiguous block.
+
+    Parameters:
+    ----------
+    store : str
+        Path to the SQLite weather store.
+    start_date, end_date : str
+        First and last dates requested, in YYYY-MM-DD format.
+    table : str
+        Name of the table holding the daily observations.
+
+    Returns:
+    -------
+    pandas.DatetimeIndex
+        The missing days, in date order.
+
+    Examples:
+    --------
+    >>> missing_dates("data/van_weather.sqlite", "1990-01-01", "2023-11-06")
+    DatetimeIndex(['2023-11-01', '2023-11-02', ...], dtype='datetime64[ns]', freq=None)
+    """
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    first, last = stored_date_range(store, table)
+    if first is None:
+        return pd.date_range(start, end, freq = "D")
+
+    with _connect(store) as con:
+        columns = [row[1] for row in con.execute(f'PRAGMA table_info("{table}")')
+                   if row[1] not in _TIME_COLUMNS]
+        measured = " OR ".join(f'"{col}" IS NOT NULL' for col in columns) or "1"
+        stored = con.execute(f'SELECT date, {measured} FROM "{table}"').fetchall()
+    dates = pd.to_datetime([date for date, _ in stored])
+    has_values = np.array([bool(value) for _, value in stored], dtype = bool)
+
+    requested = pd.date_range(start, end, freq = "D")
+    span = pd.date_range(min(start, first), max(end, last), freq = "D")
+    return span.difference(dates).union(requested.difference(dates[has_values]))
+
+@traced()
+def read_store(store, start_date = None, end_date = None, table = STORE_TABLE):
+    """
+    Reads daily observations from a SQLite weather store.
+
+    Parameters:
+    ----------
+    store : str
+        Path to the SQLite weather store.
+    start_date : str, optional
+        First date to read in YYYY-MM-DD format. Reads from the first stored date by default.
+    end_date : str, optional
+        Last date to read in YYYY-MM-DD format. Reads up to the last stored date by default.
+    table : str
+        Name of the table holding the daily observations.
+
+    Returns:
+    -------
+    pandas.DataFrame
+        A DatetimeIndex DataFrame, in date order, in the same layout and dtypes `get_vancouver_data` returns.
+
+    Examples:
+    --------
+    >>> precipit_df = read_store("data/van_weather.sqlite", "2000-01-01", "2009-12-31")
+    """
+    query = f'SELECT * FROM "{table}" WHERE date >= ? AND date <= ? ORDER BY date'
+    with _connect(store) as con:
+        df = pd.read_sql_query(query, con,
+                               params = (start_date or "0000-00-00", end_date or "9999-99-99"),
+                               parse_dates = ['date'],
+                               index_col = 'date')
+    return apply_weather_schema(df)
+
+@traced()
+def load_weather_frame(path):
+    """
+    Reads a raw weather dataset from either a CSV export or a SQLite weather store.
+
+    Parameters:
+    ----------
+    path : str
+        Path to a CSV file written by `get_vancouver_data`, or to a SQLite weather store
+        (".sqlite" or ".db").
+
+    Returns:
+    -------
+    pandas.DataFrame
+        The observations with the dates in a 'date' column, as `pandas.read_csv` returns them,
+        downcast to the compact dtypes of `src.weather_schema.WEATHER_SCHEMA`.
+
+    Examples:
+    --------
+    >>> precipit_df = load_weather_frame("data/van_weather.sqlite")
+    """
+    if path.endswith(('.sqlite', '.db')):
+        return read_store(path).reset_index()
+    return apply_weather_schema(pd.read_csv(path))
+
+@contextmanager
+def _connect(store):
+    # sqlite3's own context manager only commits, so close the connection here as well
+    con = sqlite3.connect(store)
+    try:
+        with con:
+            yield con
+    finally:
+        con.close()
+
+def _has_table(con, table):
+    return con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                       (table,)).fetchone() is not None
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+import sys
+import os
+from sklearn.datasets import make_moons
+from sklearn.metrics import f1_score
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+# Import the approximate SVM from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.approx_svm import NystroemSVC, make_rbf_svm
+from src.utils import make_svc_search
+
+X, y = make_moons(n_samples=2000, noise=0.25, random_state=42)
+X_train, X_test, y_train, y_test = X[:1500], X[1500:], y[:1500], y[1500:]
+
+# Test that the approximation reaches about the same F1 as the exact SVC on a nonlinear problem
+def test_f1_close_to_exact():
+    exact = make_pipeline(StandardScaler(), SVC()).fit(X_train, y_train)
+    approx = make_pipeline(StandardScaler(), NystroemSVC(n_components=200, random_state=0)).fit(X_train, y_train)
+    exact_f1 = f1_score(y_test, exact.predict(X_test))
+    approx_f1 = f1_score(y_test, approx.predict(X_test))
+    assert approx_f1 > 0.9 and approx_f1 == pytest.approx(exact_f1, abs=0.02)
+
+# Test that predictions follow the sign of the decision function
+def test_predict_matches_decision_function():
+    model = NystroemSVC(random_state=0).fit(X_train, y_train)
+    np.testing.assert_array_equal(model.predict(X_test), model.classes_[(model.decision_function(X_test) > 0).astype(int)])
+
+# Test that "scale" uses the same gamma as SVC and that the search can tune it
+def test_gamma_and_search():
+    model = NystroemSVC(n_components=50).fit(X_train, y_train)
+    assert model.feature_map_.gamma == pytest.approx(1 / (X_train.shape[1] * X_train.var()))
+    search = make_svc_search(make_pipeline(StandardScaler(), NystroemSVC(n_components=50, random_state=0)))
+    search.fit(X_train, y_train)
+    assert "nystroemsvc__C" in search.best_params_
+
+# Test for error handling with an unknown engine
+def test_unknown_engine():
+    assert isinstance(make_rbf_svm("exact"), SVC)
+    with pytest.raises(ValueError):
+        make_rbf_svm("gpu")
@@ -0,0 +1,64 @@
+import json
+import os
+import pandas as pd
+import pytest
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.benchmark import (BENCHMARKS, DAYS_PER_LOCATION, Benchmark, compare_results, model_frame,
+                           run_benchmarks, synthetic_weather, write_results)
+from src.get_api import RETRIEVE_COLS
+
+# Test that synthetic frames have the requested rows, the raw columns and are deterministic
+def test_synthetic_weather_shape():
+    weather = synthetic_weather(DAYS_PER_LOCATION + 5)
+    assert weather.shape == (DAYS_PER_LOCATION + 5, 1 + len(RETRIEVE_COLS))
+    assert weather.columns.tolist() == ["date"] + RETRIEVE_COLS
+    assert weather["date"].iloc[0] == pd.Timestamp("1990-01-01")
+    assert weather["date"].iloc[DAYS_PER_LOCATION] == pd.Timestamp("1990-01-01")
+    assert weather.equals(synthetic_weather(DAYS_PER_LOCATION + 5))
+
+# Test that the model frame has both classes of the target
+def test_model_frame():
+    X, y = model_frame(synthetic_weather(365))
+    assert len(X) == len(y) == 365
+    assert 0.2 < y.mean() < 0.8
+
+# Test that benchmarks are timed per size, and skipped above their largest size
+def test_run_benchmarks_sizes():
+    calls = []
+    benchmarks = [Benchmark("small", lambda n_rows, tmp_dir: n_rows, calls.append, max_rows=10),
+                  Benchmark("any", lambda n_rows, tmp_dir: n_rows, calls.append)]
+    results = run_benchmarks(benchmarks, sizes=[10, 20], repeat=2, log=None)
+    assert [(record["name"], record["rows"]) for record in results["results"]] == [("small", 10), ("any", 10), ("any", 20)]
+    assert calls == [10, 10, 10, 10, 20, 20]
+    assert all(len(record["times"]) == 2 for record in results["results"])
+    assert "sklearn_version" in results
+
+# Test the pipeline benchmarks on a small size
+def test_run_benchmarks_pipeline():
+    names = ["decode_daily", "encode", "drop_split_preprocess", "preprocessor_fit_transform", "pipeline_predict"]
+    results = run_benchmarks(sizes=[400], repeat=1, names=names, log=None)
+    assert [record["name"] for record in results["results"]] == [b.name for b in BENCHMARKS if b.name in names]
+    with pytest.raises(ValueError):
+        run_benchmarks(sizes=[400], names=["no_such_benchmark"], log=None)
+
+# Test that the script start-up benchmark runs once, at the smallest size
+def test_run_benchmarks_script_help():
+    results = run_benchmarks(sizes=[400, 100_000], repeat=1, names=["script_help"], log=None)
+    assert [(record["name"], record["rows"]) for record in results["results"]] == [("script_help", 400)]
+
+# Test that slower medians are flagged as regressions and results are written per commit
+def test_compare_and_write_results(tmp_path):
+    baseline = {"commit": "a", "results": [{"name": "encode", "rows": 10, "median": 1.0},
+                                           {"name": "decode_daily", "rows": 10, "median": 1.0}]}
+    current = {"commit": "b", "results": [{"name": "encode", "rows": 10, "median": 1.5},
+                                          {"name": "decode_daily", "rows": 10, "median": 1.1},
+                                          {"name": "encode", "rows": 20, "median": 3.0}]}
+    comparison = compare_results(baseline, current, threshold=0.2)
+    assert comparison.set_index("name")["regression"].to_dict() == {"encode": True, "decode_daily": False}
+
+    path = write_results(current, str(tmp_path))
+    assert os.path.basename(path) == "b.json"
+    with open(path) as f:
+        assert json.load(f) == current
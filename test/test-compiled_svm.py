@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+from sklearn import config_context
+from sklearn.compose import make_column_transformer, make_column_selector
+from sklearn.datasets import make_classification
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+# Import the compiled predictor from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.approx_svm import NystroemSVC
+from src.compiled_svm import export_svm, load_compiled_svm
+from src.cyclical import CyclicalEncoder
+
+X, y = make_classification(n_samples=300, n_features=5, random_state=42)
+X = pd.DataFrame(X[:, :3], columns=['temperature_2m_mean', 'wind_speed_10m_max', 'shortwave_radiation_sum'])
+X['month'] = np.arange(len(X)) % 12 + 1
+X['wind_direction_10m_dominant'] = np.arange(len(X)) * 7 % 360
+y = y.astype(bool)
+
+# Same preprocessor as drop_split_preprocess.py
+def make_preprocessor():
+    return make_pipeline(CyclicalEncoder(),
+                         make_column_transformer((StandardScaler(), make_column_selector(dtype_include='number')),
+                                                 remainder='passthrough', verbose_feature_names_out=False))
+
+# Test that the compiled predictor gives the same decisions as the pipeline, for both SVM engines
+@pytest.mark.parametrize("model", [SVC(C=10.0, random_state=522), NystroemSVC(n_components=50, random_state=522)])
+def test_identical_decisions(tmp_path, model):
+    with config_context(transform_output="pandas"):
+        pipe = make_pipeline(make_preprocessor(), model).fit(X, y)
+        expected_scores = pipe.decision_function(X)
+        expected = pipe.predict(X)
+    export_svm(pipe, str(tmp_path / "svm.npz"))
+    compiled = load_compiled_svm(str(tmp_path / "svm.npz"))
+    np.testing.assert_allclose(compiled.decision_function(X), expected_scores, atol=1e-9)
+    np.testing.assert_array_equal(compiled.predict(X), expected)
+    assert compiled.predict(X.iloc[7].to_dict())[0] == expected[7]
+
+# Test that single records and reordered columns are accepted
+def test_record_and_column_order(tmp_path):
+    pipe = make_pipeline(StandardScaler(), SVC()).fit(X, y)
+    compiled = export_svm(pipe, str(tmp_path / "svm.npz"))
+    record = X.iloc[0].to_dict()
+    assert compiled.predict(record)[0] == pipe.predict(X.head(1))[0]
+    np.testing.assert_allclose(compiled.decision_function(X[X.columns[::-1]]), pipe.decision_function(X))
+
+# Test that scalers which do not center or do not scale are exported as such
+@pytest.mark.parametrize("scaler", [StandardScaler(with_mean=False), StandardScaler(with_std=False),
+                                    StandardScaler(with_mean=False, with_std=False)])
+def test_scaler_options(tmp_path, scaler):
+    pipe = make_pipeline(scaler, SVC(C=10.0)).fit(X, y)
+    compiled = export_svm(pipe, str(tmp_path / "svm.npz"))
+    np.testing.assert_allclose(compiled.decision_function(X), pipe.decision_function(X), atol=1e-9)
+
+# Test for error handling with pipelines that cannot be exported
+def test_unsupported_pipelines(tmp_path):
+    with pytest.raises(ValueError):
+        export_svm(make_pipeline(StandardScaler(), LogisticRegression()).fit(X, y), str(tmp_path / "svm.npz"))
+    with pytest.raises(ValueError):
+        export_svm(make_pipeline(StandardScaler(), SVC(kernel="linear")).fit(X, y), str(tmp_path / "svm.npz"))
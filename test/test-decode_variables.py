@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Import the decode_variables function from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.get_api import decode_variables
+
+# Minimal stand-ins for an Open-Meteo VariablesWithTime block
+class FakeVariable:
+    def __init__(self, values=None, int64_values=None):
+        self.values = values
+        self.int64_values = int64_values
+
+    def ValuesAsNumpy(self):
+        return self.values if self.values is not None else 0
+
+    def ValuesLength(self):
+        return 0 if self.values is None else len(self.values)
+
+    def ValuesInt64AsNumpy(self):
+        return self.int64_values
+
+    def ValuesInt64Length(self):
+        return 0 if self.int64_values is None else len(self.int64_values)
+
+class FakeBlock:
+    def __init__(self, start, n_steps, interval, variables):
+        self.start = start
+        self.n_steps = n_steps
+        self.interval = interval
+        self.variables = variables
+
+    def Time(self):
+        return self.start
+
+    def TimeEnd(self):
+        return self.start + self.n_steps * self.interval
+
+    def Interval(self):
+        return self.interval
+
+    def Variables(self, i):
+        return self.variables[i]
+
+# Vancouver local midnight of 2010-01-01, expressed in UTC epoch seconds
+start = int(pd.Timestamp("2010-01-01 08:00").timestamp())
+offset = -8 * 3600
+
+# Test that daily values land in the right columns with a local-date index
+def test_decode_daily_block():
+    temps = np.array([1.5, 2.5, 3.5], dtype=np.float32)
+    rain = np.array([0.0, 4.2, 0.1], dtype=np.float32)
+    block = FakeBlock(start, 3, 86400, [FakeVariable(temps), FakeVariable(rain)])
+    result = decode_variables(block, ["temperature_2m_mean", "rain_sum"], offset)
+    assert result.shape == (3, 2), "Returned wrong shape"
+    assert result.index.name == "date"
+    assert list(result.index) == list(pd.date_range("2010-01-01", periods=3, freq="D")), "Index should hold local dates"
+    np.testing.assert_array_equal(result["rain_sum"].to_numpy(), rain)
+    assert result["temperature_2m_mean"].dtype == np.float32, "Float variables should stay float32"
+
+# Test that int64 variables such as sunrise keep their exact epoch seconds
+def test_decode_int64_variable():
+    sunrise = np.array([1262360000, 1262446400], dtype=np.int64)
+    block = FakeBlock(start, 2, 86400, [FakeVariable(int64_values=sunrise), FakeVariable(np.ones(2, np.float32))])
+    result = decode_variables(block, ["sunrise", "rain_sum"], offset)
+    assert result["sunrise"].dtype == np.int64
+    np.testing.assert_array_equal(result["sunrise"].to_numpy(), sunrise)
+
+# Test that hourly blocks decode with an hourly index
+def test_decode_hourly_block():
+    values = np.arange(48, dtype=np.float32)
+    block = FakeBlock(start, 48, 3600, [FakeVariable(values)])
+    result = decode_variables(block, ["precipitation"], offset)
+    assert result.shape == (48, 1)
+    assert result.index[0] == pd.Timestamp("2010-01-01 00:00") and result.index[-1] == pd.Timestamp("2010-01-02 23:00")
+
+# Test that a variable with the wrong number of values is rejected
+def test_decode_length_mismatch():
+    block = FakeBlock(start, 3, 86400, [FakeVariable(np.ones(2, np.float32))])
+    with pytest.raises(ValueError):
+        decode_variables(block, ["rain_sum"], offset)
@@ -0,0 +1,64 @@
+import numpy as np
+import os
+import pandas as pd
+import pytest
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.eda_figures import (FIGURE_MANIFEST, Figure, histogram_counts, render_correlation_heatmap,
+                             render_figures)
+
+def write_table(data, path):
+    with open(path, "a") as f:
+        f.write(data.to_csv())
+
+# Test that the bin counts add up to the non-missing values and the bins cover their range
+def test_histogram_counts():
+    rng = np.random.default_rng(522)
+    data = pd.DataFrame({"temperature": rng.normal(10, 5, 1000).astype(np.float32),
+                         "wind": rng.uniform(0, 360, 1000),
+                         "station": ["a"] * 1000})
+    data.loc[:9, "temperature"] = np.nan
+    counts = histogram_counts(data)
+    assert counts["feature"].unique().tolist() == ["temperature", "wind"]
+    for col, n_values in [("temperature", 990), ("wind", 1000)]:
+        bins = counts[counts["feature"] == col]
+        assert bins["count"].sum() == n_values
+        assert len(bins) <= 41
+        assert bins["bin_start"].iloc[0] <= data[col].min() and bins["bin_end"].iloc[-1] >= data[col].max()
+        assert np.allclose(bins["bin_start"].iloc[1:].to_numpy(), bins["bin_end"].iloc[:-1].to_numpy())
+
+# Test that bins have a nice width and that every value falls in its own bin
+def test_histogram_counts_bins():
+    counts = histogram_counts(pd.DataFrame({"x": [0.0, 0.5, 1.0, 9.9, 10.0]}), max_bins=10)
+    assert np.allclose(counts["bin_end"] - counts["bin_start"], 1.0)
+    assert counts["count"].tolist() == [2, 1, 0, 0, 0, 0, 0, 0, 0, 2]
+    constant = histogram_counts(pd.DataFrame({"x": [3.0, 3.0]}))
+    assert constant["count"].tolist() == [2]
+    with pytest.raises(ValueError):
+        histogram_counts(pd.DataFrame({"x": [1.0]}), max_bins=0)
+
+# Test that figures are only rendered again when their data changes, or when forced
+def test_render_figures_skips_unchanged(tmp_path):
+    data = pd.DataFrame({"count": [1, 2, 3]})
+    figures = [Figure("a.txt", write_table, data), Figure("b.txt", write_table, data)]
+    assert render_figures(figures, str(tmp_path)) == {"a.txt": "rendered", "b.txt": "rendered"}
+    assert os.path.exists(tmp_path / FIGURE_MANIFEST)
+
+    assert render_figures(figures, str(tmp_path)) == {"a.txt": "cached", "b.txt": "cached"}
+    figures[1] = Figure("b.txt", write_table, data.assign(count=[1, 2, 4]))
+    assert render_figures(figures, str(tmp_path)) == {"a.txt": "cached", "b.txt": "rendered"}
+    os.remove(tmp_path / "a.txt")
+    assert render_figures(figures, str(tmp_path)) == {"a.txt": "rendered", "b.txt": "cached"}
+    assert render_figures(figures, str(tmp_path), force=True) == {"a.txt": "rendered", "b.txt": "rendered"}
+    # Each render appends, so a skipped figure was not written again
+    assert (tmp_path / "b.txt").read_text().count("count") == 3
+
+# Test that figures render in worker processes without a display
+def test_render_figures_parallel(tmp_path):
+    correlation = pd.DataFrame([[1.0, 0.5], [0.5, 1.0]], index=["x", "y"], columns=["x", "y"])
+    figures = [Figure("heatmap.png", render_correlation_heatmap, correlation),
+               Figure("table.txt", write_table, correlation)]
+    render_figures(figures, str(tmp_path), n_jobs=2)
+    assert (tmp_path / "heatmap.png").read_bytes()[:4] == b"\x89PNG"
+    assert "x,1.0,0.5" in (tmp_path / "table.txt").read_text()
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Import the feature engine from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.features import FeatureSpec, FeatureEngine, read_feature_spec
+
+rng = np.random.default_rng(0)
+n_days = 200
+daily = pd.DataFrame({'date': pd.date_range("2020-01-01", periods=n_days, freq="D"),
+                      'precipitation_sum': np.where(rng.random(n_days) < 0.5, 0.0, rng.exponential(5, n_days)),
+                      'temperature_2m_mean': rng.normal(10, 5, n_days)})
+
+spec = [FeatureSpec('precipitation_lag_1d', 'precipitation_sum', 'lag'),
+        FeatureSpec('precipitation_sum_7d', 'precipitation_sum', 'sum', window=7),
+        FeatureSpec('temperature_2m_mean_3d', 'temperature_2m_mean', 'mean', window=3),
+        FeatureSpec('temperature_2m_min_5d', 'temperature_2m_mean', 'min', window=5),
+        FeatureSpec('temperature_2m_max_5d', 'temperature_2m_mean', 'max', window=5, lag=2),
+        FeatureSpec('temperature_trend', 'temperature_2m_mean', 'diff', window=2, lag=0),
+        FeatureSpec('dry_spell_days', 'precipitation_sum', 'dry_streak')]
+
+# Test that the vectorized features match pandas rolling windows shifted by the lag
+def test_transform_matches_pandas():
+    features = FeatureEngine(spec).transform(daily)
+    precip, temp = daily['precipitation_sum'], daily['temperature_2m_mean']
+    pd.testing.assert_series_equal(features['precipitation_lag_1d'], precip.shift(1), check_names=False)
+    pd.testing.assert_series_equal(features['precipitation_sum_7d'], precip.rolling(7).sum().shift(1), check_names=False)
+    pd.testing.assert_series_equal(features['temperature_2m_mean_3d'], temp.rolling(3).mean().shift(1), check_names=False)
+    pd.testing.assert_series_equal(features['temperature_2m_min_5d'], temp.rolling(5).min().shift(1), check_names=False)
+    pd.testing.assert_series_equal(features['temperature_2m_max_5d'], temp.rolling(5).max().shift(2), check_names=False)
+    pd.testing.assert_series_equal(features['temperature_trend'], temp.diff(2), check_names=False)
+
+# Test that the dry streak counts consecutive dry days before each day
+def test_dry_streak():
+    days = pd.DataFrame({'precipitation_sum': [1.0, 0.0, 0.0, 0.005, 2.0, 0.0]})
+    streak = FeatureEngine([FeatureSpec('dry_spell_days', 'precipitation_sum', 'dry_streak')]).transform(days)
+    np.testing.assert_array_equal(streak['dry_spell_days'], [np.nan, 0, 1, 2, 3, 0])
+
+# Test that a missing day only blanks the windows containing it
+def test_missing_values():
+    days = pd.DataFrame({'precipitation_sum': [1.0, 2.0, np.nan, 4.0, 5.0, 6.0, 7.0]})
+    sums = FeatureEngine([FeatureSpec('precipitation_sum_2d', 'precipitation_sum', 'sum', window=2, lag=0)]).transform(days)
+    np.testing.assert_array_equal(sums['precipitation_sum_2d'], [np.nan, 3.0, np.nan, np.nan, 9.0, 11.0, 13.0])
+
+# Test that incremental updates give the same features as recomputing the whole history
+def test_update_matches_transform():
+    full = FeatureEngine(spec).transform(daily)
+    engine = FeatureEngine(spec)
+    engine.fit_transform(daily.iloc[:150])
+    updated = pd.concat([engine.update(daily.iloc[[i]]) for i in range(150, 180)] + [engine.update(daily.iloc[180:])])
+    pd.testing.assert_frame_equal(updated, full.iloc[150:])
+
+    # A history shorter than the longest window still updates correctly
+    engine = FeatureEngine(spec)
+    engine.fit_transform(daily.iloc[:2])
+    pd.testing.assert_frame_equal(engine.update(daily.iloc[2:20]), full.iloc[2:20])
+
+# Test that update requires a fitted history
+def test_update_before_fit():
+    with pytest.raises(RuntimeError):
+        FeatureEngine(spec).update(daily.iloc[[0]])
+
+# Test that invalid specs are rejected
+def test_invalid_spec():
+    with pytest.raises(ValueError):
+        FeatureSpec('precipitation_median_7d', 'precipitation_sum', 'median', window=7)
+    with pytest.raises(ValueError):
+        FeatureSpec('precipitation_sum_0d', 'precipitation_sum', 'sum', window=0)
+
+# Test that the shipped spec file is read and only looks at previous days
+def test_read_feature_spec():
+    path = os.path.join(os.path.dirname(__file__), '..', 'parameter', 'lag_features.csv')
+    features = read_feature_spec(path)
+    assert 'precipitation_sum_7d' in [feature.name for feature in features]
+    assert all(feature.lag >= 1 for feature in features if feature.column == 'precipitation_sum')
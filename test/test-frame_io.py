@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Import the frame I/O functions from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.frame_io import write_frame, read_frame, iter_frame_chunks, write_frame_chunks
+
+test_data = pd.DataFrame({'temperature_2m_mean': np.array([1.5, 2.5, 3.5], dtype=np.float32),
+                          'month': [1, 4, 7]})
+test_target = pd.Series([True, False, True], name='is_precipitation')
+
+# Test that the columnar formats keep dtypes, including booleans
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_columnar_round_trip_keeps_dtypes(tmp_path, fmt):
+    path = write_frame(test_data, str(tmp_path), "X_train", fmt)
+    assert path.endswith("." + fmt)
+    pd.testing.assert_frame_equal(read_frame(path), test_data)
+
+    y_path = write_frame(test_target, str(tmp_path), "y_train", fmt)
+    result = read_frame(y_path)
+    assert result['is_precipitation'].dtype == bool, "Booleans should not come back as strings"
+
+# Test that the CSV path stays available
+def test_csv_round_trip(tmp_path):
+    path = write_frame(test_data, str(tmp_path), "X_train", "csv")
+    assert path.endswith(".csv")
+    pd.testing.assert_frame_equal(read_frame(path), test_data, check_dtype=False)
+
+# Test for error handling with unknown formats
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        write_frame(test_data, str(tmp_path), "X_train", "xlsx")
+    with pytest.raises(ValueError):
+        read_frame(os.path.join(str(tmp_path), "X_train.xlsx"))
+
+# Test that files are streamed in chunks and written back chunk by chunk
+@pytest.mark.parametrize("fmt", ["parquet", "feather", "csv"])
+def test_chunked_round_trip(tmp_path, fmt):
+    data = pd.DataFrame({'temperature_2m_mean': np.arange(25, dtype=np.float64), 'month': np.arange(25) % 12})
+    path = write_frame(data, str(tmp_path), "X", fmt)
+    chunks = list(iter_frame_chunks(path, chunksize=10))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+
+    out_path = os.path.join(str(tmp_path), "copy." + fmt)
+    assert write_frame_chunks(iter(chunks), out_path) == 25
+    pd.testing.assert_frame_equal(read_frame(out_path), data)
+
+# Test that NDJSON is read from stdin and written to stdout
+def test_ndjson_stdin_stdout(monkeypatch, capsys):
+    import io
+    monkeypatch.setattr(sys, "stdin", io.StringIO('{"month": 1}\n{"month": 2}\n{"month": 3}\n'))
+    chunks = list(iter_frame_chunks("-", chunksize=2))
+    assert [chunk['month'].tolist() for chunk in chunks] == [[1, 2], [3]]
+    write_frame_chunks(iter(chunks), "-")
+    assert capsys.readouterr().out == '{"month":1}\n{"month":2}\n{"month":3}\n'
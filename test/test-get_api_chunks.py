@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+import random
+import time
+
+# Import the get_api module from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import src.get_api as get_api
+from src.get_api import get_vancouver_data, get_multi_location_data, _split_date_range
+
+url = "https://archive-api.open-meteo.com/v1/archive"
+
+# Minimal stand-ins for the Open-Meteo response objects, one value per requested day
+class FakeVariable:
+    def __init__(self, values):
+        self.values = values
+
+    def ValuesAsNumpy(self):
+        return self.values
+
+    def ValuesLength(self):
+        return len(self.values)
+
+class FakeDaily:
+    def __init__(self, start_date, end_date, n_vars):
+        self.start = int(pd.Timestamp(start_date).timestamp()) + 8 * 3600
+        self.end = int((pd.Timestamp(end_date) + pd.Timedelta(days=1)).timestamp()) + 8 * 3600
+        n_days = (self.end - self.start) // 86400
+        self.values = np.arange(n_days * n_vars, dtype=np.float32).reshape(n_vars, n_days)
+        self.values[0] %= 100 # weather_code only takes the WMO codes 0-99
+
+    def Time(self):
+        return self.start
+
+    def TimeEnd(self):
+        return self.end
+
+    def Interval(self):
+        return 86400
+
+    def Variables(self, i):
+        return FakeVariable(self.values[i])
+
+class FakeResponse:
+    def __init__(self, params):
+        self.daily = FakeDaily(params["start_date"], params["end_date"], len(params["daily"]))
+
+    def Latitude(self):
+        return 49.25
+
+    def Longitude(self):
+        return -123.12
+
+    def Elevation(self):
+        return 70.0
+
+    def Timezone(self):
+        return b"America/Vancouver"
+
+    def TimezoneAbbreviation(self):
+        return b"PST"
+
+    def UtcOffsetSeconds(self):
+        return -28800
+
+    def Daily(self):
+        return self.daily
+
+class FakeClient:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = []
+
+    def weather_api(self, url, params):
+        self.calls.append((params["start_date"], params["end_date"]))
+        # Finish out of order so the stitching has to restore date order
+        time.sleep(random.random() / 100)
+        if self.calls.count((params["start_date"], params["end_date"])) <= self.failures:
+            raise ConnectionError("dropped")
+        if isinstance(params["latitude"], list):
+            return [FakeResponse(params) for _ in params["latitude"]]
+        return [FakeResponse(params)]
+
+# Test that yearly windows cover the range without gaps or overlaps
+def test_split_date_range_yearly():
+    windows = _split_date_range("1990-06-01", "1992-03-01", "YS")
+    assert windows == [("1990-06-01", "1990-12-31"),
+                       ("1991-01-01", "1991-12-31"),
+                       ("1992-01-01", "1992-03-01")], "Windows should split on calendar years"
+
+# Test that a range shorter than one window stays a single window
+def test_split_date_range_single_window():
+    assert _split_date_range("2010-01-01", "2010-01-10", "YS") == [("2010-01-01", "2010-01-10")]
+
+# Test that an inverted range is rejected
+def test_split_date_range_invalid():
+    with pytest.raises(ValueError):
+        _split_date_range("2010-01-10", "2010-01-01", "YS")
+
+# Test that chunked windows are stitched back in date order with the usual shape
+def test_chunked_fetch_stitches_in_order(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(get_api, "_get_client", lambda: client)
+    result = get_vancouver_data(url, "1990-01-01", "1999-12-31", chunk_freq="YS", max_workers=8)
+    assert len(client.calls) == 10, "Expected one request per year"
+    assert result.shape == (3652, 18), "Returned wrong shape"
+    assert isinstance(result.index, pd.DatetimeIndex), "Did not return DatetimeIndex"
+    assert result.index.is_monotonic_increasing and result.index.is_unique, "Windows were not stitched in date order"
+    assert isinstance(result["weather_code"].dtype, pd.CategoricalDtype), "Stitched windows should stay categorical"
+
+# Test that a failing window is retried on its own
+def test_chunked_fetch_retries_window(monkeypatch):
+    client = FakeClient(failures=1)
+    monkeypatch.setattr(get_api, "_get_client", lambda: client)
+    monkeypatch.setattr(get_api.time, "sleep", lambda seconds: None)
+    result = get_vancouver_data(url, "2000-01-01", "2001-12-31", chunk_freq="YS", retries=2)
+    assert len(client.calls) == 4, "Each window should have been retried once"
+    assert result.shape[0] == 731, "Returned wrong number of rows"
+
+# Test that several locations are fetched in one request and returned in long format
+def test_multi_location_single_round_trip(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(get_api, "_get_client", lambda: client)
+    stations = {"Vancouver": (49.25, -123.12), "Burnaby": (49.25, -122.98), "Richmond": (49.17, -123.14)}
+    result = get_multi_location_data(url, stations, "2010-01-01", "2010-01-10")
+    assert len(client.calls) == 1, "All locations should be sent in one request"
+    assert result.shape == (30, 19), "Returned wrong shape"
+    assert result["location"].unique().tolist() == list(stations), "Locations should keep the given order"
+    assert isinstance(result.index, pd.DatetimeIndex), "Did not return DatetimeIndex"
+
+# Test that locations are split into batches of at most batch_size
+def test_multi_location_batches(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(get_api, "_get_client", lambda: client)
+    coords = [(49.0 + i / 100, -123.0) for i in range(5)]
+    result = get_multi_location_data(url, coords, "2010-01-01", "2010-01-02", batch_size=2)
+    assert len(client.calls) == 3, "Expected one request per batch"
+    assert result["location"].nunique() == 5 and result.shape[0] == 10
+
+# Test that an empty list of locations is rejected
+def test_multi_location_empty():
+    with pytest.raises(ValueError):
+        get_multi_location_data(url, [], "2010-01-01", "2010-01-02")
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Import the hourly functions from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import src.get_api as get_api
+from src.get_api import aggregate_hourly, get_vancouver_hourly_features, HOURLY_COLS
+
+url = "https://archive-api.open-meteo.com/v1/archive"
+
+def make_hourly(start, n_hours, precipitation):
+    index = pd.date_range(start, periods=n_hours, freq="h", name="date")
+    return pd.DataFrame({"precipitation": precipitation,
+                         "pressure_msl": np.linspace(1000, 1010, n_hours),
+                         "relative_humidity_2m": np.full(n_hours, 80.0),
+                         "cloud_cover": np.full(n_hours, 50.0)}, index=index)
+
+# Test the daily features computed from two days of hourly data
+def test_aggregate_hourly_values():
+    precipitation = np.zeros(48)
+    precipitation[[5, 6, 20]] = [1.0, 2.5, 0.5]   # day 1: dry runs of 5, 13 and 3 hours
+    precipitation[24 + 10] = 0.2                  # day 2: dry runs of 10 and 13 hours
+    result = aggregate_hourly(make_hourly("2010-01-01", 48, precipitation))
+    assert list(result.index) == [pd.Timestamp("2010-01-01"), pd.Timestamp("2010-01-02")]
+    assert result["precipitation_max_hourly"].tolist() == [2.5, 0.2]
+    assert result["wet_hours"].tolist() == [3, 1]
+    assert result["dry_hours_max_streak"].tolist() == [13, 13], "Dry streaks should not run across midnight"
+    assert result["relative_humidity_2m_mean"].tolist() == [80.0, 80.0]
+    assert result["pressure_msl_change"].iloc[0] == pytest.approx(10 * 23 / 47)
+
+# Test that a completely dry day has a 24-hour streak
+def test_aggregate_hourly_dry_day():
+    result = aggregate_hourly(make_hourly("2010-01-01", 24, np.zeros(24)))
+    assert result["dry_hours_max_streak"].iloc[0] == 24 and result["wet_hours"].iloc[0] == 0
+
+# Test that the hourly history is streamed one yearly window at a time and aggregated per day
+def test_hourly_features_streams_windows(monkeypatch):
+    requested = []
+
+    class FakeVariable:
+        def __init__(self, values):
+            self.values = values
+
+        def ValuesAsNumpy(self):
+            return self.values
+
+        def ValuesLength(self):
+            return len(self.values)
+
+    class FakeHourly:
+        def __init__(self, start_date, end_date):
+            self.start = int(pd.Timestamp(start_date).timestamp()) + 8 * 3600
+            self.end = int((pd.Timestamp(end_date) + pd.Timedelta(days=1)).timestamp()) + 8 * 3600
+            self.n = (self.end - self.start) // 3600
+
+        def Time(self):
+            return self.start
+
+        def TimeEnd(self):
+            return self.end
+
+        def Interval(self):
+            return 3600
+
+        def Variables(self, i):
+            return FakeVariable(np.full(self.n, float(i), dtype=np.float32))
+
+    class FakeResponse:
+        def __init__(self, start_date, end_date):
+            self.hourly = FakeHourly(start_date, end_date)
+
+        def Hourly(self):
+            return self.hourly
+
+        def UtcOffsetSeconds(self):
+            return -8 * 3600
+
+    def fake_fetch(openmeteo, url, start_date, end_date, retries, resolution, variables):
+        requested.append((start_date, end_date, resolution, tuple(variables)))
+        return [FakeResponse(start_date, end_date)]
+
+    monkeypatch.setattr(get_api, "_get_client", lambda: None)
+    monkeypatch.setattr(get_api, "_fetch_range", fake_fetch)
+
+    result = get_vancouver_hourly_features(url, "2010-06-01", "2012-01-31")
+    assert [r[:2] for r in requested] == [("2010-06-01", "2010-12-31"),
+                                         ("2011-01-01", "2011-12-31"),
+                                         ("2012-01-01", "2012-01-31")], "Expected one request per year"
+    assert all(r[2] == "hourly" and r[3] == tuple(HOURLY_COLS) for r in requested)
+    assert result.shape[0] == 610 and result.index.is_unique, "Expected one row per day"
+    assert (result["dry_hours_max_streak"] == 24).all()
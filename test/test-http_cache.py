@@ -0,0 +1,78 @@
+import io
+import pytest
+import sys
+import os
+from datetime import date
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+# Import the HTTP cache from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import src.http_cache as http_cache
+from src.http_cache import LRUCachedSession, configure_http_cache, get_session, response_ttl
+
+url = "https://archive.test/v1/archive"
+
+# Stand-in for the network that answers every request with a fixed-size body and counts requests
+class FakeAdapter(HTTPAdapter):
+    def __init__(self, body_size=1000):
+        super().__init__()
+        self.body_size = body_size
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        raw = HTTPResponse(body=io.BytesIO(b"x" * self.body_size), status=200, preload_content=False,
+                           request_url=request.url)
+        return self.build_response(request, raw)
+
+def make_session(tmp_path, **kwargs):
+    session = LRUCachedSession(str(tmp_path / "http_cache.sqlite"), **kwargs)
+    adapter = FakeAdapter()
+    session.mount("https://archive.test/", adapter)
+    return session, adapter
+
+# Test that archive ranges are cached without expiry and recent days with the short TTL
+def test_response_ttl():
+    today = date(2023, 11, 20)
+    assert response_ttl({"end_date": "2023-11-01"}, archive_ttl=-1, recent_ttl=3600, today=today) == -1
+    assert response_ttl({"end_date": "2023-11-18"}, archive_ttl=-1, recent_ttl=3600, today=today) == 3600
+    assert response_ttl(None, archive_ttl=-1, recent_ttl=3600, today=today) == 3600
+
+# Test that repeating an archive request is served from the cache, across sessions
+def test_archive_requests_hit_network_once(tmp_path):
+    session, adapter = make_session(tmp_path)
+    params = {"start_date": "2010-01-01", "end_date": "2010-01-10"}
+    first = session.get(url, params=params)
+    second = session.get(url, params=params)
+    assert adapter.calls == 1 and second.from_cache
+    assert first.expires is None, "Archive responses should never expire"
+
+    session, adapter = make_session(tmp_path)
+    assert session.get(url, params=params).from_cache and adapter.calls == 0
+    recent = session.get(url, params={"start_date": date.today().isoformat(), "end_date": date.today().isoformat()})
+    assert recent.expires is not None, "Recent days should expire"
+
+# Test that the least recently used responses are evicted once the cache is full
+def test_lru_eviction(tmp_path):
+    session, adapter = make_session(tmp_path, max_bytes=3500) # room for two responses
+    params = [{"start_date": "2010-01-01", "end_date": f"2010-01-0{day}"} for day in (1, 2, 3)]
+    session.get(url, params=params[0])
+    session.get(url, params=params[1])
+    session.get(url, params=params[0]) # the first response is now the most recently used
+    session.get(url, params=params[2])
+    assert adapter.calls == 3
+    assert session.get(url, params=params[0]).from_cache, "Recently used responses should be kept"
+    assert not session.get(url, params=params[1]).from_cache, "The least recently used response should be evicted"
+
+# Test that one session is shared per process and replaced when reconfigured
+def test_shared_session(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "_session", None)
+    monkeypatch.setattr(http_cache, "_config", dict(http_cache._config))
+    configure_http_cache(str(tmp_path / "cache" / "http_cache.sqlite"))
+    session = get_session()
+    assert get_session() is session
+    assert os.path.exists(tmp_path / "cache" / "http_cache.sqlite")
+    configure_http_cache(str(tmp_path / "other.sqlite"))
+    assert get_session() is not session
+    configure_http_cache(str(tmp_path / "other.sqlite"))
@@ -5,13 +5,23 @@ import os
 
 # Import the get_vancouver_data function from the src folder
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import openmeteo_requests
+import src.get_api
 from src.get_api import get_vancouver_data
+from src.mock_openmeteo import MockOpenMeteo
 
 # Test for correct return type with 10 date range for sampling
 start_date = "2010-01-01"
 end_date = "2010-01-10"
 url = "https://archive-api.open-meteo.com/v1/archive"
 
+# Answer every request from the offline mock, unless OPEN_METEO_LIVE=1 asks for the real archive API
+@pytest.fixture(autouse=True)
+def offline_api(monkeypatch):
+    if os.environ.get("OPEN_METEO_LIVE") != "1":
+        mock = MockOpenMeteo()
+        monkeypatch.setattr(src.get_api, "_get_client", lambda: openmeteo_requests.Client(session=mock.session()))
+
 # Test for correct return type
 def test_get_vancouver_data_returns_dataframe():
     result = get_vancouver_data(url, start_date, end_date)
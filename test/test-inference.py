@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+from sklearn.datasets import make_classification
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+# Import the scoring functions from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.inference import score_frame, predict_chunks
+
+X, y = make_classification(n_samples=200, n_features=4, random_state=42)
+X = pd.DataFrame(X, columns=['temperature_2m_mean', 'wind_speed_10m_max', 'month_sin', 'month_cos'])
+y = y.astype(bool)
+pipe = make_pipeline(StandardScaler(), SVC(random_state=522)).fit(X, y)
+
+# Test that the predictions and decision scores match the pipeline
+def test_score_frame_matches_pipeline():
+    result = score_frame(pipe, X)
+    assert result.columns.tolist() == ['prediction', 'decision_score']
+    np.testing.assert_array_equal(result['prediction'], pipe.predict(X))
+    np.testing.assert_allclose(result['decision_score'], pipe.decision_function(X))
+
+# Test that extra columns are ignored unless kept, and that column order does not matter
+def test_score_frame_extra_columns():
+    data = X[X.columns[::-1]].assign(date=pd.date_range("2020-01-01", periods=len(X)))
+    result = score_frame(pipe, data, keep_columns=['date'])
+    assert result.columns.tolist() == ['date', 'prediction', 'decision_score']
+    np.testing.assert_allclose(result['decision_score'], pipe.decision_function(X))
+
+# Test that chunked scoring gives the same result as scoring everything at once
+def test_predict_chunks():
+    chunks = [X.iloc[i:i + 64] for i in range(0, len(X), 64)]
+    result = pd.concat(predict_chunks(pipe, chunks), ignore_index=True)
+    pd.testing.assert_frame_equal(result, score_frame(pipe, X))
+
+# Test for error handling with missing features
+def test_missing_features():
+    with pytest.raises(KeyError):
+        score_frame(pipe, X.drop(columns=['month_sin']))
@@ -0,0 +1,93 @@
+import click
+import numpy as np
+import os
+import pandas as pd
+import pytest
+import sys
+from click.testing import CliRunner
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.instrumentation import (EVENTS_ENV, PROFILE_ENV, configure_instrumentation, current_span, read_events,
+                                 span, stage, stage_main, traced)
+
+@pytest.fixture
+def events(tmp_path, monkeypatch):
+    monkeypatch.setenv(PROFILE_ENV, "")
+    monkeypatch.setenv(EVENTS_ENV, str(tmp_path / "events.jsonl"))
+    return lambda: read_events(str(tmp_path / "events.jsonl"))
+
+# Test that spans emit timings, rows and attributes, and link to the enclosing span
+def test_span_events(events):
+    with span("outer") as outer:
+        assert current_span() is outer
+        with span("inner", rows=3, path="x.csv") as inner:
+            inner.rows += 1
+    assert current_span() is None
+    inner_event, outer_event = events()
+    assert (inner_event["name"], outer_event["name"]) == ("inner", "outer")
+    assert inner_event["parent"] == outer_event["id"] and outer_event["parent"] is None
+    assert inner_event["rows"] == 4 and inner_event["path"] == "x.csv"
+    assert inner_event["status"] == "ok"
+    for key in ["wall_s", "cpu_s", "peak_rss_mb"]:
+        assert outer_event[key] >= 0
+    assert outer_event["wall_s"] >= inner_event["wall_s"]
+
+# Test that a failing span records the exception and re-raises it
+def test_span_error(events):
+    with pytest.raises(ZeroDivisionError):
+        with span("failing"):
+            1 / 0
+    assert events()[0]["status"] == "ZeroDivisionError"
+
+# Test that traced functions report the rows of their result or of an argument
+def test_traced_rows(events):
+    @traced()
+    def make(n):
+        return pd.DataFrame({"a": np.arange(n)})
+
+    @traced("write", rows_arg="data")
+    def write(path, data):
+        return path
+
+    write("out.csv", make(5))
+    assert [(event["name"], event["rows"]) for event in events()] == [("make", 5), ("write", 5)]
+
+# Test that nothing is written without an events file
+def test_span_unconfigured(tmp_path, monkeypatch):
+    monkeypatch.setenv(EVENTS_ENV, "")
+    monkeypatch.chdir(tmp_path)
+    with span("quiet"):
+        pass
+    assert os.listdir(tmp_path) == []
+
+# Test that stages write their profile, and nested stages are not profiled separately
+def test_stage_profile(events, tmp_path, monkeypatch):
+    monkeypatch.setenv(PROFILE_ENV, str(tmp_path / "profiles"))
+    with stage("outer"):
+        with stage("nested"):
+            sorted(range(1000))
+    assert sorted(os.listdir(tmp_path / "profiles")) == ["outer.pstats", "outer.txt"]
+    assert "cumulative" in (tmp_path / "profiles" / "outer.txt").read_text()
+    assert [event["name"] for event in events()] == ["nested", "outer"]
+
+# Test that stage_main takes the --profile and --events-to options and runs the command as a stage
+def test_stage_main(tmp_path, monkeypatch):
+    monkeypatch.setenv(EVENTS_ENV, "")
+    monkeypatch.setenv(PROFILE_ENV, "")
+
+    @click.command()
+    @click.option('--rows', type=int)
+    @click.option('--profile', type=str, default=None)
+    @click.option('--events-to', type=str, default=None)
+    @stage_main("command")
+    def main(rows):
+        current_span().rows = rows
+
+    result = CliRunner().invoke(main, ["--rows=7", f"--profile={tmp_path / 'profiles'}",
+                                       f"--events-to={tmp_path / 'events.jsonl'}"])
+    assert result.exit_code == 0, result.output
+    event, = read_events(str(tmp_path / "events.jsonl"))
+    assert (event["name"], event["rows"]) == ("command", 7)
+    assert os.path.exists(tmp_path / "profiles" / "command.pstats")
+    # The settings are kept in the environment, so subprocesses report to the same places
+    assert os.environ[EVENTS_ENV] == str(tmp_path / "events.jsonl")
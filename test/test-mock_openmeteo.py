@@ -0,0 +1,106 @@
+import numpy as np
+import openmeteo_requests
+import os
+import pandas as pd
+import pytest
+import requests
+import sys
+import threading
+from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import src.get_api
+from src.get_api import get_vancouver_data, get_multi_location_data
+from src.mock_openmeteo import (MockOpenMeteo, encode_response, fixture_key, frame_messages,
+                                make_mock_server, synthetic_response)
+from src.weather_schema import WEATHER_SCHEMA
+
+url = "https://archive-api.open-meteo.com/v1/archive"
+params = {"latitude": "49.25", "longitude": "-123.12", "start_date": "2010-01-01", "end_date": "2010-01-10",
+          "daily": ["precipitation_sum", "sunrise"]}
+
+@pytest.fixture
+def use_mock(monkeypatch):
+    def use(mock):
+        monkeypatch.setattr(src.get_api, "_get_client", lambda: openmeteo_requests.Client(session=mock.session()))
+    return use
+
+# Test that an encoded message decodes with the Open-Meteo SDK
+def test_encode_response_round_trip():
+    body = frame_messages([encode_response(49.25, -123.12, {"daily": (0, 2 * 86400, 86400,
+                                                                       [np.array([1.5, 2.5]), np.array([10, 20])])},
+                                           utc_offset_seconds=-28800)])
+    message = WeatherApiResponse.GetRootAs(body, 4)
+    daily = message.Daily()
+    assert message.UtcOffsetSeconds() == -28800
+    assert abs(message.Latitude() - 49.25) < 1e-4
+    assert (daily.Time(), daily.TimeEnd(), daily.Interval()) == (0, 2 * 86400, 86400)
+    np.testing.assert_array_equal(daily.Variables(0).ValuesAsNumpy(), [1.5, 2.5])
+    np.testing.assert_array_equal(daily.Variables(1).ValuesInt64AsNumpy(), [10, 20])
+
+# Test that the mock returns one row per day with the schema dtypes, without the network
+def test_get_vancouver_data_from_mock(use_mock):
+    use_mock(MockOpenMeteo())
+    result = get_vancouver_data(url, "2010-01-01", "2010-01-10")
+    assert result.shape == (10, 18)
+    assert result.index[0] == pd.Timestamp("2010-01-01")
+    assert result["precipitation_sum"].dtype == WEATHER_SCHEMA["precipitation_sum"]
+    assert (result["precipitation_sum"] >= 0).all()
+
+# Test that synthetic values depend on the date only, so windowed fetches match one request
+def test_synthetic_data_same_across_windows(use_mock):
+    mock = MockOpenMeteo()
+    use_mock(mock)
+    whole = get_vancouver_data(url, "2010-01-01", "2011-12-31")
+    chunked = get_vancouver_data(url, "2010-01-01", "2011-12-31", chunk_freq="QS")
+    assert whole.equals(chunked)
+    assert mock.requests == 1 + 8
+
+# Test that several locations get one message each, with different values
+def test_synthetic_multi_location(use_mock):
+    use_mock(MockOpenMeteo())
+    result = get_multi_location_data(url, {"a": (49.25, -123.12), "b": (49.3, -122.9)}, "2010-01-01", "2010-01-05")
+    assert result.groupby("location").size().to_dict() == {"a": 5, "b": 5}
+    assert not np.allclose(result.loc[result.location == "a", "temperature_2m_mean"],
+                           result.loc[result.location == "b", "temperature_2m_mean"])
+
+# Test that invalid modes and a missing fixtures directory are rejected
+def test_mock_invalid_mode():
+    with pytest.raises(ValueError):
+        MockOpenMeteo(mode="live")
+    with pytest.raises(ValueError):
+        MockOpenMeteo(mode="replay")
+
+# Test that replay serves recorded fixtures and fails on requests without one
+def test_replay_fixtures(tmp_path, use_mock):
+    key = fixture_key("/v1/archive", params)
+    (tmp_path / f"{key}.bin").write_bytes(synthetic_response(params))
+    mock = MockOpenMeteo(mode="replay", fixtures=str(tmp_path))
+    status, _, body = mock.respond("/v1/archive", params)
+    assert status == 200 and body == synthetic_response(params)
+    status, _, _ = mock.respond("/v1/archive", {**params, "end_date": "2010-01-11"})
+    assert status == 404
+
+    use_mock(mock)
+    with pytest.raises(Exception):
+        get_vancouver_data(url, "2010-01-01", "2010-01-10")
+
+# Test that fixture keys ignore parameter order
+def test_fixture_key_order():
+    reordered = dict(reversed(list(params.items())))
+    assert fixture_key("/v1/archive", params) == fixture_key("/v1/archive", reordered)
+    assert fixture_key("/v1/archive", params) != fixture_key("/v1/forecast", params)
+
+# Test chunked, concurrent fetching against the HTTP server
+def test_mock_server_concurrent_fetch(monkeypatch):
+    server = make_mock_server(port=0, latency_ms=5)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        monkeypatch.setattr(src.get_api, "_get_client", lambda: openmeteo_requests.Client(session=requests.Session()))
+        server_url = f"http://127.0.0.1:{server.server_address[1]}/v1/archive"
+        result = get_vancouver_data(server_url, "2010-01-01", "2010-12-31", chunk_freq="MS", max_workers=4)
+        assert result.shape == (365, 18)
+        assert server.mock.requests == 12
+    finally:
+        server.shutdown()
+        server.server_close()
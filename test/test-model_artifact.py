@@ -0,0 +1,126 @@
+import json
+import numpy as np
+import pandas as pd
+import pickle
+import pytest
+import sys
+import os
+from sklearn.datasets import make_classification
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+# Import the artifact functions from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.model_artifact import save_model, load_model, read_manifest, data_hash
+
+X, y = make_classification(n_samples=300, n_features=5, random_state=42)
+X = pd.DataFrame(X, columns=['temperature_2m_mean', 'wind_speed_10m_max', 'shortwave_radiation_sum', 'month_sin', 'month_cos'])
+y = pd.Series(y.astype(bool), name='is_precipitation')
+pipe = make_pipeline(StandardScaler(), SVC(random_state=522)).fit(X, y)
+
+# Test that a loaded model gives the same predictions, with its large arrays memory-mapped
+def test_round_trip_memory_maps_arrays(tmp_path):
+    path = str(tmp_path / "pipe.model")
+    manifest = save_model(pipe, path, training_data=(X, y), metrics={"test_f1": 0.87})
+    assert len(manifest["arrays"]) > 0
+    assert all(os.path.exists(os.path.join(path, entry["file"])) for entry in manifest["arrays"])
+
+    loaded = load_model(path)
+    np.testing.assert_array_equal(loaded.decision_function(X), pipe.decision_function(X))
+    assert isinstance(loaded.named_steps['svc'].support_vectors_, np.memmap)
+
+# Test the manifest contents
+def test_manifest(tmp_path):
+    path = str(tmp_path / "pipe.model")
+    save_model(pipe, path, training_data=(X, y), metrics={"test_f1": 0.87})
+    manifest = read_manifest(path)
+    assert manifest["feature_names"] == X.columns.tolist()
+    assert manifest["training_data_sha256"] == data_hash(X, y)
+    assert manifest["metrics"] == {"test_f1": 0.87}
+    assert manifest["sklearn_version"] and manifest["format_version"] == 1
+
+# Test that the data hash changes with the data
+def test_data_hash():
+    assert data_hash(X, y) == data_hash(X.copy(), y.copy())
+    assert data_hash(X, y) != data_hash(X, ~y)
+    assert data_hash(X) != data_hash(X.rename(columns={'month_sin': 'm'}))
+
+# Test that tampered skeletons and arrays are rejected
+def test_corruption_is_detected(tmp_path):
+    path = str(tmp_path / "pipe.model")
+    manifest = save_model(pipe, path)
+    with open(os.path.join(path, manifest["arrays"][0]["file"]), "ab") as f:
+        f.write(b"\0" * 8)
+    with pytest.raises(ValueError):
+        load_model(path, check_arrays=True)
+
+    save_model(pipe, path)
+    with open(os.path.join(path, "skeleton.pkl"), "ab") as f:
+        f.write(b"\0")
+    with pytest.raises(ValueError):
+        load_model(path)
+
+# Test that only model classes can be unpickled, even with a matching hash
+def test_unsafe_classes_are_refused(tmp_path):
+    path = str(tmp_path / "pipe.model")
+    save_model(pipe, path)
+    with open(os.path.join(path, "skeleton.pkl"), "wb") as f:
+        pickle.dump(os.system, f)
+    manifest = read_manifest(path)
+    import hashlib
+    manifest["skeleton"]["sha256"] = hashlib.sha256(open(os.path.join(path, "skeleton.pkl"), "rb").read()).hexdigest()
+    with open(os.path.join(path, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+    with pytest.raises(pickle.UnpicklingError):
+        load_model(path)
+
+# Replaces the skeleton of a saved artifact and updates its hash, as an attacker writing both would
+def write_skeleton(path, skeleton):
+    with open(os.path.join(path, "skeleton.pkl"), "wb") as f:
+        f.write(skeleton)
+    manifest = read_manifest(path)
+    import hashlib
+    manifest["skeleton"]["sha256"] = hashlib.sha256(skeleton).hexdigest()
+    with open(os.path.join(path, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+
+# Pickles as a call of `func` with `args`
+class Call:
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+
+    def __reduce__(self):
+        return self.func, self.args
+
+# Test that dotted names cannot reach modules imported by an allowed module
+@pytest.mark.parametrize("skeleton", [b'\x80\x04\x8c\x12src.model_artifact\x94\x8c\x09os.getcwd\x94\x93)R.',
+                                      b'\x80\x04\x8c\x12src.model_artifact\x94\x8c\x02os\x94\x93.'])
+def test_dotted_names_are_refused(tmp_path, skeleton):
+    path = str(tmp_path / "pipe.model")
+    save_model(pipe, path)
+    write_skeleton(path, skeleton)
+    with pytest.raises(pickle.UnpicklingError):
+        load_model(path)
+
+# Test that functions of allowed packages, which run code or read files when called, are refused
+def test_package_functions_are_refused(tmp_path):
+    from numpy.testing._private.utils import runstring
+    path = str(tmp_path / "pipe.model")
+    marker = tmp_path / "executed"
+    save_model(pipe, path)
+    write_skeleton(path, pickle.dumps(Call(runstring, f"open({str(marker)!r}, 'w').close()", {})))
+    with pytest.raises(pickle.UnpicklingError):
+        load_model(path)
+    assert not marker.exists()
+
+    np.save(tmp_path / "payload.npy", np.arange(3))
+    write_skeleton(path, pickle.dumps(Call(np.load, str(tmp_path / "payload.npy"))))
+    with pytest.raises(pickle.UnpicklingError):
+        load_model(path)
+
+# Test for error handling with paths that are not artifacts
+def test_not_an_artifact(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_model(str(tmp_path))
@@ -0,0 +1,112 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+from sklearn import config_context
+from sklearn.datasets import make_classification
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+# Import the server from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.inference import score_frame
+from src.serving import MicroBatcher, ServingStats, make_server
+
+X, y = make_classification(n_samples=200, n_features=4, random_state=42)
+X = pd.DataFrame(X, columns=['temperature_2m_mean', 'wind_speed_10m_max', 'month_sin', 'month_cos'])
+with config_context(transform_output="pandas"):
+    pipe = make_pipeline(StandardScaler(), SVC(random_state=522)).fit(X, y.astype(bool))
+    expected = score_frame(pipe, X)
+
+@pytest.fixture
+def server():
+    server = make_server(pipe, port=0, max_batch_size=32, max_wait_ms=20)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.batcher.close()
+
+def request(server, path, payload=None):
+    url = f"http://127.0.0.1:{server.server_address[1]}{path}"
+    data = None if payload is None else json.dumps(payload).encode()
+    with urllib.request.urlopen(urllib.request.Request(url, data=data), timeout=10) as response:
+        return json.loads(response.read())
+
+# Test that concurrent requests are answered correctly and coalesced into fewer batches
+def test_concurrent_requests_are_batched(server):
+    records = X.to_dict(orient="records")
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        answers = list(pool.map(lambda record: request(server, "/predict", record)["predictions"][0], records))
+
+    np.testing.assert_array_equal([a["prediction"] for a in answers], expected["prediction"])
+    np.testing.assert_allclose([a["decision_score"] for a in answers], expected["decision_score"])
+
+    metrics = request(server, "/metrics")
+    assert metrics["requests"] == len(records) and metrics["rows"] == len(records)
+    assert metrics["batches"] < len(records), "Concurrent requests should share batches"
+    assert 0 < metrics["latency_ms_p50"] <= metrics["latency_ms_p99"]
+    assert metrics["throughput_rows_per_s"] > 0
+
+# Test that a list of records is scored in order
+def test_predict_list(server):
+    answer = request(server, "/predict", X.head(5).to_dict(orient="records"))
+    np.testing.assert_allclose([a["decision_score"] for a in answer["predictions"]], expected["decision_score"][:5])
+    assert request(server, "/health") == {"status": "ok"}
+
+# Test for error handling with missing features
+def test_missing_features(server):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        request(server, "/predict", {"temperature_2m_mean": 1.0})
+    assert error.value.code == 400
+
+# Test that a bad request only fails itself, not the requests batched with it
+def test_bad_request_does_not_fail_batch():
+    batcher = MicroBatcher(pipe, max_batch_size=1000, max_wait_ms=200)
+    bad = X.iloc[[0]].assign(month_sin=np.nan)
+    futures = [batcher.submit(X.iloc[[1]]), batcher.submit(bad), batcher.submit(X.iloc[[2]])]
+    batcher.close()
+    pd.testing.assert_frame_equal(futures[0].result(timeout=5), expected.iloc[[1]].reset_index(drop=True))
+    pd.testing.assert_frame_equal(futures[2].result(timeout=5), expected.iloc[[2]].reset_index(drop=True))
+    with pytest.raises(ValueError):
+        futures[1].result(timeout=5)
+
+# Test that requests get an answer when scoring stalls or fails unexpectedly
+def test_timeout_and_internal_errors(server, monkeypatch):
+    record = X.iloc[0].to_dict()
+    server.request_timeout = 0.1
+    monkeypatch.setattr(server.batcher, "submit", lambda data: Future())
+    with pytest.raises(urllib.error.HTTPError) as error:
+        request(server, "/predict", record)
+    assert error.value.code == 503
+
+    def fail(data):
+        raise RuntimeError("worker died")
+    monkeypatch.setattr(server.batcher, "submit", fail)
+    with pytest.raises(urllib.error.HTTPError) as error:
+        request(server, "/predict", record)
+    assert error.value.code == 500 and "worker died" in json.loads(error.value.read())["error"]
+
+# Test that the batcher scores requests queued before it is closed
+def test_batcher_close_flushes_queue():
+    batcher = MicroBatcher(pipe, max_batch_size=1000, max_wait_ms=1000)
+    futures = [batcher.submit(X.iloc[[i]]) for i in range(10)]
+    batcher.close()
+    result = pd.concat([future.result(timeout=5) for future in futures], ignore_index=True)
+    pd.testing.assert_frame_equal(result, expected.head(10))
+
+# Test the latency percentiles
+def test_stats_percentiles():
+    stats = ServingStats()
+    stats.record_batch([0.001] * 99 + [0.1], n_rows=100)
+    snapshot = stats.snapshot()
+    assert snapshot["latency_ms_p50"] == 1.0 and snapshot["latency_ms_p99"] > 1.0
+    assert snapshot["mean_batch_size"] == 100.0
@@ -0,0 +1,104 @@
+import pytest
+import sys
+import os
+
+# Import the stage cache from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.stage_cache import Stage, stage_key, run_stage, script_inputs
+
+# A stage that upper-cases its input file and counts how many times it actually ran
+def make_stage(tmp_path, seed=1):
+    script = ("import sys; src, dst, counter = sys.argv[1:4]; "
+              "open(dst, 'w').write(open(src).read().upper()); "
+              "open(counter, 'a').write('x')")
+    return Stage("upper",
+                 [sys.executable, "-c", script,
+                  str(tmp_path / "in.txt"), str(tmp_path / "out.txt"), str(tmp_path / "runs.txt"),
+                  f"--seed={seed}"],
+                 inputs=[str(tmp_path / "in.txt")],
+                 outputs=[str(tmp_path / "out.txt")])
+
+def runs(tmp_path):
+    return len((tmp_path / "runs.txt").read_text())
+
+# Test that an unchanged stage is skipped on the second run
+def test_unchanged_stage_is_cached(tmp_path):
+    (tmp_path / "in.txt").write_text("rain")
+    cache = str(tmp_path / "cache")
+    assert run_stage(make_stage(tmp_path), cache) == "ran"
+    assert run_stage(make_stage(tmp_path), cache) == "cached"
+    assert runs(tmp_path) == 1, "The command should only have run once"
+
+# Test that changing an input or a parameter reruns the stage
+def test_changed_input_or_param_reruns(tmp_path):
+    (tmp_path / "in.txt").write_text("rain")
+    cache = str(tmp_path / "cache")
+    run_stage(make_stage(tmp_path), cache)
+    (tmp_path / "in.txt").write_text("snow")
+    assert run_stage(make_stage(tmp_path), cache) == "ran"
+    assert (tmp_path / "out.txt").read_text() == "SNOW"
+    assert run_stage(make_stage(tmp_path, seed=2), cache) == "ran"
+    assert runs(tmp_path) == 3
+
+# Test that a cached run restores missing outputs without running the command
+def test_missing_output_is_restored(tmp_path):
+    (tmp_path / "in.txt").write_text("rain")
+    cache = str(tmp_path / "cache")
+    run_stage(make_stage(tmp_path), cache)
+    os.remove(tmp_path / "out.txt")
+    assert run_stage(make_stage(tmp_path), cache) == "cached"
+    assert (tmp_path / "out.txt").read_text() == "RAIN"
+    assert runs(tmp_path) == 1
+
+# Test that the key depends on input contents, not on modification times
+def test_key_ignores_touch(tmp_path):
+    (tmp_path / "in.txt").write_text("rain")
+    key = stage_key(make_stage(tmp_path))
+    os.utime(tmp_path / "in.txt", (0, 0))
+    assert stage_key(make_stage(tmp_path)) == key
+
+# Test for error handling with missing inputs
+def test_missing_input(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        run_stage(make_stage(tmp_path), str(tmp_path / "cache"))
+
+# Test that a script's inputs follow its imports, including those made inside functions
+def test_script_inputs_follow_imports(tmp_path):
+    (tmp_path / "scripts").mkdir()
+    (tmp_path / "src").mkdir()
+    (tmp_path / "scripts" / "job.py").write_text("import os\nfrom src.a import run\n")
+    (tmp_path / "src" / "a.py").write_text("def run():\n    from src import b\n    return b.VALUE\n")
+    (tmp_path / "src" / "b.py").write_text("import src.c\nVALUE = 1\n")
+    (tmp_path / "src" / "c.py").write_text("")
+    (tmp_path / "src" / "unused.py").write_text("")
+    assert script_inputs("scripts/job.py", root=str(tmp_path)) == ["scripts/job.py", "src/a.py", "src/b.py",
+                                                                  "src/c.py"]
+
+# Test that editing a module the script only imports indirectly reruns the stage
+def test_changed_indirect_import_reruns(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "scripts").mkdir()
+    (tmp_path / "src").mkdir()
+    (tmp_path / "scripts" / "job.py").write_text(
+        "import sys\nsys.path.insert(0, '.')\nfrom src.a import value\nopen('out.txt', 'w').write(str(value()))\n")
+    (tmp_path / "src" / "a.py").write_text("def value():\n    from src.b import VALUE\n    return VALUE\n")
+    (tmp_path / "src" / "b.py").write_text("VALUE = 1\n")
+
+    def stage():
+        return Stage("job", [sys.executable, "scripts/job.py"], inputs=script_inputs("scripts/job.py"),
+                     outputs=["out.txt"])
+    cache = str(tmp_path / "cache")
+    assert run_stage(stage(), cache) == "ran"
+    assert run_stage(stage(), cache) == "cached"
+    (tmp_path / "src" / "b.py").write_text("VALUE = 2\n")
+    assert run_stage(stage(), cache) == "ran"
+    assert (tmp_path / "out.txt").read_text() == "2"
+
+# Test that the pipeline stages list the modules their scripts import indirectly
+def test_pipeline_stages_list_indirect_imports():
+    import runpy
+    stages = {stage.name: stage for stage in
+              runpy.run_path(os.path.join(os.path.dirname(__file__), "..", "scripts", "run_pipeline.py"))["STAGES"]}
+    assert {"src/weather_schema.py", "src/http_cache.py", "src/instrumentation.py"} <= set(stages["download_data"].inputs)
+    assert "src/weather_schema.py" in stages["eda"].inputs
+    assert "src/features.py" in stages["drop_split_preprocess"].inputs
@@ -0,0 +1,59 @@
+import glob
+import json
+import os
+import pickle
+import pytest
+import subprocess
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+SCRIPTS = sorted(os.path.basename(path) for path in glob.glob(os.path.join(ROOT, "scripts", "*.py")))
+
+# Libraries the scripts only need once their arguments are parsed
+HEAVY_MODULES = ["pandas", "sklearn", "scipy", "joblib", "matplotlib", "altair", "seaborn", "pyarrow",
+                 "requests", "requests_cache", "openmeteo_requests", "flatbuffers"]
+
+def loaded_heavy_modules(code):
+    """
+    Runs `code` in a fresh interpreter and returns the heavy modules it left loaded.
+    """
+    report = f"import json, sys\nprint(json.dumps(sorted(set({HEAVY_MODULES!r}) & set(sys.modules))))"
+    result = subprocess.run([sys.executable, "-c", code + "\n" + report], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def run_script(name, *args):
+    code = (f"import runpy, sys\nsys.argv = [{name!r}, *{list(args)!r}]\n"
+            f"try:\n    runpy.run_path('scripts/{name}', run_name='__main__')\nexcept SystemExit:\n    pass")
+    return loaded_heavy_modules(code)
+
+# Test that every script answers --help without loading the heavy libraries
+@pytest.mark.parametrize("name", SCRIPTS)
+def test_help_imports(name):
+    assert run_script(name, "--help") == []
+
+# Test that invalid options are rejected before the heavy libraries are loaded
+def test_invalid_option_imports():
+    assert run_script("classification.py", "--search=exhaustive") == []
+    assert run_script("drop_split_preprocess.py", "--data-format=xlsx") == []
+
+# Test that the lightweight helpers import without pandas or sklearn
+def test_helpers_imports():
+    assert loaded_heavy_modules("from src.utils import encode, SEARCH_MODES, SVM_ENGINES, CYCLICAL_PERIODS\n"
+                                "from src.frame_io import FRAME_FORMATS\n"
+                                "from src.instrumentation import span, stage_main\n"
+                                "from src.stage_cache import Stage, run_stage") == []
+
+# Test that CyclicalEncoder can still be imported, and unpickled, from its former module
+def test_cyclical_encoder_moved():
+    from src.cyclical import CyclicalEncoder
+    from src.utils import CyclicalEncoder as FromUtils
+    assert FromUtils is CyclicalEncoder
+    old_pickle = pickle.dumps(CyclicalEncoder({"month": 12}), protocol=0).replace(b"src.cyclical", b"src.utils")
+    assert b"src.utils" in old_pickle
+    assert pickle.loads(old_pickle).periods == {"month": 12}
+    import src.utils
+    with pytest.raises(AttributeError):
+        src.utils.NotAnAttribute
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+import sys
+import os
+from sklearn.base import clone
+from sklearn.datasets import make_classification
+from sklearn.experimental import enable_halving_search_cv
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+# Import the search builder from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.utils import make_svc_search, transform_cache, SVC_PARAM_GRID, SVC_HALVING_PARAM_GRID
+
+X, y = make_classification(n_samples=600, n_features=6, random_state=42)
+
+# Test that each mode builds the expected search and space
+def test_search_modes():
+    pipe = make_pipeline(StandardScaler(), SVC())
+    assert isinstance(make_svc_search(pipe, "grid"), GridSearchCV)
+    halving = make_svc_search(pipe, "halving")
+    assert isinstance(halving, HalvingGridSearchCV)
+    n_grid = len(SVC_PARAM_GRID["C"])
+    n_halving = len(SVC_HALVING_PARAM_GRID["C"]) * len(SVC_HALVING_PARAM_GRID["gamma"])
+    assert n_halving >= 10 * n_grid, "Successive halving should search a much larger space"
+
+# Test that the refit best estimator matches a pipeline fitted from scratch with the best parameters
+def test_best_estimator_is_refit_on_full_data():
+    with transform_cache() as memory:
+        search = make_svc_search(make_pipeline(StandardScaler(), SVC(), memory=memory), "halving", random_state=0)
+        search.fit(X, y)
+        best = search.best_estimator_.set_params(memory=None)
+    fresh = clone(best).fit(X, y)
+    assert best.named_steps["standardscaler"].n_samples_seen_ == len(X)
+    np.testing.assert_array_equal(best.decision_function(X), fresh.decision_function(X))
+
+# Test for error handling with an unknown mode
+def test_unknown_search_mode():
+    with pytest.raises(ValueError):
+        make_svc_search(make_pipeline(StandardScaler(), SVC()), "random")
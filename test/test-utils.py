@@ -1,12 +1,13 @@
 import pandas as pd
 import numpy as np
 import pytest
+from sklearn import config_context
 import sys
 import os
 
 # Import the encode function from the src folder
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.utils import encode
+from src.utils import encode, CyclicalEncoder
 
 # Test data
 test_data = pd.DataFrame({'month': [1, 4, 7, 10]})
@@ -51,3 +52,52 @@ def test_encode_correct_values():
     pd.testing.assert_series_equal(result['month_cos'], expected_cos, check_dtype=False, check_names=False)
 
 
+
+# Test that the cyclical encoder gives the same values as encode, for several columns at once
+def test_cyclical_encoder_matches_encode():
+    data = pd.DataFrame({'temperature_2m_mean': [5.0, 8.0, 12.0, 3.0],
+                         'month': [1, 4, 7, 10],
+                         'wind_direction_10m_dominant': [0, 90, 200, 359]})
+    encoder = CyclicalEncoder({'month': 12, 'wind_direction_10m_dominant': 360}).fit(data)
+    with config_context(transform_output="pandas"):
+        result = encoder.transform(data)
+    expected = encode(encode(data.copy(), 'month', 12), 'wind_direction_10m_dominant', 360)
+    assert result.columns.tolist() == ['temperature_2m_mean', 'month_sin', 'month_cos',
+                                       'wind_direction_10m_dominant_sin', 'wind_direction_10m_dominant_cos']
+    pd.testing.assert_frame_equal(result, expected[result.columns], check_dtype=False)
+
+# Test that only the cyclical columns are converted, the others keeping their dtypes
+def test_cyclical_encoder_passes_other_columns_through():
+    data = pd.DataFrame({'temperature_2m_mean': np.array([1.5, -2.0, 3.25], dtype=np.float32),
+                         'month': [1, 6, 12],
+                         'station': ['a', 'b', 'c']})
+    encoder = CyclicalEncoder({'month': 12}).fit(data)
+    with config_context(transform_output="pandas"):
+        result = encoder.transform(data)
+    assert result.dtypes.to_dict() == {'temperature_2m_mean': np.float32, 'station': object,
+                                       'month_sin': np.float64, 'month_cos': np.float64}
+    pd.testing.assert_frame_equal(result[['temperature_2m_mean', 'station']], data[['temperature_2m_mean', 'station']])
+    pd.testing.assert_frame_equal(encoder.transform(data), result)
+    array = CyclicalEncoder({'x1': 12}).fit(data.to_numpy()).transform(data.to_numpy())
+    assert array[:, 1].tolist() == ['a', 'b', 'c']
+    assert np.allclose(array[:, 2:].astype(np.float64), result[['month_sin', 'month_cos']].to_numpy())
+
+# Test that transform checks its input against what the encoder was fitted on
+def test_cyclical_encoder_checks_input():
+    data = pd.DataFrame({'temperature_2m_mean': [1.0, 2.0], 'month': [1, 6]})
+    encoder = CyclicalEncoder({'month': 12}).fit(data)
+    assert encoder.n_features_in_ == 2 and encoder.feature_names_in_.tolist() == ['temperature_2m_mean', 'month']
+    with pytest.raises(ValueError):
+        encoder.transform(data[['month', 'temperature_2m_mean']])
+    with pytest.raises(ValueError):
+        encoder.transform(data[['month']])
+    assert not hasattr(encoder.fit(data.to_numpy()), 'feature_names_in_')
+
+# Test that cyclical columns missing at fit time are skipped and invalid periods rejected
+def test_cyclical_encoder_missing_columns_and_periods():
+    data = pd.DataFrame({'month': [1, 4, 7, 10]})
+    encoder = CyclicalEncoder().fit(data)
+    assert encoder.columns_.tolist() == ['month']
+    assert encoder.transform(data).shape == (4, 2)
+    with pytest.raises(ValueError):
+        CyclicalEncoder({'month': 0}).fit(test_data)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+# Import the walk-forward functions from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.utils import WalkForwardSplit, walk_forward_validate, cross_val_model
+
+# Eight years of daily data in shuffled row order, as written by a random train/test split
+rng = np.random.default_rng(42)
+n_days = 8 * 365
+dates = pd.date_range("2000-01-01", periods=n_days, freq="D")
+X = pd.DataFrame(rng.normal(size=(n_days, 3)), columns=['temperature_2m_mean', 'wind_speed_10m_max', 'month_sin'])
+y = pd.Series((X['temperature_2m_mean'] + 0.5 * rng.normal(size=n_days)) > 0, name='is_precipitation')
+order = rng.permutation(n_days)
+X, y, dates = X.iloc[order].reset_index(drop=True), y.iloc[order].reset_index(drop=True), dates[order]
+
+# Test that every fold trains only on years before its test year
+def test_folds_never_look_ahead():
+    cv = WalkForwardSplit(dates, min_train_periods=3)
+    folds = list(cv.split(X))
+    assert len(folds) == cv.get_n_splits() == 5
+    for k, (train, test) in enumerate(folds):
+        assert dates[train].max() < dates[test].min()
+        assert set(dates[test].year) == {2003 + k}
+        assert dates[train].min().year == 2000, "The window should expand"
+
+# Test the sliding window and gap layouts
+def test_sliding_window_and_gap():
+    folds = list(WalkForwardSplit(dates, min_train_periods=3, max_train_periods=2, gap=1).split(X))
+    assert len(folds) == 4
+    train, test = folds[0]
+    assert sorted(set(dates[train].year)) == [2001, 2002] and set(dates[test].year) == {2004}
+
+# Test that partial_fit pipelines are updated incrementally with only the new period
+def test_incremental_refit():
+    pipe = make_pipeline(StandardScaler(), SGDClassifier(random_state=0))
+    results = walk_forward_validate(pipe, X, y, dates, ["accuracy", "f1"], min_train_periods=3)
+    assert results['test_period'].tolist() == ['2003', '2004', '2005', '2006', '2007']
+    assert results['n_train'].tolist() == [int((dates.year < year).sum()) for year in range(2003, 2008)]
+    assert results['test_accuracy'].mean() > 0.75
+    assert pipe.steps[0][1].__dict__.get('n_samples_seen_') is None, "The estimator should be cloned"
+
+# Test that estimators without partial_fit are refitted per fold, matching cross_val_model
+def test_full_refit_matches_cross_val_model():
+    results = walk_forward_validate(LogisticRegression(), X, y, dates, ["accuracy"], min_train_periods=3)
+    summary = cross_val_model(StandardScaler(), {"LR": LogisticRegression()}, X, y, ["accuracy"],
+                              cv=WalkForwardSplit(dates, min_train_periods=3))
+    assert summary.loc['test_accuracy', ('LR', 'mean')] == pytest.approx(results['test_accuracy'].mean(), abs=1e-3)
+
+# Test for error handling with mismatched dates
+def test_mismatched_dates():
+    with pytest.raises(ValueError):
+        list(WalkForwardSplit(dates[:10]).split(X))
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Import the schema functions from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.weather_schema import apply_weather_schema, storage_values, WEATHER_CODE_DTYPE
+from src.weather_store import append_to_store, read_store
+
+# Two days as pandas.read_csv returns them from an export of get_vancouver_data
+raw = pd.DataFrame({'date': ['1990-01-01', '1990-01-02'],
+                    'location': ['Vancouver', 'Vancouver'],
+                    'weather_code': [3.0, np.nan],
+                    'temperature_2m_mean': [0.165, 1.243],
+                    'sunrise': [631177200, 631263600],
+                    'sunset': ['1990-01-01 16:20:00', '1990-01-02 16:21:00']})
+
+# Test that every column gets its compact dtype and keeps its values
+def test_apply_weather_schema_dtypes():
+    result = apply_weather_schema(raw)
+    assert result['temperature_2m_mean'].dtype == np.float32
+    assert result['weather_code'].dtype == WEATHER_CODE_DTYPE
+    assert result['weather_code'].tolist()[0] == 3 and pd.isna(result['weather_code'].iloc[1])
+    assert result['sunrise'].iloc[0] == pd.Timestamp('1990-01-01 07:00:00')
+    assert result['sunset'].iloc[1] == pd.Timestamp('1990-01-02 16:21:00')
+    assert result['date'].dtype == 'datetime64[ns]'
+    assert result['location'].dtype == object, "Columns outside the schema should be left alone"
+    assert raw['temperature_2m_mean'].dtype == np.float64, "The input frame should not be modified"
+
+# Test that the compact frame takes less memory
+def test_apply_weather_schema_memory():
+    n = 10_000
+    data = pd.DataFrame({'weather_code': np.tile([0.0, 3.0, 61.0, 95.0], n // 4),
+                         'temperature_2m_mean': np.linspace(-5, 30, n),
+                         'precipitation_sum': np.linspace(0, 50, n)})
+    compact = apply_weather_schema(data)
+    assert compact.memory_usage(deep=True).sum() < data.memory_usage(deep=True).sum() / 2
+
+# Test that codes outside the WMO table are rejected
+def test_unknown_weather_code():
+    with pytest.raises(ValueError):
+        apply_weather_schema(pd.DataFrame({'weather_code': [3.0, 150.0]}))
+    with pytest.raises(ValueError):
+        apply_weather_schema(pd.DataFrame({'weather_code': [2.5]}))
+
+# Test that sun times and categories survive a round trip through the SQLite store
+def test_store_round_trip(tmp_path):
+    frame = apply_weather_schema(raw).drop(columns='location').set_index('date')
+    store = str(tmp_path / "weather.sqlite")
+    append_to_store(frame, store)
+    pd.testing.assert_frame_equal(read_store(store), frame, check_freq=False)
+    np.testing.assert_array_equal(storage_values(frame['sunrise']), [631177200.0, 631263600.0])
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Import the weather store functions from the src folder
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import src.get_api as get_api
+from src.get_api import get_vancouver_data
+from src.weather_store import append_to_store, missing_dates, read_store, stored_date_range, load_weather_frame
+from src.weather_schema import apply_weather_schema
+
+url = "https://archive-api.open-meteo.com/v1/archive"
+
+def make_frame(start_date, end_date):
+    dates = pd.date_range(start_date, end_date, freq="D", name="date")
+    values = np.arange(len(dates), dtype=float)
+    return pd.DataFrame({"precipitation_sum": values, "temperature_2m_mean": values / 2}, index=dates)
+
+# Test that a store that does not exist yet reports no dates
+def test_stored_date_range_missing_store(tmp_path):
+    assert stored_date_range(str(tmp_path / "missing.sqlite")) == (None, None)
+
+# Test that appended rows can be read back with a DatetimeIndex
+def test_append_and_read_round_trip(tmp_path):
+    store = str(tmp_path / "store" / "weather.sqlite")
+    frame = make_frame("2010-01-01", "2010-01-10")
+    assert append_to_store(frame, store) == 10
+    result = read_store(store)
+    assert isinstance(result.index, pd.DatetimeIndex), "Did not return DatetimeIndex"
+    pd.testing.assert_frame_equal(result, apply_weather_schema(frame), check_freq=False)
+    assert result["precipitation_sum"].dtype == np.float32, "Measurements should be read back as float32"
+    assert stored_date_range(store) == (pd.Timestamp("2010-01-01"), pd.Timestamp("2010-01-10"))
+
+# Test that appending an overlapping range replaces rows instead of duplicating them
+def test_append_overlap_replaces_rows(tmp_path):
+    store = str(tmp_path / "weather.sqlite")
+    append_to_store(make_frame("2010-01-01", "2010-01-10"), store)
+    append_to_store(make_frame("2010-01-08", "2010-01-12"), store)
+    result = read_store(store)
+    assert result.shape[0] == 12, "Overlapping dates should not be duplicated"
+    assert result.loc["2010-01-08", "precipitation_sum"] == 0, "Newer rows should replace stored ones"
+
+# Test that days without any measurement are stored, but still reported as missing
+def test_append_keeps_empty_days_missing(tmp_path):
+    store = str(tmp_path / "weather.sqlite")
+    frame = make_frame("2010-01-01", "2010-01-05")
+    frame.iloc[[0, 2, 4]] = np.nan
+    assert append_to_store(frame, store) == 5
+    assert stored_date_range(store) == (pd.Timestamp("2010-01-01"), pd.Timestamp("2010-01-05"))
+    expected = pd.to_datetime(["2010-01-01", "2010-01-03", "2010-01-05"])
+    assert missing_dates(store, "2010-01-01", "2010-01-05").equals(expected)
+    # Empty days outside the requested range are not fetched again, but unstored days bridging the gap are
+    assert missing_dates(store, "2010-01-02", "2010-01-02").empty
+    assert missing_dates(store, "2010-01-08", "2010-01-09").equals(pd.date_range("2010-01-06", "2010-01-09"))
+
+# Test that the store can be read back in the CSV layout used by the scripts
+def test_load_weather_frame_from_store(tmp_path):
+    store = str(tmp_path / "weather.sqlite")
+    append_to_store(make_frame("2010-01-01", "2010-01-10"), store)
+    result = load_weather_frame(store)
+    assert "date" in result.columns and result.shape == (10, 3)
+
+# Test that get_vancouver_data only fetches the dates missing from the store
+def test_get_vancouver_data_fetches_missing_tail(tmp_path, monkeypatch):
+    store = str(tmp_path / "weather.sqlite")
+    calls = []
+
+    def fake_fetch(url, start_date, end_date, chunk_freq, max_workers, retries):
+        calls.append((start_date, end_date))
+        return make_frame(start_date, end_date)
+
+    monkeypatch.setattr(get_api, "_fetch_daily_frame", fake_fetch)
+
+    get_vancouver_data(url, "2010-01-01", "2010-01-10", store=store)
+    result = get_vancouver_data(url, "2010-01-01", "2010-01-13", store=store)
+    assert calls == [("2010-01-01", "2010-01-10"), ("2010-01-11", "2010-01-13")], "Only the tail should be fetched"
+    assert result.shape[0] == 13, "Returned wrong number of rows"
+
+    get_vancouver_data(url, "2010-01-05", "2010-01-12", store=store)
+    assert len(calls) == 2, "A range already held in the store should not hit the API"
+
+# Test that empty days before and inside the stored dates are fetched again
+def test_get_vancouver_data_refetches_empty_days(tmp_path, monkeypatch):
+    store = str(tmp_path / "weather.sqlite")
+    calls = []
+
+    def fake_fetch(url, start_date, end_date, chunk_freq, max_workers, retries):
+        calls.append((start_date, end_date))
+        frame = make_frame(start_date, end_date)
+        # The archive has no values yet for these days on the first download
+        if len(calls) == 1:
+            frame.loc[["2010-01-01", "2010-01-02", "2010-01-05"]] = np.nan
+        return frame
+
+    monkeypatch.setattr(get_api, "_fetch_daily_frame", fake_fetch)
+
+    get_vancouver_data(url, "2010-01-01", "2010-01-10", store=store)
+    result = get_vancouver_data(url, "2010-01-01", "2010-01-10", store=store)
+    assert calls[1:] == [("2010-01-01", "2010-01-02"), ("2010-01-05", "2010-01-05")]
+    assert result.shape[0] == 10 and result.notna().all().all()
+    get_vancouver_data(url, "2010-01-01", "2010-01-10", store=store)
+    assert len(calls) == 3, "Days held with values should not be fetched again"
@@ -15,7 +15,7 @@ from sklearn.svm import SVC
 
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from src.utils import cross_val_model 
+from src.utils import cross_val_model, transform_cache
 
 
 # Create a sample dataset for testing
@@ -62,3 +62,43 @@ def test_with_invalid_input():
 def test_output_format():
     results = cross_val_model(preprocessor, models, X_train, y_train, classification_metrics)
     assert all(isinstance(value, (float, np.number)) for value in results.values.flatten()), "All values in the results should be numeric"
+
+#Test that spreading the (model x fold) grid over worker processes gives the same scores
+def test_parallel_matches_serial():
+    test_models = {"DecisionTree": DecisionTreeClassifier(random_state=42), "LogisticRegression": LogisticRegression()}
+    serial = cross_val_model(preprocessor, test_models, X_train, y_train, classification_metrics)
+    parallel = cross_val_model(preprocessor, test_models, X_train, y_train, classification_metrics, n_jobs=2)
+    scores = [index for index in serial.index if index.startswith(("test_", "train_"))]
+    pd.testing.assert_frame_equal(serial.loc[scores], parallel.loc[scores])
+    assert list(parallel.index) == list(serial.index), "Timing rows should be kept for every model"
+
+#Scaler that records every fit in a file, so fits in worker processes are counted too
+class CountingScaler(StandardScaler):
+    def __init__(self, log_path=None):
+        super().__init__()
+        self.log_path = log_path
+
+    def fit(self, X, y=None, sample_weight=None):
+        with open(self.log_path, "a") as f:
+            f.write("x")
+        return super().fit(X, y, sample_weight)
+
+#Test that the cached preprocessor is fitted once per fold and shared by all models
+def test_transform_cache_shares_folds(tmp_path):
+    log_path = str(tmp_path / "fits.txt")
+    test_models = {"DecisionTree": DecisionTreeClassifier(random_state=42), "LogisticRegression": LogisticRegression()}
+    with transform_cache(str(tmp_path / "cache")) as memory:
+        cached = cross_val_model(CountingScaler(log_path), test_models, X_train, y_train, classification_metrics,
+                                 memory=memory)
+    assert len(open(log_path).read()) == 5, "The preprocessor should be fitted once per fold"
+
+    uncached = cross_val_model(StandardScaler(), test_models, X_train, y_train, classification_metrics)
+    scores = [index for index in uncached.index if index.startswith(("test_", "train_"))]
+    pd.testing.assert_frame_equal(cached.loc[scores], uncached.loc[scores])
+
+#Test that a temporary cache is removed afterwards
+def test_transform_cache_temporary_dir_removed():
+    with transform_cache() as memory:
+        location = memory.location
+        assert os.path.isdir(location)
+    assert not os.path.exists(location), "The temporary cache should be removed on exit"